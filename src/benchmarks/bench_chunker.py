@@ -0,0 +1,86 @@
+from helpers.text_chunker import OffsetTextChunker
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+import argparse
+import random
+import time
+import tracemalloc
+
+# compares OffsetTextChunker with LangChain's RecursiveCharacterTextSplitter
+# run from src/:  python -m benchmarks.bench_chunker --size-mb 10
+
+def generate_text(size: int, seed: int = 7):
+
+    random.seed(seed)
+    words = ["retrieval", "augmented", "generation", "vector", "chunk", "the", "a", "of",
+             "embedding", "document", "query", "answer", "model", "context", "token"]
+
+    parts = []
+    length = 0
+
+    while length < size:
+        sentence = " ".join(random.choices(words, k = random.randint(5, 25))) + "."
+        separator = random.choices([" ", "\n", "\n\n"], weights = [10, 3, 1])[0]
+        parts.append(sentence + separator)
+        length += len(sentence) + len(separator)
+
+    return "".join(parts)[:size]
+
+def run_langchain(texts: list, metadatas: list, chunk_size: int, chunk_overlap: int):
+
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size = chunk_size,
+        chunk_overlap = chunk_overlap,
+        length_function = len
+    )
+
+    return [chunk.page_content for chunk in text_splitter.create_documents(texts, metadatas = metadatas)]
+
+def run_offset(texts: list, metadatas: list, chunk_size: int, chunk_overlap: int):
+
+    text_chunker = OffsetTextChunker(
+        chunk_size = chunk_size,
+        chunk_overlap = chunk_overlap
+    )
+
+    return [chunk.page_content for chunk in text_chunker.split_pages(texts, metadatas = metadatas)]
+
+def measure(function, *args):
+
+    tracemalloc.start()
+    started_at = time.perf_counter()
+
+    result = function(*args)
+
+    elapsed = time.perf_counter() - started_at
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, elapsed, peak
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type = float, default = 10)
+    parser.add_argument("--pages", type = int, default = 1)
+    parser.add_argument("--chunk-size", type = int, default = 100)
+    parser.add_argument("--chunk-overlap", type = int, default = 20)
+    args = parser.parse_args()
+
+    page_size = int(args.size_mb * 1024 * 1024 / args.pages)
+    texts = [generate_text(page_size, seed = i) for i in range(args.pages)]
+    metadatas = [{"source" : "benchmark", "page" : i} for i in range(args.pages)]
+
+    langchain_chunks, langchain_time, langchain_peak = measure(
+        run_langchain, texts, metadatas, args.chunk_size, args.chunk_overlap)
+
+    offset_chunks, offset_time, offset_peak = measure(
+        run_offset, texts, metadatas, args.chunk_size, args.chunk_overlap)
+
+    print(f"input: {args.size_mb} MB in {args.pages} page(s), chunk_size={args.chunk_size}, chunk_overlap={args.chunk_overlap}")
+    print(f"{'chunker':<12}{'chunks':>10}{'seconds':>12}{'peak MB':>12}")
+    print(f"{'langchain':<12}{len(langchain_chunks):>10}{langchain_time:>12.3f}{langchain_peak / 2**20:>12.1f}")
+    print(f"{'offset':<12}{len(offset_chunks):>10}{offset_time:>12.3f}{offset_peak / 2**20:>12.1f}")
+    print(f"speedup: {langchain_time / offset_time:.2f}x, identical chunks: {langchain_chunks == offset_chunks}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+from stores.llm.EmbeddingProcessPool import EmbeddingProcessPool
+from benchmarks.bench_onnx_embeddings import generate_texts
+import argparse
+import time
+
+# bulk embedding throughput of EmbeddingProcessPool as the number of worker processes grows
+# run from src/:  python -m benchmarks.bench_embedding_pool --workers 1 2 4 8 16 32
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model-id", default = "sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--embedding-size", type = int, default = 384)
+    parser.add_argument("--workers", type = int, nargs = "+", default = [1, 2, 4, 8])
+    parser.add_argument("--threads-per-worker", type = int, default = 1)
+    parser.add_argument("--texts", type = int, default = 4096)
+    parser.add_argument("--batch-size", type = int, default = 64)
+    args = parser.parse_args()
+
+    texts = generate_texts(args.texts)
+    base_rate = None
+
+    print(f"model: {args.model_id}, texts: {args.texts}, threads per worker: {args.threads_per_worker}")
+    print(f"{'workers':>8}{'seconds':>10}{'texts/s':>10}{'speedup':>10}")
+
+    for workers in args.workers:
+
+        pool = EmbeddingProcessPool(
+            model_id = args.model_id,
+            embedding_size = args.embedding_size,
+            workers = workers,
+            threads_per_worker = args.threads_per_worker
+        )
+
+        # every worker loads the model before the measured run
+        _ = pool.embed_texts(texts[:workers * pool.min_shard_size], batch_size = args.batch_size)
+
+        started_at = time.perf_counter()
+        _ = pool.embed_texts(texts, batch_size = args.batch_size)
+        elapsed = time.perf_counter() - started_at
+
+        pool.shutdown()
+
+        rate = args.texts / elapsed
+        base_rate = base_rate if base_rate else rate
+
+        print(f"{workers:>8}{elapsed:>10.2f}{rate:>10.1f}{rate / base_rate:>9.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import argparse
+import os
+import subprocess
+import sys
+
+# import-time report of the API process, like `python -X importtime`
+# run from src/:  python -m benchmarks.bench_imports --top 20
+#                 python -m benchmarks.bench_imports --statement "import worker"
+
+HEAVY_MODULES = ["torch", "tensorflow", "transformers", "sentence_transformers",
+                 "openai", "cohere", "qdrant_client", "langchain_community", "pymupdf"]
+
+def run_importtime(statement: str):
+
+    # every module imported by the statement is listed in the child's stderr as
+    # "import time: self [us] | cumulative | imported package"
+    src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    code = "\n".join([
+        statement,
+        "import sys, resource",
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))",
+        "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)",
+    ])
+
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd = src_dir, capture_output = True, text = True
+    )
+
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+
+    records = []
+    for line in completed.stderr.splitlines():
+
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        records.append({
+            "module" : module[1:].rstrip(),
+            "self_us" : int(self_us),
+            "cumulative_us" : int(cumulative_us),
+        })
+
+    loaded_heavy, max_rss_kb = completed.stdout.strip().splitlines()[-2:]
+
+    return records, [m for m in loaded_heavy.split(",") if m], int(max_rss_kb)
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--statement", default = "import main")
+    parser.add_argument("--top", type = int, default = 15)
+    args = parser.parse_args()
+
+    records, loaded_heavy, max_rss_kb = run_importtime(args.statement)
+
+    # top level imports (no leading indentation) add up to the whole import time
+    top_level = [r for r in records if not r["module"].startswith(" ")]
+    total_us = sum(r["cumulative_us"] for r in top_level)
+
+    print(f"statement: {args.statement}")
+    print(f"modules imported: {len(records)}, total import time: {total_us / 1000:.1f} ms, "
+          f"max rss: {max_rss_kb / 1024:.1f} MB")
+    print(f"heavy modules loaded: {', '.join(loaded_heavy) if loaded_heavy else 'none'}")
+    print()
+    print(f"{'cumulative ms':>14}{'self ms':>10}  module")
+
+    for record in sorted(records, key = lambda r: r["cumulative_us"], reverse = True)[:args.top]:
+        print(f"{record['cumulative_us'] / 1000:>14.1f}{record['self_us'] / 1000:>10.1f}  {record['module']}")
+
+if __name__ == "__main__":
+    main()
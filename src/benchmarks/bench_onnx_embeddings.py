@@ -0,0 +1,143 @@
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import multiprocessing
+import os
+import random
+import resource
+import statistics
+import sys
+import time
+import numpy as np
+
+# parity and speed of the ONNX (int8) embedding backend against the PyTorch SentenceTransformer
+# run from src/:  python -m benchmarks.bench_onnx_embeddings \
+#                     --model-id sentence-transformers/all-MiniLM-L6-v2 --onnx-dir assets/models/all-MiniLM-L6-v2
+# the model is exported into --onnx-dir first when it has no model.onnx (needs torch), and the
+# exit status is 1 when an ONNX backend is below --min-similarity to PyTorch for some text
+
+def generate_texts(count: int, seed: int = 7):
+
+    random.seed(seed)
+    words = ["retrieval", "augmented", "generation", "vector", "chunk", "the", "a", "of",
+             "embedding", "document", "query", "answer", "model", "context", "token",
+             "how", "what", "is", "project", "search", "index", "file", "language"]
+
+    return [
+        " ".join(random.choices(words, k = random.randint(3, 60)))
+        for _ in range(count)
+    ]
+
+def run_backend(backend: str, model_id: str, onnx_dir: str, texts: list,
+                threads: int, batch_size: int, queries: int):
+
+    # runs in its own process, so the peak rss belongs to this backend only
+    started_at = time.perf_counter()
+
+    if backend == "torch":
+        from sentence_transformers import SentenceTransformer
+        import torch
+
+        torch.set_num_threads(threads)
+        model = SentenceTransformer(model_id, device = "cpu")
+
+        def embed(batch):
+            return model.encode(batch, batch_size = batch_size, convert_to_numpy = True)
+
+    else:
+        from stores.llm.providers.OnnxEmbeddingProvider import OnnxEmbeddingProvider
+
+        provider = OnnxEmbeddingProvider(
+            intra_op_threads = threads,
+            quantize = backend == "onnx-int8",
+            default_input_max_characters = 10 ** 9,
+            default_embedding_batch_size = batch_size
+        )
+        provider.set_embedding_model(model_id = onnx_dir, embedding_size = None)
+
+        def embed(batch):
+            return np.array(provider.embed_texts(batch))
+
+    load_seconds = time.perf_counter() - started_at
+
+    # warm up, then one text at a time like a search request
+    _ = embed(texts[:2])
+
+    latencies = []
+    for text in texts[:queries]:
+        query_started_at = time.perf_counter()
+        _ = embed([text])
+        latencies.append(time.perf_counter() - query_started_at)
+
+    batch_started_at = time.perf_counter()
+    vectors = embed(texts)
+    batch_seconds = time.perf_counter() - batch_started_at
+
+    return {
+        "backend" : backend,
+        "vectors" : vectors,
+        "load_seconds" : load_seconds,
+        "p50_ms" : 1000 * statistics.median(latencies),
+        "p95_ms" : 1000 * statistics.quantiles(latencies, n = 20)[-1],
+        "texts_per_second" : len(texts) / batch_seconds,
+        "max_rss_mb" : resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+def cosine_similarities(a: np.ndarray, b: np.ndarray):
+
+    a = a / np.linalg.norm(a, axis = 1, keepdims = True)
+    b = b / np.linalg.norm(b, axis = 1, keepdims = True)
+
+    return (a * b).sum(axis = 1)
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model-id", default = "sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--onnx-dir", required = True)
+    parser.add_argument("--texts", type = int, default = 512)
+    parser.add_argument("--queries", type = int, default = 100)
+    parser.add_argument("--batch-size", type = int, default = 32)
+    parser.add_argument("--threads", type = int, default = 4)
+    parser.add_argument("--min-similarity", type = float, default = 0.99)
+    args = parser.parse_args()
+
+    if not os.path.exists(os.path.join(args.onnx_dir, "model.onnx")):
+        from stores.llm.providers.OnnxEmbeddingProvider import export_onnx_model
+
+        print(f"exporting {args.model_id} to {args.onnx_dir}")
+        export_onnx_model(model_id = args.model_id, output_dir = args.onnx_dir)
+
+    texts = generate_texts(args.texts)
+    results = {}
+
+    for backend in ["torch", "onnx", "onnx-int8"]:
+        with ProcessPoolExecutor(max_workers = 1, mp_context = multiprocessing.get_context("spawn")) as pool:
+            results[backend] = pool.submit(
+                run_backend, backend, args.model_id, args.onnx_dir, texts,
+                args.threads, args.batch_size, args.queries
+            ).result()
+
+    print(f"model: {args.model_id}, texts: {args.texts}, batch_size: {args.batch_size}, threads: {args.threads}")
+    print(f"{'backend':<12}{'load s':>9}{'p50 ms':>9}{'p95 ms':>9}{'texts/s':>10}{'max rss MB':>12}"
+          f"{'min cos':>10}{'mean cos':>10}")
+
+    is_parity = True
+
+    for backend, result in results.items():
+
+        similarities = cosine_similarities(results["torch"]["vectors"], result["vectors"])
+
+        if backend != "torch" and similarities.min() < args.min_similarity:
+            is_parity = False
+
+        print(f"{backend:<12}{result['load_seconds']:>9.2f}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}"
+              f"{result['texts_per_second']:>10.1f}{result['max_rss_mb']:>12.1f}"
+              f"{similarities.min():>10.5f}{similarities.mean():>10.5f}")
+
+    print(f"parity (min cosine >= {args.min_similarity}): {'ok' if is_parity else 'FAILED'}")
+
+    if not is_parity:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
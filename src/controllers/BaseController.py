@@ -17,6 +17,10 @@ class BaseController:
         self.database_dir = os.path.join(
             self.base_dir, "assets/database")
 
+        # project ids are alphanumeric, so this name never collides with a project directory
+        self.blobs_dir = os.path.join(
+            self.files_dir, "_blobs")
+
     def generate_random_string(self, length: int = 12):
 
         # generating random strings
@@ -30,4 +34,10 @@ class BaseController:
         if not os.path.exists(database_path):
             os.makedirs(database_path)
         
-        return database_path
\ No newline at end of file
+        return database_path
+
+    def get_blob_path(self, checksum: str):
+
+        # uploads are stored once per content hash: assets/files/_blobs/ab/abcdef...
+        return os.path.join(
+            self.blobs_dir, checksum[:2], checksum)
\ No newline at end of file
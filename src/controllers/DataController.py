@@ -34,10 +34,34 @@ class DataController( BaseController ):
 
         while os.path.exists(path = new_file_path):
             random_key = self.generate_random_string()
-            new_file_path = os.path.exists(project_path , random_key + "_" + cleaned_file_name)
+            new_file_path = os.path.join(project_path , random_key + "_" + cleaned_file_name)
         
         return new_file_path, random_key + "_" + cleaned_file_name
     
+    def get_upload_temp_path(self):
+
+        temp_dir = os.path.join(self.blobs_dir, "tmp")
+
+        if not os.path.exists(temp_dir):
+            os.makedirs(temp_dir, exist_ok = True)
+
+        return os.path.join(temp_dir, self.generate_random_string(length = 24))
+
+    def store_blob(self, temp_file_path: str, checksum: str):
+
+        # moves the uploaded file to its content-addressed path, or drops it when
+        # the same content is already stored; returns (blob_path, is_duplicate)
+        blob_path = self.get_blob_path(checksum)
+
+        if os.path.exists(blob_path):
+            os.remove(temp_file_path)
+            return blob_path, True
+
+        os.makedirs(os.path.dirname(blob_path), exist_ok = True)
+        os.replace(temp_file_path, blob_path)
+
+        return blob_path, False
+    
     def get_clean_file_name(self, orig_file_name: str):
 
         cleaned_file_name = re.sub(r"[^\w.]" , "" , orig_file_name)
@@ -0,0 +1,758 @@
+from .BaseController import BaseController
+from .ProcessController import ProcessController
+from .IngestionProgress import IngestionProgress
+from .PipelineMetrics import PipelineStageMetrics
+from models.enums import ResponseSignal, AssetTypeEnum
+from models.db_schemes import Project
+from concurrent.futures import Executor
+from datetime import datetime
+import asyncio
+import logging
+import math
+import time
+
+class IngestionController(BaseController):
+
+    def __init__(self):
+
+        super().__init__()
+
+        self.logger = logging.getLogger(__name__)
+
+        # the chunk fields needed to push a chunk into the vector db
+        self.push_chunk_fields = ["chunk_text", "chunk_metadata", "chunk_asset_id"]
+
+    async def get_project_assets(self, project: Project, asset_model, file_id: str = None):
+
+        # returns a list of assets, or None when the requested file_id does not exist
+        if file_id:
+
+            asset_record = await asset_model.get_asset_by_asset_name(
+                asset_project_id = project.id, asset_name = file_id)
+
+            if asset_record is None:
+                return None
+
+            return [asset_record]
+
+        return await asset_model.get_all_prject_assets(
+            asset_project_id = project.id, asset_type = AssetTypeEnum.FILE.value)
+
+    def get_asset_processing_config(self, checksum: str, chunk_size: int, chunk_overlap: int):
+
+        return {
+            "checksum" : checksum,
+            "chunk_size" : chunk_size,
+            "overlap_size" : chunk_overlap,
+        }
+
+    async def process_project_files(self, project: Project, asset_model, chunk_model,
+                                          project_assets: list, chunk_size: int, chunk_overlap: int,
+                                          do_reset: int = 0, do_incremental: int = 0,
+                                          nlp_controller = None,
+                                          progress: IngestionProgress = None,
+                                          process_pool: Executor = None):
+
+        progress = progress if progress else IngestionProgress()
+        progress.set_files_total(len(project_assets))
+
+        if do_reset == 1:
+            _ = await chunk_model.delete_chunks_by_project_id(project.id)
+
+        process_controller = ProcessController(project.project_id)
+
+        # step 1: checksum every file, the result is stored on the asset after processing;
+        # content-addressed uploads already carry their checksum
+        loop = asyncio.get_running_loop()
+
+        assets_paths = {
+            asset.id : process_controller.get_asset_file_path(asset)
+            for asset in project_assets
+        }
+
+        async def get_asset_checksum(asset):
+
+            if asset.asset_checksum and assets_paths[asset.id] == self.get_blob_path(asset.asset_checksum):
+                return asset.asset_checksum
+
+            return await loop.run_in_executor(
+                process_pool, ProcessController.get_file_checksum, assets_paths[asset.id])
+
+        files_checksums = await asyncio.gather(*[
+            get_asset_checksum(asset)
+            for asset in project_assets
+        ])
+
+        assets_config = {
+            asset.id : self.get_asset_processing_config(
+                checksum = checksum, chunk_size = chunk_size, chunk_overlap = chunk_overlap)
+            for asset, checksum in zip(project_assets, files_checksums)
+        }
+
+        # step 2: in incremental mode skip the assets processed with the same content and
+        # parameters, and drop the chunks and vectors of the ones that changed
+        no_skipped_files = 0
+
+        if do_incremental == 1 and do_reset != 1:
+
+            changed_assets = []
+
+            for asset in project_assets:
+
+                asset_config = assets_config[asset.id]
+
+                if asset_config["checksum"] is not None and asset.asset_config == asset_config:
+                    progress.start_file(asset.asset_name)
+                    progress.finish_file(asset.asset_name, status = "skipped")
+                    no_skipped_files += 1
+                    continue
+
+                changed_assets.append(asset)
+
+            if len(changed_assets) > 0:
+
+                changed_assets_ids = [asset.id for asset in changed_assets]
+
+                _ = await chunk_model.delete_chunks_by_asset_ids(
+                    project_id = project.id, asset_ids = changed_assets_ids)
+
+                if nlp_controller:
+                    _ = await nlp_controller.delete_vector_db_assets(
+                        project = project, asset_ids = changed_assets_ids)
+
+            project_assets = changed_assets
+
+        # step 3: reuse the chunks of an identical file already processed with the same
+        # parameters (in this or another project) instead of parsing it again
+        no_reused_files = 0
+        no_reused_records = 0
+        assets_to_process = []
+        # identical files in this run are parsed once, then copied: {checksum: [assets]}
+        duplicate_assets = {}
+
+        for asset in project_assets:
+
+            asset_config = assets_config[asset.id]
+
+            if asset_config["checksum"] in duplicate_assets:
+                duplicate_assets[asset_config["checksum"]].append(asset)
+                continue
+
+            if asset_config["checksum"] is not None:
+
+                source_asset = await asset_model.get_processed_asset(
+                    asset_config = asset_config, exclude_asset_id = asset.id)
+
+                if source_asset:
+
+                    copied_records = await chunk_model.copy_asset_chunks(
+                        source_asset_id = source_asset.id,
+                        project_id = project.id,
+                        asset_id = asset.id
+                    )
+
+                    if copied_records > 0:
+
+                        _ = await asset_model.update_asset_processing(
+                            asset_id = asset.id,
+                            asset_checksum = asset_config["checksum"],
+                            asset_config = asset_config
+                        )
+
+                        progress.start_file(asset.asset_name)
+                        progress.add_file_pages(asset.asset_name, pages = 0, chunks = copied_records)
+                        progress.finish_file(asset.asset_name, status = "reused")
+
+                        no_reused_files += 1
+                        no_reused_records += copied_records
+                        continue
+
+                duplicate_assets[asset_config["checksum"]] = []
+
+            assets_to_process.append(asset)
+
+        project_files_ids = {
+            asset.id : asset.asset_name
+            for asset in assets_to_process
+        }
+
+        if process_pool is not None:
+            is_success, signal, result = await self.process_project_files_parallel(
+                project = project,
+                asset_model = asset_model,
+                chunk_model = chunk_model,
+                process_controller = process_controller,
+                project_files_ids = project_files_ids,
+                assets_paths = assets_paths,
+                assets_config = assets_config,
+                chunk_size = chunk_size,
+                chunk_overlap = chunk_overlap,
+                progress = progress,
+                process_pool = process_pool
+            )
+        else:
+            is_success, signal, result = await self.process_project_files_sequential(
+                project = project,
+                asset_model = asset_model,
+                chunk_model = chunk_model,
+                process_controller = process_controller,
+                project_files_ids = project_files_ids,
+                assets_paths = assets_paths,
+                assets_config = assets_config,
+                chunk_size = chunk_size,
+                chunk_overlap = chunk_overlap,
+                progress = progress
+            )
+
+        if is_success:
+
+            for asset in assets_to_process:
+
+                asset_config = assets_config[asset.id]
+
+                for duplicate_asset in duplicate_assets.get(asset_config["checksum"], []):
+
+                    copied_records = await chunk_model.copy_asset_chunks(
+                        source_asset_id = asset.id,
+                        project_id = project.id,
+                        asset_id = duplicate_asset.id
+                    )
+
+                    if copied_records == 0:
+                        continue
+
+                    _ = await asset_model.update_asset_processing(
+                        asset_id = duplicate_asset.id,
+                        asset_checksum = asset_config["checksum"],
+                        asset_config = asset_config
+                    )
+
+                    progress.start_file(duplicate_asset.asset_name)
+                    progress.add_file_pages(duplicate_asset.asset_name, pages = 0, chunks = copied_records)
+                    progress.finish_file(duplicate_asset.asset_name, status = "reused")
+
+                    no_reused_files += 1
+                    no_reused_records += copied_records
+
+            result["inserted_chunks"] += no_reused_records
+            result["processed_files"] += no_reused_files
+            result["reused_files"] = no_reused_files
+            result["skipped_files"] = no_skipped_files
+
+        return is_success, signal, result
+
+    async def process_project_files_sequential(self, project: Project, asset_model, chunk_model,
+                                                     process_controller: ProcessController,
+                                                     project_files_ids: dict, assets_paths: dict,
+                                                     assets_config: dict, chunk_size: int,
+                                                     chunk_overlap: int, progress: IngestionProgress):
+
+        no_records = 0
+        no_files = 0
+
+        for asset_id, file_id in project_files_ids.items():
+
+            progress.start_file(file_id)
+
+            file_content = process_controller.get_file_content(file_id, file_path = assets_paths[asset_id])
+
+            if file_content is None:
+                self.logger.error(f"Error while processing file: {file_id}")
+                progress.add_error(message = ResponseSignal.FILE_PROCESS_NOT_FOUND.value, file_id = file_id)
+                continue
+
+            progress.set_file_pages_total(file_id, len(file_content))
+
+            file_chunks = process_controller.process_file_content(
+                file_content = file_content, chunk_size = chunk_size, chunk_overlap = chunk_overlap)
+
+            if file_chunks is None or len(file_chunks) == 0:
+                progress.add_error(message = ResponseSignal.FILE_PROCESS_FAILED.value, file_id = file_id)
+                return False, ResponseSignal.FILE_PROCESS_FAILED.value, None
+
+            # DataChunk records built directly, the splitter never yields an empty chunk
+            file_chunks_records = (
+
+                {
+                    "chunk_text" : chunk.page_content,
+                    "chunk_metadata" : chunk.metadata,
+                    "chunk_order" : i+1,
+                    "chunk_project_id" : project.id,
+                    "chunk_asset_id" : asset_id,
+                }
+
+                for i, chunk in enumerate(file_chunks)
+            )
+
+            no_records += await chunk_model.insert_many_chunks(chunks = file_chunks_records)
+            no_files += 1
+
+            _ = await asset_model.update_asset_processing(
+                asset_id = asset_id,
+                asset_checksum = assets_config[asset_id]["checksum"],
+                asset_config = assets_config[asset_id]
+            )
+
+            progress.add_file_pages(file_id, pages = len(file_content), chunks = len(file_chunks))
+            progress.finish_file(file_id)
+
+            if not await progress.flush():
+                return False, ResponseSignal.JOB_LEASE_LOST_ERROR.value, None
+
+        return True, ResponseSignal.FILE_PROCESS_SUCCESS.value, {
+            "inserted_chunks" : no_records,
+            "processed_files" : no_files,
+        }
+
+    async def process_project_files_parallel(self, project: Project, asset_model, chunk_model,
+                                                   process_controller: ProcessController,
+                                                   project_files_ids: dict, assets_paths: dict,
+                                                   assets_config: dict, chunk_size: int, chunk_overlap: int,
+                                                   progress: IngestionProgress,
+                                                   process_pool: Executor):
+
+        loop = asyncio.get_running_loop()
+        pages_per_task = self.app_settings.PROCESS_PDF_PAGES_PER_TASK
+
+        files = [
+            (asset_id, file_id, assets_paths[asset_id], process_controller.get_file_extension(file_id))
+            for asset_id, file_id in project_files_ids.items()
+        ]
+
+        # step 1: count pages in the pool, so large PDFs can be split into page ranges
+        files_pages = await asyncio.gather(*[
+            loop.run_in_executor(process_pool, ProcessController.count_file_pages,
+                                 file_path, file_extension)
+            for _, _, file_path, file_extension in files
+        ])
+
+        # step 2: submit one task per file, or per page range for large PDFs
+        files_state = {}
+        tasks = {}
+
+        for (asset_id, file_id, file_path, file_extension), pages_total in zip(files, files_pages):
+
+            progress.start_file(file_id)
+
+            if pages_total is None:
+                self.logger.error(f"Error while processing file: {file_id}")
+                progress.add_error(message = ResponseSignal.FILE_PROCESS_NOT_FOUND.value, file_id = file_id)
+                continue
+
+            progress.set_file_pages_total(file_id, pages_total)
+
+            page_ranges = [
+                (page_start, min(page_start + pages_per_task, pages_total))
+                for page_start in range(0, pages_total, pages_per_task)
+            ] if pages_total > pages_per_task else [(None, None)]
+
+            files_state[file_id] = {
+                "asset_id" : asset_id,
+                "ranges_total" : len(page_ranges),
+                "next_range" : 0,
+                "ready_ranges" : {},
+                "chunks" : 0,
+            }
+
+            for range_no, (page_start, page_end) in enumerate(page_ranges):
+
+                task = loop.run_in_executor(
+                    process_pool, ProcessController.process_file_pages,
+                    file_path, file_extension, chunk_size, chunk_overlap, page_start, page_end,
+                    self.app_settings.PROCESS_CHUNKER
+                )
+                tasks[task] = (file_id, range_no)
+
+        # step 3: insert chunks as soon as they come back; ranges of the same file are
+        # inserted in page order so chunk_order stays sequential within the file
+        no_records = 0
+        no_files = 0
+        pending = set(tasks.keys())
+
+        try:
+            while pending:
+
+                done, pending = await asyncio.wait(pending, return_when = asyncio.FIRST_COMPLETED)
+
+                for task in done:
+
+                    file_id, range_no = tasks[task]
+                    file_state = files_state[file_id]
+                    file_state["ready_ranges"][range_no] = task.result()
+
+                    while file_state["next_range"] in file_state["ready_ranges"]:
+
+                        pages_count, range_chunks = file_state["ready_ranges"].pop(file_state["next_range"])
+                        file_state["next_range"] += 1
+
+                        # DataChunk records built directly, the splitter never yields an empty chunk
+                        file_chunks_records = [
+
+                            {
+                                "chunk_text" : chunk_text,
+                                "chunk_metadata" : chunk_metadata,
+                                "chunk_order" : file_state["chunks"] + i + 1,
+                                "chunk_project_id" : project.id,
+                                "chunk_asset_id" : file_state["asset_id"],
+                            }
+
+                            for i, (chunk_text, chunk_metadata) in enumerate(range_chunks)
+                        ]
+
+                        if len(file_chunks_records) > 0:
+                            no_records += await chunk_model.insert_many_chunks(chunks = file_chunks_records)
+
+                        file_state["chunks"] += len(file_chunks_records)
+                        progress.add_file_pages(file_id, pages = pages_count, chunks = len(file_chunks_records))
+
+                    if file_state["next_range"] == file_state["ranges_total"]:
+
+                        if file_state["chunks"] == 0:
+                            progress.add_error(message = ResponseSignal.FILE_PROCESS_FAILED.value, file_id = file_id)
+                            return False, ResponseSignal.FILE_PROCESS_FAILED.value, None
+
+                        _ = await asset_model.update_asset_processing(
+                            asset_id = file_state["asset_id"],
+                            asset_checksum = assets_config[file_state["asset_id"]]["checksum"],
+                            asset_config = assets_config[file_state["asset_id"]]
+                        )
+
+                        progress.finish_file(file_id)
+                        no_files += 1
+
+                if not await progress.flush():
+                    return False, ResponseSignal.JOB_LEASE_LOST_ERROR.value, None
+
+        finally:
+            for task in pending:
+                task.cancel()
+
+        return True, ResponseSignal.FILE_PROCESS_SUCCESS.value, {
+            "inserted_chunks" : no_records,
+            "processed_files" : no_files,
+        }
+
+    async def push_project_chunks(self, project: Project, chunk_model, nlp_controller,
+                                        do_reset: int = 0, page_size: int = 50,
+                                        progress: IngestionProgress = None,
+                                        do_pipeline: int = 0, do_resume: int = 0,
+                                        project_model = None):
+
+        # with a project_model the pushed position is checkpointed on the project after
+        # every page, and do_resume = 1 continues an interrupted push from that checkpoint
+        push_checkpoint = None
+        if do_resume == 1:
+            push_checkpoint = await project_model.get_push_checkpoint(project_id = project.id) \
+                              if project_model else project.project_push_checkpoint
+
+        if push_checkpoint:
+            # the points up to the checkpoint are already in the collection, keep them
+            do_reset = 0
+        elif project_model:
+            _ = await project_model.clear_push_checkpoint(project_id = project.id)
+
+        push_mode = self.push_project_chunks_pipelined if do_pipeline == 1 else self.push_project_chunks_sequential
+
+        is_success, signal, result = await push_mode(
+            project = project,
+            chunk_model = chunk_model,
+            nlp_controller = nlp_controller,
+            do_reset = do_reset,
+            page_size = page_size,
+            progress = progress,
+            project_model = project_model,
+            push_checkpoint = push_checkpoint
+        )
+
+        if not is_success:
+            return is_success, signal, result
+
+        if project_model:
+            _ = await project_model.clear_push_checkpoint(project_id = project.id)
+
+        result["resumed_items_count"] = push_checkpoint["pushed_items_count"] if push_checkpoint else 0
+
+        return is_success, signal, result
+
+    async def save_push_checkpoint(self, project: Project, project_model, last_chunk_id,
+                                         pushed_items_count: int):
+
+        if not project_model:
+            return None
+
+        return await project_model.set_push_checkpoint(
+            project_id = project.id,
+            push_checkpoint = {
+                "last_chunk_id" : last_chunk_id,
+                "pushed_items_count" : pushed_items_count,
+                "updated_at" : datetime.utcnow(),
+            }
+        )
+
+    async def push_project_chunks_sequential(self, project: Project, chunk_model, nlp_controller,
+                                                   do_reset: int = 0, page_size: int = 50,
+                                                   progress: IngestionProgress = None,
+                                                   project_model = None, push_checkpoint: dict = None):
+
+        progress = progress if progress else IngestionProgress()
+
+        after_id = push_checkpoint["last_chunk_id"] if push_checkpoint else None
+        pushed_items_count = push_checkpoint["pushed_items_count"] if push_checkpoint else 0
+
+        total_chunks = await chunk_model.count_project_chunks(project_id = project.id, after_id = after_id)
+        progress.set_pages_total(math.ceil(total_chunks / page_size))
+
+        is_first_page = True
+        inserted_items_count = 0
+
+        async for page_chunks in chunk_model.iterate_project_chunks(
+            project_id = project.id, batch_size = page_size, after_id = after_id,
+            fields = self.push_chunk_fields):
+
+            # the collection is reset once, before the first page is inserted
+            is_inserted = await nlp_controller.index_into_vector_db(
+                project = project,
+                chunks = page_chunks,
+                do_reset = do_reset if is_first_page else 0
+            )
+
+            is_first_page = False
+
+            if not is_inserted:
+                progress.add_error(message = ResponseSignal.INSERT_INTO_VECTORDB_ERROR.value)
+                return False, ResponseSignal.INSERT_INTO_VECTORDB_ERROR.value, None
+
+            inserted_items_count += len(page_chunks)
+            progress.add_pages(pages = 1, items = len(page_chunks))
+
+            _ = await self.save_push_checkpoint(
+                project = project,
+                project_model = project_model,
+                last_chunk_id = page_chunks[-1].id,
+                pushed_items_count = pushed_items_count + inserted_items_count
+            )
+
+            if not await progress.flush():
+                return False, ResponseSignal.JOB_LEASE_LOST_ERROR.value, None
+
+        return True, ResponseSignal.INSERT_INTO_VECTORDB_SUCCESS.value, {
+            "inserted_items_count" : inserted_items_count
+        }
+
+    async def push_project_chunks_pipelined(self, project: Project, chunk_model, nlp_controller,
+                                                  do_reset: int = 0, page_size: int = 50,
+                                                  progress: IngestionProgress = None,
+                                                  project_model = None, push_checkpoint: dict = None):
+
+        # read -> embed -> upsert stages joined by bounded queues, so page N+1 is read
+        # and page N-1 is upserted while page N is embedded; a None item ends a worker
+
+        progress = progress if progress else IngestionProgress()
+
+        after_id = push_checkpoint["last_chunk_id"] if push_checkpoint else None
+        pushed_items_count = push_checkpoint["pushed_items_count"] if push_checkpoint else 0
+
+        total_chunks = await chunk_model.count_project_chunks(project_id = project.id, after_id = after_id)
+        progress.set_pages_total(math.ceil(total_chunks / page_size))
+
+        embed_concurrency = max(1, self.app_settings.PUSH_PIPELINE_EMBED_CONCURRENCY)
+        upsert_concurrency = max(1, self.app_settings.PUSH_PIPELINE_UPSERT_CONCURRENCY)
+        queue_size = max(1, self.app_settings.PUSH_PIPELINE_QUEUE_SIZE)
+
+        embed_queue = asyncio.Queue(maxsize = queue_size)
+        upsert_queue = asyncio.Queue(maxsize = queue_size)
+
+        # pages are read with a keyset cursor in order, so the read stage has a single worker
+        read_metrics = PipelineStageMetrics(name = "read", concurrency = 1)
+        embed_metrics = PipelineStageMetrics(name = "embed", concurrency = embed_concurrency,
+                                             queue_maxsize = queue_size)
+        upsert_metrics = PipelineStageMetrics(name = "upsert", concurrency = upsert_concurrency,
+                                              queue_maxsize = queue_size)
+
+        # the collection is reset once, before any page is upserted
+        _ = await nlp_controller.create_vector_db_collection(project = project, do_reset = do_reset)
+
+        async def put_item(queue: asyncio.Queue, item, metrics: PipelineStageMetrics):
+
+            started_at = time.monotonic()
+            await queue.put(item)
+            metrics.add_blocked(time.monotonic() - started_at)
+
+        async def get_item(queue: asyncio.Queue, metrics: PipelineStageMetrics):
+
+            metrics.add_queue_depth(queue.qsize())
+
+            started_at = time.monotonic()
+            item = await queue.get()
+            metrics.add_wait(time.monotonic() - started_at)
+
+            return item
+
+        # pages finish out of order, the checkpoint only moves past a contiguous run of pages
+        finished_pages = {}
+        checkpoint_state = {"next_page_index" : 0, "pushed_items_count" : pushed_items_count}
+        checkpoint_lock = asyncio.Lock()
+
+        async def checkpoint_page(page_index: int, page_chunks: list):
+
+            finished_pages[page_index] = (page_chunks[-1].id, len(page_chunks))
+
+            async with checkpoint_lock:
+
+                last_chunk_id = None
+                while checkpoint_state["next_page_index"] in finished_pages:
+                    last_chunk_id, items_count = finished_pages.pop(checkpoint_state["next_page_index"])
+                    checkpoint_state["next_page_index"] += 1
+                    checkpoint_state["pushed_items_count"] += items_count
+
+                if last_chunk_id is not None:
+                    _ = await self.save_push_checkpoint(
+                        project = project,
+                        project_model = project_model,
+                        last_chunk_id = last_chunk_id,
+                        pushed_items_count = checkpoint_state["pushed_items_count"]
+                    )
+
+        async def read_stage():
+
+            read_metrics.start()
+
+            page_index = 0
+            started_at = time.monotonic()
+
+            async for page_chunks in chunk_model.iterate_project_chunks(
+                project_id = project.id, batch_size = page_size, after_id = after_id,
+                fields = self.push_chunk_fields):
+
+                read_metrics.add_batch(items = len(page_chunks), busy_seconds = time.monotonic() - started_at)
+
+                await put_item(embed_queue, (page_index, page_chunks), read_metrics)
+
+                page_index += 1
+                started_at = time.monotonic()
+
+            for _ in range(embed_concurrency):
+                await embed_queue.put(None)
+
+            read_metrics.finish()
+
+            return None
+
+        embed_workers_left = embed_concurrency
+
+        async def embed_stage():
+
+            nonlocal embed_workers_left
+            embed_metrics.start()
+
+            while True:
+
+                item = await get_item(embed_queue, embed_metrics)
+                if item is None:
+                    break
+
+                page_index, page_chunks = item
+
+                started_at = time.monotonic()
+                vectors = await nlp_controller.embed_chunks(chunks = page_chunks)
+
+                if not vectors:
+                    return ResponseSignal.INSERT_INTO_VECTORDB_ERROR.value
+
+                embed_metrics.add_batch(items = len(page_chunks), busy_seconds = time.monotonic() - started_at)
+
+                await put_item(upsert_queue, (page_index, page_chunks, vectors), embed_metrics)
+
+            # the last embed worker to finish stops the upsert workers
+            embed_workers_left -= 1
+            if embed_workers_left == 0:
+                for _ in range(upsert_concurrency):
+                    await upsert_queue.put(None)
+
+                embed_metrics.finish()
+
+            return None
+
+        running_upserts = set()
+
+        async def upsert_stage():
+
+            upsert_metrics.start()
+
+            while True:
+
+                item = await get_item(upsert_queue, upsert_metrics)
+                if item is None:
+                    break
+
+                page_index, page_chunks, vectors = item
+
+                started_at = time.monotonic()
+                # a cancelled task does not stop a local vector db call already on its
+                # thread, the upsert is tracked so a failed pipeline can wait for it
+                # before the collection is touched again
+                upsert = asyncio.ensure_future(nlp_controller.insert_chunks_into_vector_db(
+                    project = project,
+                    chunks = page_chunks,
+                    vectors = vectors
+                ))
+                running_upserts.add(upsert)
+                upsert.add_done_callback(running_upserts.discard)
+
+                is_inserted = await asyncio.shield(upsert)
+
+                if not is_inserted:
+                    return ResponseSignal.INSERT_INTO_VECTORDB_ERROR.value
+
+                upsert_metrics.add_batch(items = len(page_chunks), busy_seconds = time.monotonic() - started_at)
+                progress.add_pages(pages = 1, items = len(page_chunks))
+
+                await checkpoint_page(page_index = page_index, page_chunks = page_chunks)
+
+                if not await progress.flush():
+                    return ResponseSignal.JOB_LEASE_LOST_ERROR.value
+
+            return None
+
+        pipeline_started_at = time.monotonic()
+
+        pending = {
+            asyncio.create_task(read_stage()),
+            *[asyncio.create_task(embed_stage()) for _ in range(embed_concurrency)],
+            *[asyncio.create_task(upsert_stage()) for _ in range(upsert_concurrency)],
+        }
+
+        try:
+            while pending:
+
+                done, pending = await asyncio.wait(pending, return_when = asyncio.FIRST_COMPLETED)
+
+                for task in done:
+
+                    signal = task.result()
+
+                    if signal:
+                        if signal != ResponseSignal.JOB_LEASE_LOST_ERROR.value:
+                            progress.add_error(message = signal)
+                        return False, signal, None
+
+        finally:
+            # a failed stage stops the whole pipeline
+            for task in pending:
+                task.cancel()
+
+            _ = await asyncio.gather(*pending, *running_upserts, return_exceptions = True)
+
+        upsert_metrics.finish()
+
+        return True, ResponseSignal.INSERT_INTO_VECTORDB_SUCCESS.value, {
+            "inserted_items_count" : upsert_metrics.items,
+            "pipeline" : {
+                "elapsed_seconds" : round(time.monotonic() - pipeline_started_at, 3),
+                "stages" : [
+                    read_metrics.to_dict(),
+                    embed_metrics.to_dict(),
+                    upsert_metrics.to_dict(),
+                ]
+            }
+        }
@@ -0,0 +1,104 @@
+from datetime import datetime
+import time
+
+class IngestionProgress:
+
+    def __init__(self, on_flush = None, flush_interval: float = 2.0):
+
+        # on_flush is an async callable receiving (progress, errors), used by the
+        # job worker to persist progress; inline requests keep it in memory only
+        self.on_flush = on_flush
+        self.flush_interval = flush_interval
+
+        self.started_at = time.monotonic()
+        self.last_flush_at = 0.0
+
+        self.files = {}
+        self.errors = []
+
+        self.files_total = 0
+        self.pages_total = 0
+        self.pages_done = 0
+        self.items_done = 0
+
+    def set_files_total(self, files_total: int):
+        self.files_total = files_total
+
+    def set_pages_total(self, pages_total: int):
+        self.pages_total = pages_total
+
+    def start_file(self, file_id: str, pages_total: int = 0):
+
+        self.files[file_id] = {
+            "status" : "processing",
+            "pages_total" : pages_total,
+            "pages_done" : 0,
+            "chunks" : 0,
+        }
+
+        self.pages_total += pages_total
+
+    def set_file_pages_total(self, file_id: str, pages_total: int):
+
+        file_progress = self.files[file_id]
+
+        self.pages_total += pages_total - file_progress["pages_total"]
+        file_progress["pages_total"] = pages_total
+
+    def add_file_pages(self, file_id: str, pages: int, chunks: int):
+
+        file_progress = self.files[file_id]
+        file_progress["pages_done"] += pages
+        file_progress["chunks"] += chunks
+
+        self.add_pages(pages = pages, items = chunks)
+
+    def finish_file(self, file_id: str, status: str = "done"):
+        self.files[file_id]["status"] = status
+
+    def add_pages(self, pages: int, items: int):
+
+        self.pages_done += pages
+        self.items_done += items
+
+    def add_error(self, message: str, file_id: str = None):
+
+        error = {"message" : message, "at" : datetime.utcnow()}
+
+        if file_id:
+            error["file_id"] = file_id
+            if file_id in self.files:
+                self.files[file_id]["status"] = "failed"
+
+        self.errors.append(error)
+
+    def to_dict(self):
+
+        elapsed_seconds = time.monotonic() - self.started_at
+
+        return {
+            "files_total" : self.files_total,
+            "files_done" : len([f for f in self.files.values() if f["status"] == "done"]),
+            "files" : [
+                {"file_id" : file_id, **file_progress}
+                for file_id, file_progress in self.files.items()
+            ],
+            "pages_total" : self.pages_total,
+            "pages_done" : self.pages_done,
+            "items_done" : self.items_done,
+            "elapsed_seconds" : round(elapsed_seconds, 3),
+            "throughput" : round(self.items_done / elapsed_seconds, 3) if elapsed_seconds > 0 else 0.0,
+        }
+
+    async def flush(self, force: bool = False):
+
+        if not self.on_flush:
+            return True
+
+        now = time.monotonic()
+        if not force and now - self.last_flush_at < self.flush_interval:
+            return True
+
+        self.last_flush_at = now
+
+        return await self.on_flush(self.to_dict(), self.errors)
@@ -0,0 +1,178 @@
+from .BaseController import BaseController
+from .IngestionController import IngestionController
+from .IngestionProgress import IngestionProgress
+from models.db_schemes import Job
+from models.enums import ResponseSignal, JobTypeEnum, JobStatusEnum
+from concurrent.futures import Executor
+import asyncio
+import logging
+
+class JobController(BaseController):
+
+    def __init__(self, job_model, project_model, asset_model, chunk_model,
+                       nlp_controller, worker_id: str, process_pool: Executor = None):
+
+        super().__init__()
+
+        self.job_model = job_model
+        self.project_model = project_model
+        self.asset_model = asset_model
+        self.chunk_model = chunk_model
+        self.nlp_controller = nlp_controller
+        self.worker_id = worker_id
+        self.process_pool = process_pool
+
+        self.ingestion_controller = IngestionController()
+        self.logger = logging.getLogger(__name__)
+
+    async def lease_job(self):
+
+        _ = await self.job_model.fail_abandoned_jobs(
+            max_attempts = self.app_settings.JOB_MAX_ATTEMPTS)
+
+        return await self.job_model.lease_job(
+            worker_id = self.worker_id,
+            lease_seconds = self.app_settings.JOB_LEASE_SECONDS,
+            max_attempts = self.app_settings.JOB_MAX_ATTEMPTS
+        )
+
+    async def run_job(self, job: Job):
+
+        async def save_progress(progress: dict, errors: list):
+            return await self.job_model.update_job_progress(
+                job_id = job.id,
+                worker_id = self.worker_id,
+                progress = progress,
+                errors = errors,
+                lease_seconds = self.app_settings.JOB_LEASE_SECONDS
+            )
+
+        progress = IngestionProgress(
+            on_flush = save_progress,
+            flush_interval = self.app_settings.JOB_PROGRESS_FLUSH_SECONDS
+        )
+
+        # the lease is renewed independently of progress, a single long step (a big
+        # PDF, a large embedding batch) must not let another worker lease the job
+        job_task = asyncio.ensure_future(self.execute_job(job, progress))
+        heartbeat_task = asyncio.ensure_future(self.renew_lease(job, job_task))
+
+        try:
+            is_success, signal, result = await job_task
+
+        except asyncio.CancelledError:
+            # cancelled by the heartbeat, anything else cancelling run_job goes on
+            if not heartbeat_task.done() or heartbeat_task.cancelled() or heartbeat_task.result():
+                raise
+
+            is_success, signal, result = False, ResponseSignal.JOB_LEASE_LOST_ERROR.value, None
+
+        finally:
+            heartbeat_task.cancel()
+
+        if signal == ResponseSignal.JOB_LEASE_LOST_ERROR.value:
+            # another worker owns the job now, it will record the outcome
+            self.logger.warning(f"lease lost for job {job.id}, stop running it")
+            return False
+
+        job_status = JobStatusEnum.COMPLETED.value if is_success else JobStatusEnum.FAILED.value
+
+        return await self.job_model.finish_job(
+            job_id = job.id,
+            worker_id = self.worker_id,
+            job_status = job_status,
+            progress = progress.to_dict(),
+            errors = progress.errors,
+            job_result = {"signal" : signal, **(result if result else {})}
+        )
+
+    async def execute_job(self, job: Job, progress: IngestionProgress):
+
+        try:
+            if job.job_type == JobTypeEnum.PROCESS.value:
+                return await self.run_process_job(job, progress)
+
+            elif job.job_type == JobTypeEnum.PUSH.value:
+                return await self.run_push_job(job, progress)
+
+            else:
+                return False, ResponseSignal.JOB_TYPE_NOT_SUPPORTED.value, None
+
+        except Exception as e:
+            self.logger.exception(f"error while running job {job.id}: {e}")
+            progress.add_error(message = str(e))
+            return False, None, None
+
+    async def renew_lease(self, job: Job, job_task: asyncio.Future):
+
+        # returns False after cancelling job_task when the lease was lost
+        lease_seconds = self.app_settings.JOB_LEASE_SECONDS
+        interval = max(1.0, lease_seconds / 3)
+
+        while not job_task.done():
+
+            await asyncio.sleep(interval)
+
+            try:
+                is_leased = await self.job_model.renew_job_lease(
+                    job_id = job.id, worker_id = self.worker_id, lease_seconds = lease_seconds
+                )
+            except Exception as e:
+                # a missed renewal is retried, the lease still has two intervals left
+                self.logger.warning(f"error while renewing the lease of job {job.id}: {e}")
+                continue
+
+            if not is_leased:
+                job_task.cancel()
+                return False
+
+        return True
+
+    async def run_process_job(self, job: Job, progress: IngestionProgress):
+
+        params = job.job_params
+
+        project = await self.project_model.get_project_or_create_one(project_id = params["project_id"])
+
+        project_assets = await self.ingestion_controller.get_project_assets(
+            project = project, asset_model = self.asset_model, file_id = params.get("file_id"))
+
+        if project_assets is None:
+            return False, ResponseSignal.FILE_ID_ERROR.value, None
+
+        if len(project_assets) == 0:
+            return False, ResponseSignal.NO_FILES_ERROR.value, None
+
+        return await self.ingestion_controller.process_project_files(
+            project = project,
+            asset_model = self.asset_model,
+            chunk_model = self.chunk_model,
+            project_assets = project_assets,
+            chunk_size = params["chunk_size"],
+            chunk_overlap = params["overlap_size"],
+            do_reset = params["do_reset"],
+            do_incremental = params.get("do_incremental", 0),
+            nlp_controller = self.nlp_controller,
+            progress = progress,
+            process_pool = self.process_pool
+        )
+
+    async def run_push_job(self, job: Job, progress: IngestionProgress):
+
+        params = job.job_params
+
+        project = await self.project_model.get_project_or_create_one(project_id = params["project_id"])
+
+        # a job leased again after its worker died continues from the push checkpoint
+        do_resume = 1 if job.job_attempts > 1 else params.get("do_resume", 0)
+
+        return await self.ingestion_controller.push_project_chunks(
+            project = project,
+            chunk_model = self.chunk_model,
+            nlp_controller = self.nlp_controller,
+            do_reset = params["do_reset"],
+            progress = progress,
+            do_pipeline = params.get("do_pipeline", 0),
+            do_resume = do_resume,
+            project_model = self.project_model
+        )
@@ -1,96 +1,225 @@
 from .BaseController import BaseController
 from models.db_schemes import Project, DataChunk
 from stores.llm.LLMEnums import DocumentTypeEnum
+from models.enums import ResponseSignal
 from helpers.config import get_settings
+from helpers.context_packer import ContextPacker
 from typing import List
 import json
+import logging
+import unicodedata
+import uuid
 
 class NLPController(BaseController):
 
     def __init__(self, vectordb_client, generation_client,
-                       embedding_client, template_parser):
+                       embedding_client, template_parser, embedding_cache = None,
+                       answer_cache = None, query_embedding_cache = None, project_model = None):
         super().__init__()
 
         self.vectordb_client = vectordb_client
         self.generation_client = generation_client
         self.embedding_client = embedding_client
         self.template_parser = template_parser
+        self.embedding_cache = embedding_cache
+        self.answer_cache = answer_cache
+        self.query_embedding_cache = query_embedding_cache
+        # versions the answer caches of every process by the project's collection changes
+        self.project_model = project_model
+
+        self.context_packer = ContextPacker(
+            token_budget = self.app_settings.RAG_CONTEXT_TOKEN_BUDGET,
+            min_score = self.app_settings.RAG_CONTEXT_MIN_SCORE,
+            overlap_threshold = self.app_settings.RAG_CONTEXT_OVERLAP_THRESHOLD
+        )
+
+        self.logger = logging.getLogger(__name__)
 
     def create_project_name(self,project_id: str):
 
         return f"collection_{project_id}".strip()
     
-    def reset_vector_db_collection(self, project: Project):
+    async def reset_vector_db_collection(self, project: Project):
 
         collection_name = self.create_project_name(project_id = project.project_id)
-        return self.vectordb_client.delete_collection(collection_name = collection_name)
+        result = await self.vectordb_client.delete_collection(collection_name = collection_name)
+
+        _ = await self.invalidate_answer_cache(project = project)
+
+        return result
+    
+    async def delete_vector_db_assets(self, project: Project, asset_ids: list):
+
+        collection_name = self.create_project_name(project_id = project.project_id)
+        result = await self.vectordb_client.delete_by_asset_ids(
+            collection_name = collection_name,
+            asset_ids = [str(asset_id) for asset_id in asset_ids]
+        )
+
+        _ = await self.invalidate_answer_cache(project = project)
+
+        return result
     
-    def get_vector_db_collection_info(self, project: Project):
+    async def get_vector_db_collection_info(self, project: Project):
 
         collection_name = self.create_project_name(project_id = project.project_id)
-        collection_info = self.vectordb_client.get_collection_info(collection_name)
+        collection_info = await self.vectordb_client.get_collection_info(collection_name)
 
         return json.loads(
             json.dumps(collection_info, default= lambda x: x.__dict__)
             )
     
-    def index_into_vector_db(self, project: Project, chunks: List[DataChunk],
-                                   do_reset: bool = False):
-        
-        # step 1: get collection name
-        collection_name = self.create_project_name(project_id = project.project_id)
+    async def embed_texts_with_cache(self, texts: List[str], document_type: str):
 
-        # step 2: manage chunks
-        texts = [chunk.chunk_text for chunk in chunks]
-        metadatas = [chunk.chunk_metadata for chunk in chunks]
+        if not self.embedding_cache:
+            return await self.embedding_client.embed_texts_async(
+                texts = texts, document_type = document_type
+            )
 
-        idx = 0
-        chunk_ids = list(range(idx, idx + len(chunks)))
-        idx += len(chunks)
+        # the texts are cut once here and sent as they are, so the key is exactly the
+        # text the provider embeds (some providers do not truncate on their own)
+        texts = [ self.embedding_client.process_text(text) for text in texts ]
 
-        vectors = [
-            
-            self.embedding_client.embed_text(
-                text = text, document_type = DocumentTypeEnum.DOCUMENT.value
+        keys = [
+            self.embedding_cache.get_cache_key(
+                backend = self.app_settings.EMBEDDING_BACKEND,
+                model_id = self.embedding_client.embedding_model_id,
+                document_type = document_type,
+                text = text
             )
-
             for text in texts
         ]
 
-        # step 3: create collection
-        _ = self.vectordb_client.create_collection(
+        cached_vectors = await self.embedding_cache.get_vectors(keys)
+
+        # embed every missing text once, even when it repeats inside the batch
+        missing_texts = {}
+        for key, text in zip(keys, texts):
+            if key not in cached_vectors and key not in missing_texts:
+                missing_texts[key] = text
+
+        if len(missing_texts) > 0:
+
+            missing_vectors = await self.embedding_client.embed_texts_async(
+                texts = list(missing_texts.values()), document_type = document_type
+            )
+
+            if not missing_vectors or len(missing_vectors) != len(missing_texts):
+                return None
+
+            new_vectors = dict(zip(missing_texts.keys(), missing_vectors))
+            _ = await self.embedding_cache.set_vectors(new_vectors)
+
+            cached_vectors.update(new_vectors)
+
+        return [ cached_vectors[key] for key in keys ]
+
+    async def create_vector_db_collection(self, project: Project, do_reset: bool = False):
+
+        collection_name = self.create_project_name(project_id = project.project_id)
+        result = await self.vectordb_client.create_collection(
             collection_name = collection_name,
             embedding_size = self.embedding_client.embedding_size,
             do_reset = do_reset
         )
 
-        # step 4: insert into vector db
-        is_inserted = self.vectordb_client.insert_many(
+        if do_reset:
+            _ = await self.invalidate_answer_cache(project = project)
+
+        return result
+
+    async def embed_chunks(self, chunks: List[DataChunk]):
+
+        vectors = await self.embed_texts_with_cache(
+            texts = [chunk.chunk_text for chunk in chunks],
+            document_type = DocumentTypeEnum.DOCUMENT.value
+        )
+
+        if not vectors or len(vectors) != len(chunks):
+            return None
+
+        return vectors
+
+    def get_chunk_point_id(self, chunk: DataChunk):
+
+        # the same chunk always maps to the same point, so pushing it again overwrites it
+        return str(uuid.uuid5(uuid.NAMESPACE_OID, str(chunk.id)))
+
+    async def insert_chunks_into_vector_db(self, project: Project, chunks: List[DataChunk],
+                                                 vectors: List[list]):
+
+        collection_name = self.create_project_name(project_id = project.project_id)
+
+        result = await self.vectordb_client.insert_many(
             collection_name = collection_name,
-            texts = texts,
+            texts = [chunk.chunk_text for chunk in chunks],
             vectors = vectors,
-            metadatas = metadatas,
-            record_ids = chunk_ids
+            metadatas = [chunk.chunk_metadata for chunk in chunks],
+            record_ids = [self.get_chunk_point_id(chunk) for chunk in chunks],
+            asset_ids = [str(chunk.chunk_asset_id) for chunk in chunks]
             )
+
+        _ = await self.invalidate_answer_cache(project = project)
+
+        return result
+
+    async def index_into_vector_db(self, project: Project, chunks: List[DataChunk],
+                                         do_reset: bool = False):
         
-        return is_inserted
+        # step 1: embed chunks
+        vectors = await self.embed_chunks(chunks = chunks)
+
+        if not vectors:
+            return False
+
+        # step 2: create collection
+        _ = await self.create_vector_db_collection(project = project, do_reset = do_reset)
+
+        # step 3: insert into vector db
+        return await self.insert_chunks_into_vector_db(
+            project = project,
+            chunks = chunks,
+            vectors = vectors
+        )
     
-    def search_vector_db_collection(self, project: Project, text: str, limit: int = 5):
+    def normalize_query(self, text: str):
+
+        # queries differing only in unicode form or whitespace share one embedding
+        return " ".join(unicodedata.normalize("NFC", text).split())
+
+    async def embed_query(self, text: str):
+
+        text = self.normalize_query(text)
+
+        async def embed():
+            return await self.embedding_client.embed_text_async(
+                text = text,
+                document_type = DocumentTypeEnum.QUERY.value
+            )
+
+        if not self.query_embedding_cache:
+            return await embed()
+
+        # concurrent identical queries wait for the same provider call
+        return await self.query_embedding_cache.get_or_load(
+            key = (self.app_settings.EMBEDDING_BACKEND, self.embedding_client.embedding_model_id, text),
+            loader = embed
+        )
+
+    async def search_vector_db_collection(self, project: Project, text: str, limit: int = 5,
+                                                query_vector: list = None):
 
         # step 1: get collection name
         collection_name = self.create_project_name(project_id = project.project_id)
 
-        # step 2: get text embedding vector
-        embed_vector = self.embedding_client.embed_text(
-            text = text,
-            document_type = DocumentTypeEnum.QUERY.value
-        )
+        # step 2: get text embedding vector, unless the caller already has it
+        embed_vector = query_vector if query_vector else await self.embed_query(text = text)
 
         if not embed_vector or len(embed_vector) == 0:
             return False
 
         # step 3: do semantic search
-        results = self.vectordb_client.search_by_vector(
+        results = await self.vectordb_client.search_by_vector(
             collection_name = collection_name,
             vector = embed_vector,
             limit = limit
@@ -101,35 +230,261 @@ class NLPController(BaseController):
         
         return results
     
-    def answer_rag_question(self, project: Project, query: str, limit: int = 5):
+    async def embed_queries(self, texts: List[str]):
+
+        # one provider call for every query not in the cache, vectors (or None)
+        # are returned in the order of texts
+        texts = [ self.normalize_query(text) for text in texts ]
+        cache_key_prefix = (self.app_settings.EMBEDDING_BACKEND, self.embedding_client.embedding_model_id)
+
+        vectors = {}
+        missing_texts = []
+
+        for text in dict.fromkeys(texts):
+
+            is_found, vector = self.query_embedding_cache.lookup(
+                key = (*cache_key_prefix, text)
+            ) if self.query_embedding_cache else (False, None)
+
+            if is_found and vector is not None:
+                vectors[text] = vector
+            else:
+                missing_texts.append(text)
+
+        if len(missing_texts) > 0:
+
+            missing_vectors = await self.embedding_client.embed_texts_async(
+                texts = missing_texts,
+                document_type = DocumentTypeEnum.QUERY.value
+            )
+
+            if not missing_vectors or len(missing_vectors) != len(missing_texts):
+                self.logger.error(f"error while embedding {len(missing_texts)} queries")
+                missing_vectors = [None] * len(missing_texts)
+
+            for text, vector in zip(missing_texts, missing_vectors):
+                vectors[text] = vector
+
+                if self.query_embedding_cache and vector is not None:
+                    self.query_embedding_cache.set(key = (*cache_key_prefix, text), value = vector)
+
+        return [ vectors[text] for text in texts ]
+
+    async def search_vector_db_collection_batch(self, project: Project, texts: List[str], limit: int = 5):
+
+        collection_name = self.create_project_name(project_id = project.project_id)
+
+        query_vectors = await self.embed_queries(texts = texts)
+
+        # queries that could not be embedded get no results, the others share one search
+        searched_indexes = [ i for i, vector in enumerate(query_vectors) if vector ]
+
+        if len(searched_indexes) == 0:
+            return False
+
+        batch_results = await self.vectordb_client.search_by_vectors(
+            collection_name = collection_name,
+            vectors = [ query_vectors[i] for i in searched_indexes ],
+            limit = limit
+        )
+
+        if not batch_results:
+            return False
+
+        results = [ [] for _ in texts ]
+
+        for i, documents in zip(searched_indexes, batch_results):
+            results[i] = documents
+
+        return results
+
+    async def retrieve_rag_documents(self, project: Project, query: str, limit: int = 5):
+
+        # the query vector is returned too, it keys the answer cache
+        query_vector = await self.embed_query(text = query)
+
+        if not query_vector or len(query_vector) == 0:
+            return None, False
+
+        retrieved_documents = await self.search_vector_db_collection(
+            project = project, text = query, limit = limit, query_vector = query_vector
+        )
+
+        return query_vector, retrieved_documents
+
+    async def get_answer_cache_version(self, project: Project):
+
+        # read before retrieval, so an answer generated from documents retrieved before
+        # a change is stored under the version it belongs to
+        if not self.answer_cache or not self.project_model:
+            return None
+
+        return await self.project_model.get_collection_version(project_id = project.id)
+
+    def get_cached_answer(self, project: Project, query_vector: list, retrieved_documents: list,
+                                version: int = None):
+
+        if not self.answer_cache:
+            return None
+
+        return self.answer_cache.get(
+            project_id = project.project_id,
+            query_vector = query_vector,
+            document_ids = [doc.id for doc in retrieved_documents],
+            version = version
+        )
+
+    def set_cached_answer(self, project: Project, query_vector: list, retrieved_documents: list,
+                                answer: str, full_prompt: str, chat_history: list, version: int = None):
+
+        if not self.answer_cache:
+            return None
+
+        return self.answer_cache.set(
+            project_id = project.project_id,
+            query_vector = query_vector,
+            document_ids = [doc.id for doc in retrieved_documents],
+            value = {
+                "answer" : answer,
+                "full_prompt" : full_prompt,
+                "chat_history" : chat_history
+            },
+            version = version
+        )
+
+    async def invalidate_answer_cache(self, project: Project):
+
+        # called after every change of a project's collection: the version in the
+        # database retires its cached answers in every process (API workers included),
+        # and an answer built from documents retrieved during the change was stored
+        # under the previous version. the local entries are freed right away
+        if self.project_model:
+            _ = await self.project_model.bump_collection_version(project_id = project.id)
+
+        if self.answer_cache:
+            self.answer_cache.invalidate_project(project_id = project.project_id)
+
+    async def answer_rag_question(self, project: Project, query: str, limit: int = 5):
 
         answer, full_prompt, chat_history = None, None, None
 
+        answer_cache_version = await self.get_answer_cache_version(project = project)
+
          # step 1: retrieve related documents
-        retrieved_documents = self.search_vector_db_collection(
-            project = project, text = query, limit = limit
+        query_vector, retrieved_documents = await self.retrieve_rag_documents(
+            project = project, query = query, limit = limit
         )
 
         if not retrieved_documents or len(retrieved_documents) == 0:
-            return answer, full_prompt, chat_history
+            return answer, full_prompt, chat_history, False
+
+        # step 2: reuse the answer of a similar question over the same documents
+        cached_answer = self.get_cached_answer(
+            project = project, query_vector = query_vector, retrieved_documents = retrieved_documents,
+            version = answer_cache_version
+        )
+
+        if cached_answer:
+            return cached_answer["answer"], cached_answer["full_prompt"], list(cached_answer["chat_history"]), True
         
-        # step 2: construct LLM prompts
-        system_prompt = self.template_parser.get("rag", "system_prompt")
+        # step 3: construct LLM prompts
+        full_prompt, chat_history = self.construct_rag_prompt(
+            query = query, retrieved_documents = retrieved_documents
+        )
 
-        documents_prompts = "\n".join([
+        # step 4: generate the answer
+        answer = await self.generation_client.generate_text_async(
+            prompt = full_prompt, chat_history = chat_history
+        )
 
-            self.template_parser.get("rag", "document_prompt", {
-                "doc_num" : i + 1,
-                "chunk_text" : doc.text
-            })
+        if answer:
+            _ = self.set_cached_answer(
+                project = project, query_vector = query_vector, retrieved_documents = retrieved_documents,
+                answer = answer, full_prompt = full_prompt, chat_history = list(chat_history),
+                version = answer_cache_version
+            )
+                    
+        return answer, full_prompt, chat_history, False
+
+    async def stream_rag_answer(self, project: Project, query: str, query_vector: list,
+                                      retrieved_documents: list, answer_cache_version: int = None):
+
+        # the documents go out first, then the answer text as the provider generates it
+        yield {
+            "type" : "documents",
+            "documents" : [
+                { "id" : doc.id, "score" : doc.score }
+                for doc in retrieved_documents
+            ]
+        }
+
+        cached_answer = self.get_cached_answer(
+            project = project, query_vector = query_vector, retrieved_documents = retrieved_documents,
+            version = answer_cache_version
+        )
+
+        if cached_answer:
+            yield { "type" : "token", "text" : cached_answer["answer"] }
+            yield { "type" : "end", "signal" : ResponseSignal.RAG_ANSWER_SUCCESS.value, "cache_hit" : True }
+            return
+
+        full_prompt, chat_history = self.construct_rag_prompt(
+            query = query, retrieved_documents = retrieved_documents
+        )
 
-            for i, doc in enumerate(retrieved_documents)
-        ])
+        is_generated = False
+        answer_parts = []
+
+        try:
+            async for text in self.generation_client.generate_text_stream(
+                prompt = full_prompt, chat_history = chat_history):
+                is_generated = True
+                answer_parts.append(text)
+                yield { "type" : "token", "text" : text }
+
+        except Exception as e:
+            self.logger.error(f"error while streaming the answer: {e}")
+            is_generated = False
+
+        if not is_generated:
+            # the response has already started, the error is reported in the stream
+            yield { "type" : "error", "signal" : ResponseSignal.RAG_ANSWER_ERROR.value }
+            return
+
+        _ = self.set_cached_answer(
+            project = project, query_vector = query_vector, retrieved_documents = retrieved_documents,
+            answer = "".join(answer_parts), full_prompt = full_prompt, chat_history = list(chat_history),
+            version = answer_cache_version
+        )
+
+        yield { "type" : "end", "signal" : ResponseSignal.RAG_ANSWER_SUCCESS.value, "cache_hit" : False }
+
+    def construct_rag_prompt(self, query: str, retrieved_documents: list):
+
+        system_prompt = self.template_parser.get("rag", "system_prompt")
 
         footer_prompt = self.template_parser.get("rag", "footer_prompt",{
             "query": query
         })
 
+        document_template = self.template_parser.get_template("rag", "document_prompt")
+        count_tokens = self.generation_client.count_tokens
+
+        # the chunks fill what the system and footer prompts leave of the token budget,
+        # both are kept whole (the extra token is the separator before the footer)
+        documents_prompts = self.context_packer.pack(
+            documents = retrieved_documents,
+            count_tokens = count_tokens,
+            render_document = lambda doc_num, doc: document_template.render({
+                "doc_num" : doc_num,
+                "chunk_text" : doc.text
+            }),
+            reserved_tokens = count_tokens(system_prompt) + count_tokens(footer_prompt) + 1
+        )
+
+        if len(documents_prompts) < len(retrieved_documents):
+            self.logger.debug(f"packed {len(documents_prompts)} of {len(retrieved_documents)} retrieved documents")
+
         chat_history = [
             self.generation_client.construct_prompt(
                 prompt = system_prompt,
@@ -137,10 +492,6 @@ class NLPController(BaseController):
             )
         ]
 
-        full_prompt = "\n\n".join([documents_prompts, footer_prompt])
+        full_prompt = "\n\n".join(["\n".join(documents_prompts), footer_prompt])
 
-        answer = self.generation_client.generate_text(
-            prompt = full_prompt, chat_history = chat_history
-        )
-                    
-        return answer, full_prompt, chat_history
\ No newline at end of file
+        return full_prompt, chat_history
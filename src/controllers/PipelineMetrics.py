@@ -0,0 +1,72 @@
+import time
+
+class PipelineStageMetrics:
+
+    def __init__(self, name: str, concurrency: int, queue_maxsize: int = 0):
+
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_maxsize = queue_maxsize
+
+        self.started_at = None
+        self.finished_at = None
+
+        self.batches = 0
+        self.items = 0
+        # time spent doing the work / starving on the input queue / blocked on a full output queue
+        self.busy_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.blocked_seconds = 0.0
+
+        # depth of the stage input queue, sampled every time a batch is taken from it
+        self.queue_depth_samples = 0
+        self.queue_depth_total = 0
+        self.queue_depth_max = 0
+
+    def start(self):
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+
+    def finish(self):
+        self.finished_at = time.monotonic()
+
+    def add_queue_depth(self, depth: int):
+
+        self.queue_depth_samples += 1
+        self.queue_depth_total += depth
+        self.queue_depth_max = max(self.queue_depth_max, depth)
+
+    def add_batch(self, items: int, busy_seconds: float):
+
+        self.batches += 1
+        self.items += items
+        self.busy_seconds += busy_seconds
+
+    def add_wait(self, wait_seconds: float):
+        self.wait_seconds += wait_seconds
+
+    def add_blocked(self, blocked_seconds: float):
+        self.blocked_seconds += blocked_seconds
+
+    def to_dict(self):
+
+        if self.started_at is None:
+            elapsed_seconds = 0.0
+        else:
+            elapsed_seconds = (self.finished_at if self.finished_at else time.monotonic()) - self.started_at
+
+        return {
+            "stage" : self.name,
+            "concurrency" : self.concurrency,
+            "batches" : self.batches,
+            "items" : self.items,
+            "elapsed_seconds" : round(elapsed_seconds, 3),
+            "busy_seconds" : round(self.busy_seconds, 3),
+            "wait_seconds" : round(self.wait_seconds, 3),
+            "blocked_seconds" : round(self.blocked_seconds, 3),
+            "throughput" : round(self.items / elapsed_seconds, 3) if elapsed_seconds > 0 else 0.0,
+            "queue_maxsize" : self.queue_maxsize,
+            "queue_depth_max" : self.queue_depth_max,
+            "queue_depth_avg" : round(self.queue_depth_total / self.queue_depth_samples, 3)
+                                if self.queue_depth_samples > 0 else 0.0,
+        }
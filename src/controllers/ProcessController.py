@@ -3,8 +3,12 @@ from .ProjectController import ProjectController
 import os
 from langchain_community.document_loaders import TextLoader
 from langchain_community.document_loaders import PyMuPDFLoader
-from models.enums import ProcessingEnums
+from models.enums import ProcessingEnums, ChunkerEnums
+from helpers.text_chunker import OffsetTextChunker
 from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+import pymupdf
+import hashlib
 
 
 class ProcessController( BaseController ):
@@ -20,11 +24,26 @@ class ProcessController( BaseController ):
 
         return os.path.splitext(file_id)[-1]
 
-    def get_file_loader(self, file_id: str):
+    def get_file_path(self, file_id: str):
+
+        return os.path.join(self.project_path, file_id)
+
+    def get_asset_file_path(self, asset):
+
+        # uploads are content-addressed blobs, older assets still live in the project directory
+        if asset.asset_checksum:
+            blob_path = self.get_blob_path(asset.asset_checksum)
+
+            if os.path.exists(blob_path):
+                return blob_path
+
+        return self.get_file_path(asset.asset_name)
+
+    def get_file_loader(self, file_id: str, file_path: str = None):
         
         file_extension = self.get_file_extension(file_id)
 
-        file_path = os.path.join(self.project_path, file_id)
+        file_path = file_path if file_path else self.get_file_path(file_id)
 
         # check if the file exist
         if not os.path.exists(file_path):
@@ -38,9 +57,9 @@ class ProcessController( BaseController ):
         
         return None
     
-    def get_file_content(self, file_id: str):
+    def get_file_content(self, file_id: str, file_path: str = None):
 
-        loader = self.get_file_loader(file_id)
+        loader = self.get_file_loader(file_id, file_path = file_path)
 
         if loader:
             return loader.load()
@@ -49,15 +68,128 @@ class ProcessController( BaseController ):
     
     def process_file_content(self, file_content: list, chunk_size: int, chunk_overlap: int):
 
-        text_splitter = RecursiveCharacterTextSplitter(
+        return ProcessController.split_file_content(
+            file_content = file_content,
             chunk_size = chunk_size,
             chunk_overlap = chunk_overlap,
-            length_function = len
+            chunker = self.app_settings.PROCESS_CHUNKER
         )
 
+    @staticmethod
+    def split_file_content(file_content: list, chunk_size: int, chunk_overlap: int,
+                           chunker: str = ChunkerEnums.LANGCHAIN.value):
+
         file_content_texts = [i.page_content for i in file_content]
         file_content_meta = [i.metadata for i in file_content]
 
+        if chunker == ChunkerEnums.OFFSET.value:
+
+            text_chunker = OffsetTextChunker(
+                chunk_size = chunk_size,
+                chunk_overlap = chunk_overlap
+            )
+
+            return list(text_chunker.split_pages(file_content_texts, metadatas = file_content_meta))
+
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size = chunk_size,
+            chunk_overlap = chunk_overlap,
+            length_function = len
+        )
+
         chunks = text_splitter.create_documents(file_content_texts, metadatas = file_content_meta)
 
-        return chunks
\ No newline at end of file
+        return chunks
+
+    # the static methods below run inside the process pool workers, so they
+    # only take and return picklable values
+
+    @staticmethod
+    def count_file_pages(file_path: str, file_extension: str):
+
+        if not os.path.exists(file_path):
+            return None
+
+        if file_extension == ProcessingEnums.TXT.value:
+            return 1
+
+        elif file_extension == ProcessingEnums.PDF.value:
+            with pymupdf.open(file_path) as document:
+                return document.page_count
+
+        return None
+
+    @staticmethod
+    def get_file_checksum(file_path: str, read_size: int = 1024 * 1024):
+
+        if not os.path.exists(file_path):
+            return None
+
+        file_hash = hashlib.sha256()
+
+        with open(file_path, "rb") as f:
+            while block := f.read(read_size):
+                file_hash.update(block)
+
+        return file_hash.hexdigest()
+
+    @staticmethod
+    def load_file_pages(file_path: str, file_extension: str,
+                        page_start: int = None, page_end: int = None):
+
+        if file_extension == ProcessingEnums.TXT.value:
+            return TextLoader(file_path, encoding = "utf-8").load()
+
+        if file_extension != ProcessingEnums.PDF.value:
+            return None
+
+        # same page text and metadata as PyMuPDFLoader, limited to [page_start, page_end)
+        with pymupdf.open(file_path) as document:
+
+            page_start = page_start if page_start else 0
+            page_end = page_end if page_end else document.page_count
+
+            document_metadata = {
+                key : value
+                for key, value in document.metadata.items()
+                if type(value) in [str, int]
+            }
+
+            return [
+                Document(
+                    page_content = document[page_no].get_text(),
+                    metadata = dict({
+                        "source" : file_path,
+                        "file_path" : file_path,
+                        "page" : page_no,
+                        "total_pages" : document.page_count,
+                    }, **document_metadata)
+                )
+
+                for page_no in range(page_start, page_end)
+            ]
+
+    @staticmethod
+    def process_file_pages(file_path: str, file_extension: str, chunk_size: int, chunk_overlap: int,
+                           page_start: int = None, page_end: int = None,
+                           chunker: str = ChunkerEnums.LANGCHAIN.value):
+
+        file_content = ProcessController.load_file_pages(
+            file_path = file_path, file_extension = file_extension,
+            page_start = page_start, page_end = page_end)
+
+        if file_content is None:
+            return 0, []
+
+        chunks = ProcessController.split_file_content(
+            file_content = file_content,
+            chunk_size = chunk_size,
+            chunk_overlap = chunk_overlap,
+            chunker = chunker
+        )
+
+        return len(file_content), [
+            (chunk.page_content, chunk.metadata)
+            for chunk in chunks
+        ]
+
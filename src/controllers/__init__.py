@@ -2,4 +2,8 @@ from .DataController import DataController
 from .ProjectController import ProjectController
 from .BaseController import BaseController
 from .ProcessController import ProcessController
-from .NLPController import NLPController
\ No newline at end of file
+from .NLPController import NLPController
+from .IngestionProgress import IngestionProgress
+from .PipelineMetrics import PipelineStageMetrics
+from .IngestionController import IngestionController
+from .JobController import JobController
\ No newline at end of file
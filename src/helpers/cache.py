@@ -0,0 +1,144 @@
+from collections import OrderedDict
+import asyncio
+import time
+
+class TTLCache:
+
+    # bounded LRU cache whose entries expire after ttl_seconds. a loader returning
+    # None is cached too (negative caching) for the shorter negative_ttl_seconds, and
+    # concurrent misses on the same key share a single loader call (single flight)
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 60.0,
+                       negative_ttl_seconds: float = 5.0):
+
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+
+        # key -> (value, expires_at), ordered from least to most recently used
+        self.entries = OrderedDict()
+        self.inflight = {}
+
+        self.stats = {
+            "hits" : 0,
+            "negative_hits" : 0,
+            "misses" : 0,
+            "coalesced" : 0,
+            "evictions" : 0,
+            "invalidations" : 0,
+        }
+
+    def get_entry(self, key):
+
+        # returns (is_found, value)
+        entry = self.entries.get(key)
+
+        if entry is None:
+            return False, None
+
+        value, expires_at = entry
+
+        if expires_at <= time.monotonic():
+            del self.entries[key]
+            return False, None
+
+        self.entries.move_to_end(key)
+
+        return True, value
+
+    def lookup(self, key):
+
+        # get_entry that counts as a hit or a miss, for callers loading many keys at once
+        is_found, value = self.get_entry(key)
+
+        if is_found:
+            self.stats["hits" if value is not None else "negative_hits"] += 1
+        else:
+            self.stats["misses"] += 1
+
+        return is_found, value
+
+    def set(self, key, value):
+
+        ttl_seconds = self.ttl_seconds if value is not None else self.negative_ttl_seconds
+
+        # a ttl of 0 disables caching, e.g. negative_ttl_seconds = 0 keeps no misses
+        if ttl_seconds <= 0:
+            return
+
+        self.entries[key] = (value, time.monotonic() + ttl_seconds)
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last = False)
+            self.stats["evictions"] += 1
+
+    def invalidate(self, key):
+
+        self.inflight.pop(key, None)
+
+        if self.entries.pop(key, None) is not None:
+            self.stats["invalidations"] += 1
+
+    def clear(self):
+        self.entries.clear()
+
+    async def get_or_load(self, key, loader):
+
+        # loader is an async callable without arguments returning the value or None
+        is_found, value = self.get_entry(key)
+
+        if is_found:
+            self.stats["hits" if value is not None else "negative_hits"] += 1
+            return value
+
+        if key in self.inflight:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(self.inflight[key])
+
+        self.stats["misses"] += 1
+
+        # the loader runs in its own task, so a caller cancelled while waiting does not
+        # cancel the load for the callers coalesced on it
+        task = asyncio.get_running_loop().create_task(self.load(key, loader))
+        task.add_done_callback(self.retrieve_exception)
+        self.inflight[key] = task
+
+        return await asyncio.shield(task)
+
+    async def load(self, key, loader):
+
+        task = asyncio.current_task()
+
+        try:
+            value = await loader()
+
+        finally:
+            if self.inflight.get(key) is task:
+                del self.inflight[key]
+                is_current = True
+            else:
+                is_current = False
+
+        # a load invalidated while running is returned, but not cached
+        if is_current:
+            self.set(key, value)
+
+        return value
+
+    def retrieve_exception(self, task: asyncio.Task):
+
+        # marks a failed load as retrieved, every caller may have been cancelled already
+        if not task.cancelled():
+            task.exception()
+
+    def get_stats(self):
+
+        lookups = self.stats["hits"] + self.stats["negative_hits"] + self.stats["misses"] + self.stats["coalesced"]
+        hits = self.stats["hits"] + self.stats["negative_hits"] + self.stats["coalesced"]
+
+        return {
+            **self.stats,
+            "entries" : len(self.entries),
+            "hit_rate" : round(hits / lookups, 4) if lookups > 0 else 0.0,
+        }
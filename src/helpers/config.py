@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from functools import lru_cache
 
 class Settings( BaseSettings ):
     
@@ -26,17 +27,76 @@ class Settings( BaseSettings ):
     INPUT_DEFAULT_MAX_CHARACTERS: int = None
     GENERATION_DEFAULT_MAX_TOKENS: int = None
     GENERATION_DEFAULT_TEMPERATURE: float = None
+    EMBEDDING_DEFAULT_BATCH_SIZE: int = 64
+
+    LLM_HTTP_MAX_CONNECTIONS: int = 100
+    LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LLM_HTTP_TIMEOUT_SECONDS: float = 60.0
+    HUGGINGFACE_THREAD_POOL_WORKERS: int = 1
+    HUGGINGFACE_EMBED_BATCH_MAX_SIZE: int = 32
+    HUGGINGFACE_EMBED_BATCH_MAX_WAIT_MS: float = 5.0
+    HUGGINGFACE_EMBEDDING_PROCESS_WORKERS: int = 0
+    HUGGINGFACE_EMBEDDING_THREADS_PER_WORKER: int = 1
+
+    ONNX_INTRA_OP_THREADS: int = 4
+    ONNX_QUANTIZE: bool = True
+    ONNX_MAX_SEQUENCE_LENGTH: int = 256
+    ONNX_THREAD_POOL_WORKERS: int = 1
+
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 1000000
+
+    PROJECT_CACHE_MAX_ENTRIES: int = 10000
+    PROJECT_CACHE_TTL_SECONDS: float = 60.0
+    PROJECT_CACHE_NEGATIVE_TTL_SECONDS: float = 5.0
+
+    QUERY_EMBEDDING_CACHE_ENABLED: bool = True
+    QUERY_EMBEDDING_CACHE_MAX_ENTRIES: int = 10000
+    QUERY_EMBEDDING_CACHE_TTL_SECONDS: float = 3600.0
+
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_MAX_PROJECTS: int = 1000
+    ANSWER_CACHE_MAX_ENTRIES_PER_PROJECT: int = 256
+    ANSWER_CACHE_TTL_SECONDS: float = 3600.0
+    ANSWER_CACHE_SIMILARITY_THRESHOLD: float = 0.95
+
+    RAG_CONTEXT_TOKEN_BUDGET: int = 3000
+    RAG_CONTEXT_MIN_SCORE: float = 0.0
+    RAG_CONTEXT_OVERLAP_THRESHOLD: float = 0.8
+
+    SEARCH_BATCH_MAX_QUERIES: int = 256
 
     VECTOR_DB_BACKEND: str
     VECTOR_DB_PATH: str
     VECTOR_DB_DISTANCE_METHOD: str = None
+    VECTOR_DB_URL: str = ""
+    VECTOR_DB_API_KEY: str = ""
+    VECTOR_DB_THREAD_POOL_WORKERS: int = 1
 
     PRIMARY_LANG: str = "en"
     DEFAULT_LANG: str = "en"
+    TEMPLATES_HOT_RELOAD: bool = False
+
+    PROCESS_CHUNKER: str = "langchain"
+    PROCESS_POOL_WORKERS: int = 0
+    PROCESS_PDF_PAGES_PER_TASK: int = 50
+    CHUNK_INSERT_BATCH_SIZE: int = 500
+    CHUNK_INSERT_CONCURRENCY: int = 4
+
+    PUSH_PIPELINE_EMBED_CONCURRENCY: int = 2
+    PUSH_PIPELINE_UPSERT_CONCURRENCY: int = 1
+    PUSH_PIPELINE_QUEUE_SIZE: int = 4
+
+    JOB_LEASE_SECONDS: int = 300
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_POLL_INTERVAL_SECONDS: float = 2.0
+    JOB_PROGRESS_FLUSH_SECONDS: float = 2.0
 
 
     class Config:
         env_file = ".env"
 
+# .env is parsed once per process, every controller and model shares the instance
+@lru_cache
 def get_settings():
     return Settings()
\ No newline at end of file
@@ -0,0 +1,81 @@
+from typing import Callable, List
+import re
+
+class ContextPacker:
+
+    # picks the retrieved chunks that go into a RAG prompt: best score first, until the
+    # token budget of the whole prompt is used. chunks under min_score and chunks whose
+    # words mostly repeat an already picked chunk (duplicates, overlapping neighbours
+    # from the splitter) are dropped. the system and footer prompts are never cut, their
+    # tokens are reserved before any chunk is added
+
+    def __init__(self, token_budget: int, min_score: float = 0.0, overlap_threshold: float = 0.8,
+                       shingle_size: int = 3):
+
+        self.token_budget = token_budget
+        self.min_score = min_score
+        self.overlap_threshold = overlap_threshold
+        self.shingle_size = max(1, shingle_size)
+
+    def get_shingles(self, text: str) -> set:
+
+        words = re.findall(r"\w+", text.lower())
+
+        if len(words) <= self.shingle_size:
+            return { tuple(words) } if words else set()
+
+        return {
+            tuple(words[i : i + self.shingle_size])
+            for i in range(len(words) - self.shingle_size + 1)
+        }
+
+    def is_overlapping(self, shingles: set, picked_shingles: List[set]) -> bool:
+
+        # share of the smaller chunk found in the other one, so a chunk contained in
+        # a longer one counts as a duplicate too
+        for other in picked_shingles:
+
+            smaller = min(len(shingles), len(other))
+
+            if smaller == 0:
+                continue
+
+            if len(shingles & other) / smaller >= self.overlap_threshold:
+                return True
+
+        return False
+
+    def pack(self, documents: list, count_tokens: Callable[[str], int],
+                   render_document: Callable[[int, object], str], reserved_tokens: int,
+                   separator_tokens: int = 1) -> List[str]:
+
+        # documents have .text and .score, render_document(doc_num, doc) returns the
+        # prompt text of one chunk, reserved_tokens is what the fixed prompts take
+        remaining_tokens = self.token_budget - reserved_tokens
+
+        picked = []
+        picked_shingles = []
+
+        for doc in sorted(documents, key = lambda doc: doc.score, reverse = True):
+
+            if doc.score < self.min_score:
+                # sorted, every document left scores lower
+                break
+
+            shingles = self.get_shingles(doc.text)
+
+            if self.is_overlapping(shingles, picked_shingles):
+                continue
+
+            document_prompt = render_document(len(picked) + 1, doc)
+            document_tokens = count_tokens(document_prompt) + separator_tokens
+
+            # a long chunk is skipped, a shorter lower scored one may still fit
+            if document_tokens > remaining_tokens:
+                continue
+
+            picked.append(document_prompt)
+            picked_shingles.append(shingles)
+            remaining_tokens -= document_tokens
+
+        return picked
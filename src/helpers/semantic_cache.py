@@ -0,0 +1,145 @@
+from collections import OrderedDict
+from typing import List
+import numpy as np
+import time
+
+class SemanticCacheEntry:
+
+    __slots__ = ("vector", "document_ids", "version", "value", "expires_at")
+
+    def __init__(self, vector: np.ndarray, document_ids: frozenset, version, value, expires_at: float):
+
+        self.vector = vector
+        self.document_ids = document_ids
+        self.version = version
+        self.value = value
+        self.expires_at = expires_at
+
+class SemanticCache:
+
+    # per project cache looked up by meaning instead of exact key: a query hits an
+    # entry when its embedding is at least similarity_threshold (cosine) close to the
+    # entry's query AND the same documents were retrieved for it, so a value is never
+    # reused for another context. projects and their entries are both evicted least
+    # recently used first, entries also expire after ttl_seconds. an entry stored under
+    # another version of the project's data (e.g. before a reset) is never returned
+
+    def __init__(self, max_projects: int = 1000, max_entries_per_project: int = 256,
+                       ttl_seconds: float = 3600.0, similarity_threshold: float = 0.95):
+
+        self.max_projects = max_projects
+        self.max_entries_per_project = max_entries_per_project
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+
+        # project_id -> OrderedDict(entry_id -> SemanticCacheEntry)
+        self.projects = OrderedDict()
+        self.next_entry_id = 0
+
+        self.stats = {
+            "hits" : 0,
+            "misses" : 0,
+            "stores" : 0,
+            "evictions" : 0,
+            "expirations" : 0,
+            "invalidations" : 0,
+            "stale" : 0,
+        }
+
+    def normalize(self, vector: list) -> np.ndarray:
+
+        vector = np.asarray(vector, dtype = np.float32)
+        norm = np.linalg.norm(vector)
+
+        return vector / norm if norm > 0 else vector
+
+    def get(self, project_id: str, query_vector: list, document_ids: List[str], version = None):
+
+        entries = self.projects.get(project_id)
+
+        if not entries:
+            self.stats["misses"] += 1
+            return None
+
+        now = time.monotonic()
+        query_vector = self.normalize(query_vector)
+        document_ids = frozenset(document_ids)
+
+        best_entry_id, best_score = None, self.similarity_threshold
+
+        for entry_id, entry in list(entries.items()):
+
+            if entry.expires_at <= now:
+                del entries[entry_id]
+                self.stats["expirations"] += 1
+                continue
+
+            # left to expire: a request still running on an older version must not
+            # drop the entries of the newer one
+            if entry.version != version:
+                self.stats["stale"] += 1
+                continue
+
+            if entry.document_ids != document_ids or entry.vector.shape != query_vector.shape:
+                continue
+
+            score = float(np.dot(entry.vector, query_vector))
+
+            if score >= best_score:
+                best_entry_id, best_score = entry_id, score
+
+        if best_entry_id is None:
+            self.stats["misses"] += 1
+            return None
+
+        entries.move_to_end(best_entry_id)
+        self.projects.move_to_end(project_id)
+        self.stats["hits"] += 1
+
+        return entries[best_entry_id].value
+
+    def set(self, project_id: str, query_vector: list, document_ids: List[str], value, version = None):
+
+        entries = self.projects.get(project_id)
+
+        if entries is None:
+            entries = self.projects[project_id] = OrderedDict()
+
+        self.projects.move_to_end(project_id)
+
+        entries[self.next_entry_id] = SemanticCacheEntry(
+            vector = self.normalize(query_vector),
+            document_ids = frozenset(document_ids),
+            version = version,
+            value = value,
+            expires_at = time.monotonic() + self.ttl_seconds
+        )
+        self.next_entry_id += 1
+        self.stats["stores"] += 1
+
+        while len(entries) > self.max_entries_per_project:
+            entries.popitem(last = False)
+            self.stats["evictions"] += 1
+
+        while len(self.projects) > self.max_projects:
+            _, evicted_entries = self.projects.popitem(last = False)
+            self.stats["evictions"] += len(evicted_entries)
+
+    def invalidate_project(self, project_id: str):
+
+        if self.projects.pop(project_id, None) is not None:
+            self.stats["invalidations"] += 1
+
+    def clear(self):
+        self.projects.clear()
+
+    def get_stats(self):
+
+        lookups = self.stats["hits"] + self.stats["misses"]
+
+        return {
+            **self.stats,
+            "projects" : len(self.projects),
+            "entries" : sum(len(entries) for entries in self.projects.values()),
+            "hit_rate" : round(self.stats["hits"] / lookups, 4) if lookups > 0 else 0.0,
+        }
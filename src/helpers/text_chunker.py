@@ -0,0 +1,155 @@
+from collections import deque
+from typing import Iterator, List, Tuple
+import re
+
+class TextChunk:
+
+    __slots__ = ("page_content", "metadata", "start_index", "end_index")
+
+    def __init__(self, page_content: str, metadata: dict, start_index: int, end_index: int):
+
+        self.page_content = page_content
+        self.metadata = metadata
+        self.start_index = start_index
+        self.end_index = end_index
+
+class OffsetTextChunker:
+
+    # Same output as LangChain's RecursiveCharacterTextSplitter with its defaults
+    # (keep_separator = True, strip_whitespace = True, literal separators), but it
+    # works on (start, end) offsets into the source string: no intermediate
+    # substrings are built while splitting and merging, and chunks are yielded lazily.
+
+    def __init__(self, chunk_size: int, chunk_overlap: int, separators: List[str] = None):
+
+        if chunk_overlap > chunk_size:
+            raise ValueError(
+                f"Got a larger chunk overlap ({chunk_overlap}) than chunk size ({chunk_size}), should be smaller."
+            )
+
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = separators if separators else ["\n\n", "\n", " ", ""]
+
+        self.patterns = {
+            separator : re.compile(re.escape(separator))
+            for separator in self.separators
+            if separator != ""
+        }
+
+    def split_text_spans(self, text: str) -> Iterator[Tuple[int, int]]:
+
+        return self._split(text, 0, len(text), self.separators)
+
+    def split_pages(self, texts: List[str], metadatas: List[dict] = None) -> Iterator[TextChunk]:
+
+        # every chunk of a page shares the page metadata dict instead of a deep copy
+        metadatas = metadatas if metadatas else [{}] * len(texts)
+
+        for text, metadata in zip(texts, metadatas):
+            for start, end in self.split_text_spans(text):
+                yield TextChunk(
+                    page_content = text[start:end],
+                    metadata = metadata,
+                    start_index = start,
+                    end_index = end
+                )
+
+    def _split(self, text: str, start: int, end: int, separators: List[str]):
+
+        # pick the first separator present in text[start:end]
+        separator = separators[-1]
+        new_separators = []
+
+        for i, candidate in enumerate(separators):
+
+            if candidate == "":
+                separator = candidate
+                break
+
+            if self.patterns[candidate].search(text, start, end):
+                separator = candidate
+                new_separators = separators[i + 1:]
+                break
+
+        good_splits = []
+
+        for split_start, split_end in self._split_spans(text, start, end, separator):
+
+            if split_end - split_start < self.chunk_size:
+                good_splits.append((split_start, split_end))
+                continue
+
+            if good_splits:
+                yield from self._merge_spans(text, good_splits)
+                good_splits = []
+
+            if not new_separators:
+                yield (split_start, split_end)
+            else:
+                yield from self._split(text, split_start, split_end, new_separators)
+
+        if good_splits:
+            yield from self._merge_spans(text, good_splits)
+
+    def _split_spans(self, text: str, start: int, end: int, separator: str):
+
+        if separator == "":
+            return [(i, i + 1) for i in range(start, end)]
+
+        # the separator is kept at the start of the following split
+        spans = []
+        split_start = start
+
+        for match in self.patterns[separator].finditer(text, start, end):
+            if match.start() > split_start:
+                spans.append((split_start, match.start()))
+            split_start = match.start()
+
+        if end > split_start:
+            spans.append((split_start, end))
+
+        return spans
+
+    def _merge_spans(self, text: str, splits: List[Tuple[int, int]]):
+
+        # splits are contiguous, so joining them is just (first start, last end)
+        current_spans = deque()
+        total = 0
+
+        for split_start, split_end in splits:
+
+            split_length = split_end - split_start
+
+            if total + split_length > self.chunk_size and len(current_spans) > 0:
+
+                span = self._strip_span(text, current_spans[0][0], current_spans[-1][1])
+                if span:
+                    yield span
+
+                while total > self.chunk_overlap or (
+                    total + split_length > self.chunk_size and total > 0
+                ):
+                    first_start, first_end = current_spans.popleft()
+                    total -= first_end - first_start
+
+            current_spans.append((split_start, split_end))
+            total += split_length
+
+        if len(current_spans) > 0:
+            span = self._strip_span(text, current_spans[0][0], current_spans[-1][1])
+            if span:
+                yield span
+
+    def _strip_span(self, text: str, start: int, end: int):
+
+        while start < end and text[start].isspace():
+            start += 1
+
+        while end > start and text[end - 1].isspace():
+            end -= 1
+
+        if start == end:
+            return None
+
+        return (start, end)
@@ -1,10 +1,16 @@
 from fastapi import FastAPI
-from routes import base, data, nlp
+from routes import base, data, nlp, jobs
 from motor.motor_asyncio import AsyncIOMotorClient
 from helpers.config import get_settings
+from helpers.semantic_cache import SemanticCache
+from helpers.cache import TTLCache
 from stores.llm import LLMProviderFactory
 from stores.vectordb import VectorDBProviderFactory
 from stores.llm.templates.template_parser import TemplateParser
+from models import ProjectModel, ChunkModel, AssetModel, JobModel, EmbeddingCacheModel
+from controllers import NLPController
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
 
 app = FastAPI()
 
@@ -15,37 +21,89 @@ async def startup_span():
     app.mongo_conn = AsyncIOMotorClient( settings.MONGODB_URL )
     app.db_client = app.mongo_conn[ settings.MONGODB_DATABASE ]
 
+    # models: collections and indexes are ensured here once, routes share the instances
+    app.project_model = await ProjectModel.create_instance(db_client = app.db_client)
+    app.chunk_model = await ChunkModel.create_instance(db_client = app.db_client)
+    app.asset_model = await AssetModel.create_instance(db_client = app.db_client)
+    app.job_model = await JobModel.create_instance(db_client = app.db_client)
+
+    # file processing pool
+    app.process_pool = ProcessPoolExecutor(
+        max_workers = settings.PROCESS_POOL_WORKERS,
+        mp_context = multiprocessing.get_context("spawn")
+    ) if settings.PROCESS_POOL_WORKERS > 0 else None
+
     # factories
-    llm_provider_factory = LLMProviderFactory(config = settings)
+    # kept on the app to close its pooled HTTP client on shutdown
+    app.llm_provider_factory = LLMProviderFactory(config = settings)
     vectordb_provider_factory = VectorDBProviderFactory(config = settings)
 
     # generation client
-    app.generation_client = llm_provider_factory.create(provider = settings.GENERATION_BACKEND)
+    app.generation_client = app.llm_provider_factory.create(provider = settings.GENERATION_BACKEND)
     app.generation_client.set_generation_model(model_id = settings.GENERATION_MODEL_ID)
 
     # embedding client
-    app.embedding_client = llm_provider_factory.create(provider = settings.EMBEDDING_BACKEND)
+    app.embedding_client = app.llm_provider_factory.create(provider = settings.EMBEDDING_BACKEND)
     app.embedding_client.set_embedding_model(model_id = settings.EMBEDDING_MODEL_ID,
                                              embedding_size = settings.EMBEDDING_MODEL_SIZE)
 
+    # embedding cache
+    app.embedding_cache = await EmbeddingCacheModel.create_instance(
+        db_client = app.db_client,
+        max_entries = settings.EMBEDDING_CACHE_MAX_ENTRIES
+    ) if settings.EMBEDDING_CACHE_ENABLED else None
+
     # vectordb client
-    app.vectordb_client = vectordb_provider_factory.create(
+    app.vectordb_client = vectordb_provider_factory.create_async(
         provider = settings.VECTOR_DB_BACKEND)
-    app.vectordb_client.connect()
+    _ = await app.vectordb_client.connect()
 
     # template parser
     app.template_parser = TemplateParser(
         language = settings.PRIMARY_LANG, 
         default_language = settings.DEFAULT_LANG, 
+        hot_reload = settings.TEMPLATES_HOT_RELOAD,
+    )
+
+    # query embedding cache, a failed embedding is not kept
+    app.query_embedding_cache = TTLCache(
+        max_entries = settings.QUERY_EMBEDDING_CACHE_MAX_ENTRIES,
+        ttl_seconds = settings.QUERY_EMBEDDING_CACHE_TTL_SECONDS,
+        negative_ttl_seconds = 0
+    ) if settings.QUERY_EMBEDDING_CACHE_ENABLED else None
+
+    # answer cache
+    app.answer_cache = SemanticCache(
+        max_projects = settings.ANSWER_CACHE_MAX_PROJECTS,
+        max_entries_per_project = settings.ANSWER_CACHE_MAX_ENTRIES_PER_PROJECT,
+        ttl_seconds = settings.ANSWER_CACHE_TTL_SECONDS,
+        similarity_threshold = settings.ANSWER_CACHE_SIMILARITY_THRESHOLD
+    ) if settings.ANSWER_CACHE_ENABLED else None
+
+    # nlp controller
+    app.nlp_controller = NLPController(
+        vectordb_client = app.vectordb_client,
+        generation_client = app.generation_client,
+        embedding_client = app.embedding_client,
+        template_parser = app.template_parser,
+        embedding_cache = app.embedding_cache,
+        answer_cache = app.answer_cache,
+        query_embedding_cache = app.query_embedding_cache,
+        project_model = app.project_model
     )
 
 @app.on_event("shutdown")
 async def shutdown_span():
 
     app.mongo_conn.close()
-    app.vectordb_client.disconnect()
+    _ = await app.vectordb_client.disconnect()
+    await app.llm_provider_factory.close()
+
+    if app.process_pool:
+        app.process_pool.shutdown(cancel_futures = True)
 
 # routers
 app.include_router( base.base_router )
 app.include_router( data.data_router )
-app.include_router( nlp.nlp_router )
\ No newline at end of file
+app.include_router( nlp.nlp_router )
+app.include_router( jobs.job_router )
\ No newline at end of file
@@ -20,19 +20,8 @@ class AssetModel(BaseDataModel):
         return instance
 
     async def init_collection(self):
-        
-        all_collections = await self.db_client.list_collection_names()
 
-        if DataBaseEnum.COLLECTION_ASSET_NAME.value not in all_collections:
-            self.collection = self.db_client[ DataBaseEnum.COLLECTION_ASSET_NAME.value ]
-            indexes = Asset.get_indexes()
-
-            for index in indexes:        
-                await self.collection.create_index(
-                    keys = index["key"],
-                    name = index["name"],
-                    unique = index["unique"]
-                )
+        await self.ensure_indexes(Asset.get_indexes())
 
     async def create_asset(self, asset: Asset):
 
@@ -53,6 +42,34 @@ class AssetModel(BaseDataModel):
             for record in records
         ]
     
+    async def update_asset_processing(self, asset_id: ObjectId, asset_checksum: str, asset_config: dict):
+
+        result = await self.collection.update_one(
+            {"_id" : asset_id},
+            {"$set" : {
+                "asset_checksum" : asset_checksum,
+                "asset_config" : asset_config,
+            }}
+        )
+
+        return result.modified_count
+
+    async def get_processed_asset(self, asset_config: dict, exclude_asset_id: ObjectId = None):
+
+        # any asset, in any project, whose content was processed with the same parameters
+        record = await self.collection.find_one({
+            **{
+                f"asset_config.{key}" : value
+                for key, value in asset_config.items()
+            },
+            "_id" : {"$ne" : exclude_asset_id},
+        })
+
+        if record:
+            return Asset(**record)
+        else:
+            return None
+
     async def get_asset_by_asset_name(self,asset_project_id: ObjectId, asset_name: str):
 
         record = await self.collection.find_one({
@@ -5,4 +5,14 @@ class BaseDataModel:
     def __init__(self, db_client: object):
         
         self.db_client = db_client
-        self.app_settings = get_settings()
\ No newline at end of file
+        self.app_settings = get_settings()
+
+    async def ensure_indexes(self, indexes: list):
+
+        # runs once per model at startup, create_index is a no-op for an existing index
+        for index in indexes:
+            await self.collection.create_index(
+                keys = index["key"],
+                name = index["name"],
+                unique = index["unique"]
+            )
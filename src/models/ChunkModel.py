@@ -2,7 +2,9 @@ from .BaseDataModel import BaseDataModel
 from .enums.DataBaseEnum import DataBaseEnum
 from .db_schemes import DataChunk
 from bson.objectid import ObjectId
-from pymongo import InsertOne
+from pymongo.errors import BulkWriteError
+import asyncio
+import logging
 
 class ChunkModel(BaseDataModel):
 
@@ -11,6 +13,7 @@ class ChunkModel(BaseDataModel):
         super().__init__(db_client)
  
         self.collection = self.db_client[ DataBaseEnum.COLLECTION_CHUNK_NAME.value ]
+        self.logger = logging.getLogger(__name__)
     
     @classmethod
     async def create_instance(cls, db_client: object):
@@ -21,19 +24,8 @@ class ChunkModel(BaseDataModel):
         return instance
 
     async def init_collection(self):
-        
-        all_collections = await self.db_client.list_collection_names()
-
-        if DataBaseEnum.COLLECTION_CHUNK_NAME.value not in all_collections:
-            self.collection = self.db_client[ DataBaseEnum.COLLECTION_CHUNK_NAME.value ]
-            indexes = DataChunk.get_indexes()
 
-            for index in indexes:        
-                await self.collection.create_index(
-                    keys = index["key"],
-                    name = index["name"],
-                    unique = index["unique"]
-                )
+        await self.ensure_indexes(DataChunk.get_indexes())
 
     async def create_chunk(self, chunk: DataChunk):
 
@@ -50,25 +42,115 @@ class ChunkModel(BaseDataModel):
 
         return DataChunk(**result)
     
-    async def insert_many_chunks(self, chunks: list, batch_size: int = 100):
+    async def insert_many_chunks(self, chunks, batch_size: int = None, concurrency: int = None):
 
-        for i in range(0, len(chunks), batch_size):
-            batch = chunks[i : i + batch_size]
+        # chunks is a list, iterator or async iterator of DataChunk objects or of ready
+        # chunk records (dicts are inserted as they are, without a pydantic round trip),
+        # consumed batch by batch so the whole file never has to be held in memory.
+        # up to `concurrency` unordered batches are in flight, returns the inserted count
 
-            operations = [
-                InsertOne(chunk.model_dump(by_alias = True, exclude_unset = True))
-                for chunk in batch
-            ]
+        batch_size = batch_size if batch_size else self.app_settings.CHUNK_INSERT_BATCH_SIZE
+        concurrency = max(1, concurrency if concurrency else self.app_settings.CHUNK_INSERT_CONCURRENCY)
+
+        running_batches = set()
+        no_inserted = 0
+
+        async def insert_batch(batch: list):
+
+            try:
+                result = await self.collection.insert_many(batch, ordered = False)
+                return len(result.inserted_ids)
+
+            except BulkWriteError as e:
+                # unordered batches keep going past a failed document
+                self.logger.error(f"error while inserting chunks: {e.details.get('writeErrors', [])[:1]}")
+                return e.details.get("nInserted", 0)
+
+        async def submit_batch(batch: list):
+
+            nonlocal no_inserted
+
+            if len(running_batches) >= concurrency:
+                done, _ = await asyncio.wait(running_batches, return_when = asyncio.FIRST_COMPLETED)
+                for task in done:
+                    running_batches.discard(task)
+                    no_inserted += task.result()
+
+            running_batches.add(asyncio.create_task(insert_batch(batch)))
+
+        async def iterate_chunks():
+
+            if hasattr(chunks, "__aiter__"):
+                async for chunk in chunks:
+                    yield chunk
+            else:
+                for chunk in chunks:
+                    yield chunk
+
+        batch = []
+
+        try:
+            async for chunk in iterate_chunks():
+
+                batch.append(
+                    chunk if isinstance(chunk, dict)
+                    else chunk.model_dump(by_alias = True, exclude_unset = True)
+                )
 
-            await self.collection.bulk_write(operations)
+                if len(batch) == batch_size:
+                    await submit_batch(batch)
+                    batch = []
 
-            return len(chunks)
+            if len(batch) > 0:
+                await submit_batch(batch)
+
+            for task in asyncio.as_completed(running_batches):
+                no_inserted += await task
+
+        finally:
+            for task in running_batches:
+                task.cancel()
+
+        return no_inserted
+
+    async def copy_asset_chunks(self, source_asset_id: ObjectId, project_id: ObjectId,
+                                      asset_id: ObjectId, batch_size: int = 100):
+
+        cursor = self.collection.find(
+            {"chunk_asset_id" : source_asset_id},
+            projection = {"_id" : 0}
+        ).sort("chunk_order", 1)
+
+        async def copied_records():
+            async for record in cursor:
+                record["chunk_project_id"] = project_id
+                record["chunk_asset_id"] = asset_id
+                yield record
+
+        return await self.insert_many_chunks(chunks = copied_records(), batch_size = batch_size)
 
     async def delete_chunks_by_project_id(self, project_id: ObjectId):
 
         result = await self.collection.delete_many({"chunk_project_id": project_id})
         return result.deleted_count
     
+    async def delete_chunks_by_asset_ids(self, project_id: ObjectId, asset_ids: list):
+
+        result = await self.collection.delete_many({
+            "chunk_project_id" : project_id,
+            "chunk_asset_id" : {"$in" : asset_ids}
+            })
+        return result.deleted_count
+
+    async def count_project_chunks(self, project_id: ObjectId, after_id: ObjectId = None):
+
+        query = {"chunk_project_id" : project_id}
+
+        if after_id is not None:
+            query["_id"] = {"$gt" : after_id}
+
+        return await self.collection.count_documents(query)
+
     async def get_project_chunks(self, project_id: ObjectId, page_no: int = 1,
                                        page_size: int = 50):
 
@@ -82,4 +164,63 @@ class ChunkModel(BaseDataModel):
             DataChunk(**record)
             for record in records
             ]
-            
\ No newline at end of file
+
+    async def iterate_project_chunks(self, project_id: ObjectId, batch_size: int = 100,
+                                           after_id: ObjectId = None,
+                                           after_asset_order: tuple = None,
+                                           by_asset_order: bool = False,
+                                           fields: list = None):
+
+        # keyset pagination: every batch is a range query on an index instead of a
+        # skip over all previous chunks, and the last chunk of a batch is the resume point.
+        # chunks are walked in _id order (chunk_project_id_id_index_1) resuming after
+        # after_id, or asset by asset in document order (chunk_project_id_asset_id_order_index_1)
+        # resuming after after_asset_order = (chunk_asset_id, chunk_order)
+
+        by_asset_order = by_asset_order or after_asset_order is not None
+
+        if by_asset_order:
+            sort = [("chunk_asset_id", 1), ("chunk_order", 1)]
+            last_asset_id, last_order = after_asset_order if after_asset_order else (None, None)
+        else:
+            sort = [("_id", 1)]
+            last_id = after_id
+
+        # only the given fields are fetched, the sort keys are always included to resume
+        projection = None
+        if fields:
+            projection = {field : 1 for field in fields}
+            projection.update({key : 1 for key, _ in sort})
+
+        while True:
+
+            query = {"chunk_project_id" : project_id}
+
+            if by_asset_order and last_asset_id is not None:
+                query["$or"] = [
+                    {"chunk_asset_id" : {"$gt" : last_asset_id}},
+                    {"chunk_asset_id" : last_asset_id, "chunk_order" : {"$gt" : last_order}},
+                ]
+            elif not by_asset_order and last_id is not None:
+                query["_id"] = {"$gt" : last_id}
+
+            records = await self.collection.find(
+                query, projection = projection
+            ).sort(sort).limit(batch_size).to_list(length = None)
+
+            if len(records) == 0:
+                break
+
+            if by_asset_order:
+                last_asset_id, last_order = records[-1]["chunk_asset_id"], records[-1]["chunk_order"]
+            else:
+                last_id = records[-1]["_id"]
+
+            # partial records can not be validated, they are built without validation
+            yield [
+                DataChunk.model_construct(**record) if projection else DataChunk(**record)
+                for record in records
+            ]
+
+            if len(records) < batch_size:
+                break
@@ -0,0 +1,133 @@
+from .BaseDataModel import BaseDataModel
+from .enums.DataBaseEnum import DataBaseEnum
+from .db_schemes import EmbeddingCacheEntry
+from pymongo import UpdateOne, ASCENDING
+from datetime import datetime
+from typing import List
+import numpy as np
+import hashlib
+
+class EmbeddingCacheModel(BaseDataModel):
+
+    def __init__(self, db_client: object, max_entries: int = 1000000,
+                       eviction_interval: int = 1000):
+
+        super().__init__(db_client)
+
+        self.collection = self.db_client[ DataBaseEnum.COLLECTION_EMBEDDING_CACHE_NAME.value ]
+
+        self.max_entries = max_entries
+        # check the collection size every `eviction_interval` written vectors, not on every write
+        self.eviction_interval = eviction_interval
+        self.writes_since_eviction = 0
+
+        self.stats = {
+            "hits" : 0,
+            "misses" : 0,
+            "writes" : 0,
+            "evictions" : 0,
+        }
+
+    @classmethod
+    async def create_instance(cls, db_client: object, max_entries: int = 1000000):
+
+        instance = cls(db_client, max_entries = max_entries)
+        await instance.init_collection()
+
+        return instance
+
+    async def init_collection(self):
+
+        await self.ensure_indexes(EmbeddingCacheEntry.get_indexes())
+
+    def get_cache_key(self, backend: str, model_id: str, document_type: str, text: str):
+
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+        return hashlib.sha256(
+            "\x00".join([str(backend), str(model_id), str(document_type), text_hash]).encode("utf-8")
+        ).hexdigest()
+
+    def get_stats(self):
+
+        lookups = self.stats["hits"] + self.stats["misses"]
+
+        return {
+            **self.stats,
+            "hit_rate" : round(self.stats["hits"] / lookups, 4) if lookups > 0 else 0.0,
+        }
+
+    async def get_vectors(self, keys: List[str]):
+
+        # returns {key: vector} for the keys found in the cache
+        unique_keys = list(set(keys))
+
+        records = await self.collection.find(
+            {"_id" : {"$in" : unique_keys}}
+        ).to_list(length = None)
+
+        vectors = {
+            record["_id"] : np.frombuffer(record["cache_vector"], dtype = "<f2").astype(np.float32).tolist()
+            for record in records
+        }
+
+        if len(vectors) > 0:
+            # refresh recency so eviction drops the least recently used entries first
+            _ = await self.collection.update_many(
+                {"_id" : {"$in" : list(vectors.keys())}},
+                {"$set" : {"cache_last_used_at" : datetime.utcnow()}}
+            )
+
+        self.stats["hits"] += len([key for key in keys if key in vectors])
+        self.stats["misses"] += len([key for key in keys if key not in vectors])
+
+        return vectors
+
+    async def set_vectors(self, vectors: dict):
+
+        if len(vectors) == 0:
+            return 0
+
+        operations = [
+            UpdateOne(
+                {"_id" : key},
+                {"$set" : EmbeddingCacheEntry(
+                    _id = key,
+                    cache_vector = np.asarray(vector, dtype = "<f2").tobytes()
+                ).model_dump(by_alias = True, exclude = {"id"})},
+                upsert = True
+            )
+            for key, vector in vectors.items()
+        ]
+
+        _ = await self.collection.bulk_write(operations, ordered = False)
+
+        self.stats["writes"] += len(operations)
+        self.writes_since_eviction += len(operations)
+
+        if self.writes_since_eviction >= self.eviction_interval:
+            self.writes_since_eviction = 0
+            _ = await self.evict()
+
+        return len(operations)
+
+    async def evict(self):
+
+        total_entries = await self.collection.estimated_document_count()
+
+        if total_entries <= self.max_entries:
+            return 0
+
+        oldest_records = await self.collection.find(
+            {}, projection = {"_id" : 1}
+        ).sort(
+            "cache_last_used_at", ASCENDING
+        ).limit(total_entries - self.max_entries).to_list(length = None)
+
+        result = await self.collection.delete_many({
+            "_id" : {"$in" : [record["_id"] for record in oldest_records]}
+        })
+
+        self.stats["evictions"] += result.deleted_count
+
+        return result.deleted_count
@@ -0,0 +1,169 @@
+from .BaseDataModel import BaseDataModel
+from .enums.DataBaseEnum import DataBaseEnum
+from .enums.JobEnums import JobStatusEnum
+from .db_schemes import Job
+from bson.objectid import ObjectId
+from pymongo import ASCENDING, ReturnDocument
+from datetime import datetime, timedelta
+
+class JobModel(BaseDataModel):
+
+    def __init__(self, db_client: object):
+
+        super().__init__(db_client)
+
+        self.collection = self.db_client[ DataBaseEnum.COLLECTION_JOB_NAME.value ]
+
+    @classmethod
+    async def create_instance(cls, db_client: object):
+
+        instance = cls(db_client)
+        await instance.init_collection()
+
+        return instance
+
+    async def init_collection(self):
+
+        await self.ensure_indexes(Job.get_indexes())
+
+    async def create_job(self, job: Job):
+
+        result = await self.collection.insert_one(job.model_dump(by_alias = True, exclude_none = True))
+        job.id = result.inserted_id
+
+        return job
+
+    async def get_job(self, job_id: str):
+
+        if isinstance(job_id, str):
+            if not ObjectId.is_valid(job_id):
+                return None
+            job_id = ObjectId(job_id)
+
+        record = await self.collection.find_one({"_id" : job_id})
+
+        if record:
+            return Job(**record)
+        else:
+            return None
+
+    async def lease_job(self, worker_id: str, lease_seconds: int, max_attempts: int):
+
+        now = datetime.utcnow()
+
+        # a job is available when it is pending, or when the worker running it
+        # stopped renewing its lease (crashed or got killed)
+        record = await self.collection.find_one_and_update(
+            {
+                "$or" : [
+                    {"job_status" : JobStatusEnum.PENDING.value},
+                    {
+                        "job_status" : JobStatusEnum.RUNNING.value,
+                        "job_lease_expires_at" : {"$lt" : now}
+                    },
+                ],
+                "job_attempts" : {"$lt" : max_attempts},
+            },
+            {
+                "$set" : {
+                    "job_status" : JobStatusEnum.RUNNING.value,
+                    "job_worker_id" : worker_id,
+                    "job_lease_expires_at" : now + timedelta(seconds = lease_seconds),
+                    "job_started_at" : now,
+                },
+                "$inc" : {"job_attempts" : 1},
+            },
+            sort = [("job_created_at", ASCENDING)],
+            return_document = ReturnDocument.AFTER
+        )
+
+        if record:
+            return Job(**record)
+        else:
+            return None
+
+    async def fail_abandoned_jobs(self, max_attempts: int):
+
+        # jobs whose lease expired after the last allowed attempt will never be leased again
+        result = await self.collection.update_many(
+            {
+                "job_status" : JobStatusEnum.RUNNING.value,
+                "job_lease_expires_at" : {"$lt" : datetime.utcnow()},
+                "job_attempts" : {"$gte" : max_attempts},
+            },
+            {
+                "$set" : {
+                    "job_status" : JobStatusEnum.FAILED.value,
+                    "job_finished_at" : datetime.utcnow(),
+                },
+                "$push" : {
+                    "job_errors" : {
+                        "message" : "job lease expired after the maximum number of attempts",
+                        "at" : datetime.utcnow(),
+                    }
+                },
+            }
+        )
+
+        return result.modified_count
+
+    async def renew_job_lease(self, job_id: ObjectId, worker_id: str, lease_seconds: int):
+
+        # returns False when another worker took the job over
+        result = await self.collection.update_one(
+            {
+                "_id" : job_id,
+                "job_worker_id" : worker_id,
+                "job_status" : JobStatusEnum.RUNNING.value,
+            },
+            {
+                "$set" : {
+                    "job_lease_expires_at" : datetime.utcnow() + timedelta(seconds = lease_seconds),
+                }
+            }
+        )
+
+        return result.matched_count > 0
+
+    async def update_job_progress(self, job_id: ObjectId, worker_id: str, progress: dict,
+                                        errors: list, lease_seconds: int):
+
+        # renews the lease as a heartbeat; returns False when another worker took the job over
+        result = await self.collection.update_one(
+            {
+                "_id" : job_id,
+                "job_worker_id" : worker_id,
+                "job_status" : JobStatusEnum.RUNNING.value,
+            },
+            {
+                "$set" : {
+                    "job_progress" : progress,
+                    "job_errors" : errors,
+                    "job_lease_expires_at" : datetime.utcnow() + timedelta(seconds = lease_seconds),
+                }
+            }
+        )
+
+        return result.matched_count > 0
+
+    async def finish_job(self, job_id: ObjectId, worker_id: str, job_status: str,
+                               progress: dict, errors: list, job_result: dict = None):
+
+        result = await self.collection.update_one(
+            {
+                "_id" : job_id,
+                "job_worker_id" : worker_id,
+            },
+            {
+                "$set" : {
+                    "job_status" : job_status,
+                    "job_progress" : progress,
+                    "job_errors" : errors,
+                    "job_result" : job_result,
+                    "job_finished_at" : datetime.utcnow(),
+                    "job_lease_expires_at" : None,
+                }
+            }
+        )
+
+        return result.matched_count > 0
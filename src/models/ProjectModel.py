@@ -1,6 +1,10 @@
 from .BaseDataModel import BaseDataModel
 from .enums.DataBaseEnum import DataBaseEnum
 from .db_schemes import Project
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from helpers.cache import TTLCache
 
 class ProjectModel(BaseDataModel):
 
@@ -10,6 +14,13 @@ class ProjectModel(BaseDataModel):
 
         self.collection = self.db_client[ DataBaseEnum.COLLECTION_PROJECT_NAME.value ]
 
+        # project records by project_id, shared by every request of this process
+        self.project_cache = TTLCache(
+            max_entries = self.app_settings.PROJECT_CACHE_MAX_ENTRIES,
+            ttl_seconds = self.app_settings.PROJECT_CACHE_TTL_SECONDS,
+            negative_ttl_seconds = self.app_settings.PROJECT_CACHE_NEGATIVE_TTL_SECONDS
+        )
+
     @classmethod
     async def create_instance(cls, db_client: object):
 
@@ -19,40 +30,116 @@ class ProjectModel(BaseDataModel):
         return instance
 
     async def init_collection(self):
-        
-        all_collections = await self.db_client.list_collection_names()
-
-        if DataBaseEnum.COLLECTION_PROJECT_NAME.value not in all_collections:
-            self.collection = self.db_client[ DataBaseEnum.COLLECTION_PROJECT_NAME.value ]
-            indexes = Project.get_indexes()
 
-            for index in indexes:        
-                await self.collection.create_index(
-                    keys = index["key"],
-                    name = index["name"],
-                    unique = index["unique"]
-                )
+        await self.ensure_indexes(Project.get_indexes())
 
     async def create_project(self, project: Project):
 
-        result = await self.collection.insert_one(project.model_dump(by_alias = True, exclude_unset = True))
-        project.id = result.inserted_id
+        # an upsert: a project created meanwhile by another process or request (while
+        # this one may still cache it as missing) is returned instead of raising on
+        # the unique project_id index
+        try:
+            record = await self.collection.find_one_and_update(
+                {"project_id" : project.project_id},
+                {"$setOnInsert" : project.model_dump(by_alias = True, exclude_unset = True, exclude = {"id"})},
+                upsert = True,
+                return_document = ReturnDocument.AFTER
+            )
+
+        except DuplicateKeyError:
+            # two upserts racing on the unique index, the other one inserted it
+            record = await self.collection.find_one( {"project_id" : project.project_id} )
+
+        project = Project(**record)
+        self.project_cache.set(project.project_id, project)
 
         return project
+
+    async def get_project(self, project_id: str):
+
+        async def find_project():
+            record = await self.collection.find_one( {"project_id" : project_id} )
+
+            if record is None:
+                return None
+
+            return Project(**record)
+
+        return await self.project_cache.get_or_load(project_id, find_project)
         
     async def get_project_or_create_one(self, project_id: str):
 
-        record = await self.collection.find_one( {"project_id" : project_id} )
+        project = await self.get_project(project_id)
 
-        if record is None:
+        if project is None:
             #create new project
             project = Project(project_id = project_id)
             project = await self.create_project(project)
 
-            return project
-        
-        return Project(**record)
+        return project
+
+    async def get_push_checkpoint(self, project_id: ObjectId):
+
+        # read from the database, the checkpoint may be written by another process
+        record = await self.collection.find_one(
+            {"_id" : project_id}, projection = {"project_push_checkpoint" : 1}
+        )
+
+        return record.get("project_push_checkpoint") if record else None
     
+    async def get_collection_version(self, project_id: ObjectId):
+
+        # read from the database, the collection may be changed by another process
+        record = await self.collection.find_one(
+            {"_id" : project_id}, projection = {"project_collection_version" : 1}
+        )
+
+        return record.get("project_collection_version", 0) if record else 0
+
+    async def bump_collection_version(self, project_id: ObjectId):
+
+        # the cached project record is kept, the version is always read with get_collection_version
+        result = await self.collection.update_one(
+            {"_id" : project_id},
+            {"$inc" : {"project_collection_version" : 1}}
+        )
+
+        return result.modified_count
+
+    def invalidate_project(self, record: dict):
+
+        # cached records are keyed by project_id, the updates are by _id and return
+        # the project_id of the updated record. returns the number of updated records
+        if record is None:
+            return 0
+
+        self.project_cache.invalidate(record["project_id"])
+
+        return 1
+
+    def get_cache_stats(self):
+        return self.project_cache.get_stats()
+
+    async def set_push_checkpoint(self, project_id: ObjectId, push_checkpoint: dict):
+
+        record = await self.collection.find_one_and_update(
+            {"_id" : project_id},
+            {"$set" : {"project_push_checkpoint" : push_checkpoint}},
+            projection = {"project_id" : 1}
+        )
+
+        return self.invalidate_project(record = record)
+
+    async def clear_push_checkpoint(self, project_id: ObjectId):
+
+        record = await self.collection.find_one_and_update(
+            {"_id" : project_id},
+            {"$unset" : {"project_push_checkpoint" : ""}},
+            projection = {"project_id" : 1}
+        )
+
+        return self.invalidate_project(record = record)
+
     async def get_all_projects(self, page: int = 1, page_size: int = 10):
         
         # count all documents
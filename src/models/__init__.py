@@ -3,4 +3,6 @@
 
 from .ProjectModel import ProjectModel
 from .ChunkModel import ChunkModel
-from .AssetModel import AssetModel
\ No newline at end of file
+from .AssetModel import AssetModel
+from .JobModel import JobModel
+from .EmbeddingCacheModel import EmbeddingCacheModel
\ No newline at end of file
@@ -1,3 +1,5 @@
 from .project import Project
 from .data_chunk import DataChunk, RetrievedDocument
-from .asset import Asset
\ No newline at end of file
+from .asset import Asset
+from .job import Job
+from .embedding_cache import EmbeddingCacheEntry
\ No newline at end of file
@@ -11,7 +11,8 @@ class Asset(BaseModel):
     asset_name: str = Field(..., min_length = 1) # file_id
     asset_size: int = Field(gt = 0, default = None)
     asset_pushed_at: datetime = Field(default = datetime.utcnow)
-    asset_config: dict = Field(default = None)
+    asset_checksum: Optional[str] = None # sha256 of the file content
+    asset_config: dict = Field(default = None) # chunking parameters and checksum of the last processing
 
     class Config:
         arbitrary_types_allowed = True
@@ -33,5 +34,11 @@ class Asset(BaseModel):
                     ],
                 "name" : "asset_project_id_name_index_1",
                 "unique" : True
+            },
+
+            {
+                "key" : [("asset_config.checksum", 1)],
+                "name" : "asset_config_checksum_index_1",
+                "unique" : False
             }
         ]
\ No newline at end of file
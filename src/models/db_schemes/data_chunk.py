@@ -4,7 +4,7 @@ from typing import Optional
 
 class DataChunk(BaseModel):
 
-    id: Optional[ObjectId] = Field(None, alies = "_id")
+    id: Optional[ObjectId] = Field(None, alias = "_id")
     chunk_text: str = Field(min_length=1)
     chunk_metadata: dict
     chunk_order: int = Field(gt=0)
@@ -22,10 +22,39 @@ class DataChunk(BaseModel):
                 "key": [("chunk_project_id", 1)],
                 "name": "chunk_project_id_index_1",
                 "unique": False
+            },
+
+            {
+                "key": [
+                    ("chunk_asset_id", 1),
+                    ("chunk_order", 1)
+                    ],
+                "name": "chunk_asset_id_order_index_1",
+                "unique": False
+            },
+
+            {
+                "key": [
+                    ("chunk_project_id", 1),
+                    ("_id", 1)
+                    ],
+                "name": "chunk_project_id_id_index_1",
+                "unique": False
+            },
+
+            {
+                "key": [
+                    ("chunk_project_id", 1),
+                    ("chunk_asset_id", 1),
+                    ("chunk_order", 1)
+                    ],
+                "name": "chunk_project_id_asset_id_order_index_1",
+                "unique": False
             }
         ]
 
 class RetrievedDocument(BaseModel):
 
+    id: Optional[str] = None # the vector db point id
     text: str
     score: float
\ No newline at end of file
@@ -0,0 +1,19 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+class EmbeddingCacheEntry(BaseModel):
+
+    id: str = Field(..., alias = "_id") # sha256 of (backend, model, document type, text hash)
+    cache_vector: bytes # float16 little-endian
+    cache_last_used_at: datetime = Field(default_factory = datetime.utcnow)
+
+    @classmethod
+    def get_indexes(cls):
+
+        return [
+            {
+                "key" : [("cache_last_used_at", 1)],
+                "name" : "cache_last_used_at_index_1",
+                "unique" : False
+            }
+        ]
@@ -0,0 +1,45 @@
+from pydantic import BaseModel, Field
+from bson.objectid import ObjectId
+from typing import Optional
+from datetime import datetime
+from ..enums.JobEnums import JobStatusEnum
+
+class Job(BaseModel):
+
+    id: Optional[ObjectId] = Field(None, alias = "_id")
+    job_project_id: ObjectId
+    job_type: str = Field(..., min_length = 1)
+    job_status: str = Field(default = JobStatusEnum.PENDING.value)
+    job_params: dict = Field(default_factory = dict)
+    job_progress: dict = Field(default_factory = dict)
+    job_errors: list = Field(default_factory = list)
+    job_result: Optional[dict] = None
+    job_attempts: int = Field(default = 0, ge = 0)
+    job_worker_id: Optional[str] = None
+    job_lease_expires_at: Optional[datetime] = None
+    job_created_at: datetime = Field(default_factory = datetime.utcnow)
+    job_started_at: Optional[datetime] = None
+    job_finished_at: Optional[datetime] = None
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @classmethod
+    def get_indexes(cls):
+
+        return [
+            {
+                "key" : [
+                    ("job_status", 1),
+                    ("job_created_at", 1)
+                    ],
+                "name" : "job_status_created_at_index_1",
+                "unique" : False
+            },
+
+            {
+                "key" : [("job_project_id", 1)],
+                "name" : "job_project_id_index_1",
+                "unique" : False
+            }
+        ]
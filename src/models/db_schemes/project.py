@@ -6,6 +6,10 @@ class Project(BaseModel):
 
     id: Optional[ObjectId] = Field(None, alias = "_id")
     project_id: str = Field(min_length = 1)
+    # {last_chunk_id, pushed_items_count, updated_at} of an unfinished index push
+    project_push_checkpoint: Optional[dict] = None
+    # bumped whenever the project's vector db collection changes, versions cached answers
+    project_collection_version: Optional[int] = 0
 
     @field_validator("project_id")
     def validate_project_id(cls, value):
@@ -0,0 +1,13 @@
+from enum import Enum
+
+class JobTypeEnum(Enum):
+
+    PROCESS = "process"
+    PUSH = "push"
+
+class JobStatusEnum(Enum):
+
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
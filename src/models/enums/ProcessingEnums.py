@@ -3,4 +3,9 @@ from enum import Enum
 class ProcessingEnums(Enum):
 
     TXT = ".txt"
-    PDF = ".pdf"
\ No newline at end of file
+    PDF = ".pdf"
+
+class ChunkerEnums(Enum):
+
+    LANGCHAIN = "langchain"
+    OFFSET = "offset"
\ No newline at end of file
@@ -19,5 +19,11 @@ class ResponseSignal(Enum):
     VECTORDB_COLLECTION_NOT_FOUND : "vectordb_collection_not_found"
     VECTORDB_SEARCH_ERROR = "vectordb_search_error"
     VECTORDB_SEARCH_SUCCESS = "vectordb_search_success"
+    VECTORDB_SEARCH_BATCH_TOO_LARGE = "vectordb_search_batch_too_large"
     RAG_ANSWER_ERROR = "rag_answer_error"
-    RAG_ANSWER_SUCCESS = "rag_answer_success"
\ No newline at end of file
+    RAG_ANSWER_SUCCESS = "rag_answer_success"
+    JOB_ENQUEUED_SUCCESS = "job_enqueued_success"
+    JOB_NOT_FOUND_ERROR = "job_not_found"
+    JOB_RETRIEVED_SUCCESS = "job_retrieved_success"
+    JOB_LEASE_LOST_ERROR = "job_lease_lost"
+    JOB_TYPE_NOT_SUPPORTED = "job_type_not_supported"
\ No newline at end of file
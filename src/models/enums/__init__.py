@@ -1,4 +1,5 @@
 from .ResponseEnums import ResponseSignal
 from .DataBaseEnum import DataBaseEnum
-from .ProcessingEnums import ProcessingEnums
-from .AssetTypeEnum import AssetTypeEnum
\ No newline at end of file
+from .ProcessingEnums import ProcessingEnums, ChunkerEnums
+from .AssetTypeEnum import AssetTypeEnum
+from .JobEnums import JobTypeEnum, JobStatusEnum
\ No newline at end of file
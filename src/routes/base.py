@@ -1,4 +1,4 @@
-from fastapi import FastAPI, APIRouter, Depends # type: ignore
+from fastapi import FastAPI, APIRouter, Depends, Request # type: ignore
 from helpers.config import get_settings, Settings
 
 base_router = APIRouter(
@@ -16,4 +16,21 @@ async def welcome(app_settings: Settings = Depends(get_settings)):
     return {
         "app_name" : app_name,
         "app_version": app_ver
+    }
+
+@base_router.get("/stats")
+async def get_stats(request: Request):
+
+    embedding_cache = request.app.embedding_cache
+    answer_cache = request.app.answer_cache
+    query_embedding_cache = request.app.query_embedding_cache
+    # only local embedding models batch concurrent requests
+    embedding_batcher = getattr(request.app.embedding_client, "embedding_batcher", None)
+
+    return {
+        "embedding_cache" : embedding_cache.get_stats() if embedding_cache else None,
+        "project_cache" : request.app.project_model.get_cache_stats(),
+        "query_embedding_cache" : query_embedding_cache.get_stats() if query_embedding_cache else None,
+        "answer_cache" : answer_cache.get_stats() if answer_cache else None,
+        "embedding_batcher" : embedding_batcher.get_stats() if embedding_batcher else None,
     }
\ No newline at end of file
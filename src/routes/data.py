@@ -1,14 +1,16 @@
 from fastapi import FastAPI, APIRouter, UploadFile, Depends, status, Request
 from fastapi.responses import JSONResponse
 from helpers.config import get_settings, Settings
-from controllers import DataController, ProjectController, ProcessController, BaseController
+from controllers import DataController, ProjectController, ProcessController, BaseController, IngestionController, NLPController
 import aiofiles
+import hashlib
 import os
 import logging
 from routes.schemes import ProcessRequest
-from models.enums import ResponseSignal, ResponseEnums, AssetTypeEnum
-from models.db_schemes import DataChunk, Asset
-from models import ProjectModel, ChunkModel, AssetModel
+from models.enums import ResponseSignal, ResponseEnums, AssetTypeEnum, JobTypeEnum
+from models.db_schemes import DataChunk, Asset, Job
+from models import ProjectModel, ChunkModel, AssetModel, JobModel
+from routes.dependencies import get_project_model, get_chunk_model, get_asset_model, get_job_model, get_nlp_controller
 
 logger = logging.getLogger("uvicorn.error")
 
@@ -19,9 +21,9 @@ data_router = APIRouter(
 
 @data_router.post("/upload/{project_id}")
 async def upload_data( request: Request, project_id: str , file: UploadFile,
-                      app_settings: Settings = Depends(get_settings)):
-    
-    project_model = await ProjectModel.create_instance( db_client = request.app.db_client )
+                      app_settings: Settings = Depends(get_settings),
+                      project_model: ProjectModel = Depends(get_project_model),
+                      asset_model: AssetModel = Depends(get_asset_model)):
 
     project = await project_model.get_project_or_create_one(project_id)
 
@@ -35,30 +37,42 @@ async def upload_data( request: Request, project_id: str , file: UploadFile,
             content = {"result_signal" : result_signal}
         )
     
-    file_path, file_id = Data_Controller.generate_unique_filepath(
+    _, file_id = Data_Controller.generate_unique_filepath(
         orig_file_name = file.filename , project_id = project_id)
 
+    temp_file_path = Data_Controller.get_upload_temp_path()
+    file_hash = hashlib.sha256()
+
     try:
-        #open the uploaded file and load it in the dist using aiofile by the chunk size
-        async with aiofiles.open(file_path , "wb") as f:
+        #open the uploaded file and load it in the dist using aiofile by the chunk size,
+        #hashing it on the way so it can be stored by content
+        async with aiofiles.open(temp_file_path , "wb") as f:
             while chunk := await file.read(app_settings.FILE_DEFAULT_CHUNK_SIZE):
+                file_hash.update(chunk)
                 await f.write(chunk)
     except Exception as e:
-        logger(f"error while uploading file: {e}")
+        logger.error(f"error while uploading file: {e}")
+
+        if os.path.exists(temp_file_path):
+            os.remove(temp_file_path)
 
         return JSONResponse(
             status_code = status.HTTP_400_BAD_REQUEST,
             content = {"result_signal" : ResponseSignal.FILE_UPLOAD_FAILED.value}
         )
 
+    file_checksum = file_hash.hexdigest()
+    file_path, is_duplicate = Data_Controller.store_blob(
+        temp_file_path = temp_file_path, checksum = file_checksum)
+
     asset_resources = Asset(
         asset_project_id = project.id,
         asset_type = AssetTypeEnum.FILE.value,
         asset_name = file_id,
-        asset_size = os.path.getsize(file_path)
+        asset_size = os.path.getsize(file_path),
+        asset_checksum = file_checksum
     )
 
-    asset_model = await AssetModel.create_instance(request.app.db_client)
     asset_record = await asset_model.create_asset(asset = asset_resources)
 
     return JSONResponse(
@@ -66,13 +80,18 @@ async def upload_data( request: Request, project_id: str , file: UploadFile,
                        "file_id" : file_id, 
                        "project_id": str(project.id),
                        "asset_id" : str(asset_record.id),
+                       "checksum" : file_checksum,
+                       "is_duplicate" : is_duplicate,
                        }
         )
 
 @data_router.post("/process/{project_id}")
-async def process_endpoint(request: Request, project_id: str, process_request: ProcessRequest):
-    
-    project_model = await ProjectModel.create_instance( db_client = request.app.db_client )
+async def process_endpoint(request: Request, project_id: str, process_request: ProcessRequest,
+                           project_model: ProjectModel = Depends(get_project_model),
+                           asset_model: AssetModel = Depends(get_asset_model),
+                           chunk_model: ChunkModel = Depends(get_chunk_model),
+                           job_model: JobModel = Depends(get_job_model),
+                           nlp_controller: NLPController = Depends(get_nlp_controller)):
 
     project = await project_model.get_project_or_create_one(project_id)
 
@@ -80,88 +99,71 @@ async def process_endpoint(request: Request, project_id: str, process_request: P
     chunk_overlap = process_request.overlap_size
     chunk_reset = process_request.do_reset
 
-    asset_model = await AssetModel.create_instance(request.app.db_client)
-
-    project_files_ids = {}
-
-    if process_request.file_id:
+    ingestion_controller = IngestionController()
 
-        asset_record = await asset_model.get_asset_by_asset_name(
-            asset_project_id = project.id, asset_name = process_request.file_id)
+    project_assets = await ingestion_controller.get_project_assets(
+        project = project, asset_model = asset_model, file_id = process_request.file_id)
 
-        if asset_record is None:
-            return JSONResponse(
+    if project_assets is None:
+        return JSONResponse(
             status_code = status.HTTP_400_BAD_REQUEST,
             content = {"result_signal" : ResponseSignal.FILE_ID_ERROR.value}
         )
 
-        project_files_ids[asset_record.id] = process_request.file_id
-
-    else:
-        
-        project_assets = await asset_model.get_all_prject_assets(
-        asset_project_id = project.id, asset_type = AssetTypeEnum.FILE.value)
-
-        project_files_ids = {
-            record.id : record.asset_name
-            for record in project_assets
-        }
-        
-    
-    if len(project_files_ids) == 0:
+    if len(project_assets) == 0:
         return JSONResponse(
             status_code = status.HTTP_400_BAD_REQUEST,
             content = {"result_signal" : ResponseSignal.NO_FILES_ERROR.value}
         )
-    
-    chunk_model = await ChunkModel.create_instance(db_client = request.app.db_client)
-
-    if chunk_reset == 1:
-        _ = await chunk_model.delete_chunks_by_project_id(project.id)
-
-    process_controller = ProcessController(project_id)
 
-    no_records = 0
-    no_files = 0
+    if process_request.run_in_background == 1:
+
+        job = await job_model.create_job(Job(
+            job_project_id = project.id,
+            job_type = JobTypeEnum.PROCESS.value,
+            job_params = {
+                "project_id" : project_id,
+                "file_id" : process_request.file_id,
+                "chunk_size" : chunk_size,
+                "overlap_size" : chunk_overlap,
+                "do_reset" : chunk_reset,
+                "do_incremental" : process_request.do_incremental,
+            }
+        ))
 
-    for asset_id, file_id in project_files_ids.items():
-
-        file_content = process_controller.get_file_content(file_id)
-
-        if file_content is None:
-            logger.error(f"Error while processing file: {file_id}")
-            continue
-
-        file_chunks = process_controller.process_file_content(
-            file_content = file_content, chunk_size = chunk_size, chunk_overlap = chunk_overlap)
-        
-        if file_chunks is None or len(file_chunks) == 0:
-            return JSONResponse(
-                status_code = status.HTTP_400_BAD_REQUEST,
-                content = {"result_signal" : ResponseSignal.FILE_PROCESS_FAILED.value}
-            )
-        
-        file_chunks_records = [
-
-            DataChunk(
-                chunk_text = chunk.page_content,
-                chunk_metadata = chunk.metadata,
-                chunk_order = i+1,
-                chunk_project_id = project.id,
-                chunk_asset_id = asset_id,
-            )
-
-            for i, chunk in enumerate(file_chunks)
-        ]
+        return JSONResponse(
+            status_code = status.HTTP_202_ACCEPTED,
+            content = {
+                "result_signal" : ResponseSignal.JOB_ENQUEUED_SUCCESS.value,
+                "job_id" : str(job.id),
+            }
+        )
 
-        no_records += await chunk_model.insert_many_chunks(chunks = file_chunks_records)
-        no_files += 1
+    is_success, result_signal, result = await ingestion_controller.process_project_files(
+        project = project,
+        asset_model = asset_model,
+        chunk_model = chunk_model,
+        project_assets = project_assets,
+        chunk_size = chunk_size,
+        chunk_overlap = chunk_overlap,
+        do_reset = chunk_reset,
+        do_incremental = process_request.do_incremental,
+        nlp_controller = nlp_controller,
+        process_pool = request.app.process_pool
+    )
 
+    if not is_success:
+        return JSONResponse(
+            status_code = status.HTTP_400_BAD_REQUEST,
+            content = {"result_signal" : result_signal}
+        )
 
     return JSONResponse(
             content = {
-                "result_signal" : ResponseSignal.FILE_PROCESS_SUCCESS.value,
-                "inserted_chunks" : no_records,
-                "processed_files" : no_files,
+                "result_signal" : result_signal,
+                "inserted_chunks" : result["inserted_chunks"],
+                "processed_files" : result["processed_files"],
+                "reused_files" : result["reused_files"],
+                "skipped_files" : result["skipped_files"],
                 }
-        )
\ No newline at end of file
+        )
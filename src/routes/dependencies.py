@@ -0,0 +1,21 @@
+from fastapi import Request
+from models import ProjectModel, ChunkModel, AssetModel, JobModel
+from controllers import NLPController
+
+# the models and the NLP controller are created once in main.py startup,
+# routes receive them with Depends(...) instead of building them per request
+
+def get_project_model(request: Request) -> ProjectModel:
+    return request.app.project_model
+
+def get_chunk_model(request: Request) -> ChunkModel:
+    return request.app.chunk_model
+
+def get_asset_model(request: Request) -> AssetModel:
+    return request.app.asset_model
+
+def get_job_model(request: Request) -> JobModel:
+    return request.app.job_model
+
+def get_nlp_controller(request: Request) -> NLPController:
+    return request.app.nlp_controller
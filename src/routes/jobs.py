@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends, status, Request
+from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+from bson.objectid import ObjectId
+from models import JobModel
+from models.enums import ResponseSignal
+from routes.dependencies import get_job_model
+import logging
+
+logger = logging.getLogger("uvicorn.error")
+
+job_router = APIRouter(
+    prefix = "/api/v1/jobs",
+    tags = ["api_v1", "jobs"]
+)
+
+@job_router.get("/{job_id}")
+async def get_job_status(request: Request, job_id: str,
+                         job_model: JobModel = Depends(get_job_model)):
+
+    job = await job_model.get_job(job_id = job_id)
+
+    if job is None:
+        return JSONResponse(
+            status_code = status.HTTP_404_NOT_FOUND,
+            content = {"signal" : ResponseSignal.JOB_NOT_FOUND_ERROR.value}
+        )
+
+    return JSONResponse(
+            content = {
+                "signal" : ResponseSignal.JOB_RETRIEVED_SUCCESS.value,
+                "job" : jsonable_encoder(
+                    job.model_dump(by_alias = True),
+                    custom_encoder = {ObjectId : str}
+                ),
+            }
+        )
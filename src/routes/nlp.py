@@ -1,9 +1,12 @@
-from fastapi import FastAPI, APIRouter, status, Request
-from fastapi.responses import JSONResponse
-from routes.schemes import PushRequest, SearchRequest
-from models import ProjectModel, ChunkModel
-from controllers import NLPController
-from models.enums import ResponseSignal
+from fastapi import FastAPI, APIRouter, Depends, status, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from routes.schemes import PushRequest, SearchRequest, BatchSearchRequest
+from models import ProjectModel, ChunkModel, JobModel
+from models.db_schemes import Job
+from controllers import NLPController, IngestionController
+from models.enums import ResponseSignal, JobTypeEnum
+from routes.dependencies import get_project_model, get_chunk_model, get_job_model, get_nlp_controller
+import json
 import logging
 
 logging.getLogger("uvicorn.error")
@@ -14,16 +17,12 @@ nlp_router = APIRouter(
 )
 
 @nlp_router.post("/index/push/{project_id}")
-async def index_project(request: Request, project_id: str, push_request: PushRequest):
-    
-    project_model = await ProjectModel.create_instance(
-        db_client = request.app.db_client
-    )
-    
-    chunk_model = await ChunkModel.create_instance(
-        db_client = request.app.db_client
-        )
-    
+async def index_project(request: Request, project_id: str, push_request: PushRequest,
+                        project_model: ProjectModel = Depends(get_project_model),
+                        chunk_model: ChunkModel = Depends(get_chunk_model),
+                        job_model: JobModel = Depends(get_job_model),
+                        nlp_controller: NLPController = Depends(get_nlp_controller)):
+
     project = await project_model.get_project_or_create_one(project_id = project_id)
 
     if not project:
@@ -33,68 +32,76 @@ async def index_project(request: Request, project_id: str, push_request: PushReq
                 "signal" : ResponseSignal.PROJECT_NOT_FOUND_ERROR.value
             }
         )
-    
-    nlp_controller = NLPController(
-        vectordb_client = request.app.vectordb_client,
-        generation_client = request.app.generation_client,
-        embedding_client = request.app.embedding_client,
-        template_parser = request.app.template_parser
-        )
-    
-    page_no = 1
-    has_records = True
-    inserted_items_count = 0
-
-    while has_records:
 
-        page_chunks = await chunk_model.get_project_chunks(
-            project_id = project.id, page_no = page_no)
-        
-        if not page_chunks or len(page_chunks) == 0:
-            has_records = False
-            break
-        
-        page_no += 1
+    if push_request.run_in_background == 1:
 
-        is_inserted = nlp_controller.index_into_vector_db(
-            project = project,
-            chunks = page_chunks,
-            do_reset = push_request.do_reset,
-        )
+        job = await job_model.create_job(Job(
+            job_project_id = project.id,
+            job_type = JobTypeEnum.PUSH.value,
+            job_params = {
+                "project_id" : project_id,
+                "do_reset" : push_request.do_reset,
+                "do_pipeline" : push_request.do_pipeline,
+                "do_resume" : push_request.do_resume,
+            }
+        ))
 
-        if not is_inserted:
-            return JSONResponse(
-            status_code = status.HTTP_400_BAD_REQUEST,
+        return JSONResponse(
+            status_code = status.HTTP_202_ACCEPTED,
             content = {
-                "signal" : ResponseSignal.INSERT_INTO_VECTORDB_ERROR.value
+                "signal" : ResponseSignal.JOB_ENQUEUED_SUCCESS.value,
+                "job_id" : str(job.id),
             }
         )
 
-        inserted_items_count += len(page_chunks)
+    ingestion_controller = IngestionController()
 
-    return JSONResponse(
+    is_success, signal, result = await ingestion_controller.push_project_chunks(
+        project = project,
+        chunk_model = chunk_model,
+        nlp_controller = nlp_controller,
+        do_reset = push_request.do_reset,
+        do_pipeline = push_request.do_pipeline,
+        do_resume = push_request.do_resume,
+        project_model = project_model
+    )
+
+    if not is_success:
+        return JSONResponse(
+            status_code = status.HTTP_400_BAD_REQUEST,
             content = {
-                "signal" : ResponseSignal.INSERT_INTO_VECTORDB_SUCCESS.value,
-                "inserted_items_count" : inserted_items_count
+                "signal" : signal
             }
         )
 
+    content = {
+        "signal" : signal,
+        "inserted_items_count" : result["inserted_items_count"],
+        "resumed_items_count" : result["resumed_items_count"]
+    }
+
+    # per-stage queue depth and throughput of the pipelined push
+    if "pipeline" in result:
+        content["pipeline"] = result["pipeline"]
+
+    return JSONResponse(content = content)
+
 @nlp_router.get("/index/info/{project_id}")
-async def get_project_index_info(request: Request, project_id: str):
-    
-    project_model = await ProjectModel.create_instance(
-        db_client = request.app.db_client)
+async def get_project_index_info(request: Request, project_id: str,
+                                 project_model: ProjectModel = Depends(get_project_model),
+                                 nlp_controller: NLPController = Depends(get_nlp_controller)):
 
-    project = await project_model.get_project_or_create_one(project_id = project_id)
+    project = await project_model.get_project(project_id = project_id)
 
-    nlp_controller = NLPController(
-        vectordb_client = request.app.vectordb_client,
-        generation_client = request.app.generation_client,
-        embedding_client = request.app.embedding_client,
-        template_parser = request.app.template_parser
+    if project is None:
+        return JSONResponse(
+            status_code = status.HTTP_400_BAD_REQUEST,
+            content = {
+                "signal" : ResponseSignal.PROJECT_NOT_FOUND_ERROR.value
+            }
         )
-    
-    collection_info = nlp_controller.get_vector_db_collection_info(project)
+
+    collection_info = await nlp_controller.get_vector_db_collection_info(project)
 
     if not collection_info:
         return JSONResponse(
@@ -112,22 +119,21 @@ async def get_project_index_info(request: Request, project_id: str):
         )
 
 @nlp_router.post("/index/search/{project_id}")
-async def nlp_index_search(request: Request, project_id: str, search_request: SearchRequest):
-
-    project_model = await ProjectModel.create_instance(
-        db_client = request.app.db_client)
-
-    project = await project_model.get_project_or_create_one(project_id = project_id)
+async def nlp_index_search(request: Request, project_id: str, search_request: SearchRequest,
+                           project_model: ProjectModel = Depends(get_project_model),
+                           nlp_controller: NLPController = Depends(get_nlp_controller)):
 
+    project = await project_model.get_project(project_id = project_id)
 
-    nlp_controller = NLPController(
-        vectordb_client = request.app.vectordb_client,
-        generation_client = request.app.generation_client,
-        embedding_client = request.app.embedding_client,
-        template_parser = request.app.template_parser
+    if project is None:
+        return JSONResponse(
+            status_code = status.HTTP_400_BAD_REQUEST,
+            content = {
+                "signal" : ResponseSignal.PROJECT_NOT_FOUND_ERROR.value
+            }
         )
 
-    results = nlp_controller.search_vector_db_collection(
+    results = await nlp_controller.search_vector_db_collection(
         project = project,
         text = search_request.text,
         limit = search_request.limit
@@ -148,23 +154,71 @@ async def nlp_index_search(request: Request, project_id: str, search_request: Se
             }
         )
 
-@nlp_router.post("/index/answer/{project_id}")
-async def answer_rag(request: Request, project_id: str, search_request: SearchRequest):
+@nlp_router.post("/index/search/batch/{project_id}")
+async def nlp_index_search_batch(request: Request, project_id: str, search_request: BatchSearchRequest,
+                                 project_model: ProjectModel = Depends(get_project_model),
+                                 nlp_controller: NLPController = Depends(get_nlp_controller)):
 
-    project_model = await ProjectModel.create_instance(
-        db_client = request.app.db_client)
+    if len(search_request.texts) > nlp_controller.app_settings.SEARCH_BATCH_MAX_QUERIES:
+        return JSONResponse(
+            status_code = status.HTTP_400_BAD_REQUEST,
+            content = {
+                "signal" : ResponseSignal.VECTORDB_SEARCH_BATCH_TOO_LARGE.value
+            }
+        )
 
-    project = await project_model.get_project_or_create_one(project_id = project_id)
+    project = await project_model.get_project(project_id = project_id)
+
+    if project is None:
+        return JSONResponse(
+            status_code = status.HTTP_400_BAD_REQUEST,
+            content = {
+                "signal" : ResponseSignal.PROJECT_NOT_FOUND_ERROR.value
+            }
+        )
 
+    # one embedding call and one vector db request for all the queries
+    results = await nlp_controller.search_vector_db_collection_batch(
+        project = project,
+        texts = search_request.texts,
+        limit = search_request.limit
+    )
+
+    if not results:
+        return JSONResponse(
+            status_code = status.HTTP_400_BAD_REQUEST,
+            content = {
+                "signal" : ResponseSignal.VECTORDB_SEARCH_ERROR.value,
+            }
+        )
 
-    nlp_controller = NLPController(
-        vectordb_client = request.app.vectordb_client,
-        generation_client = request.app.generation_client,
-        embedding_client = request.app.embedding_client,
-        template_parser = request.app.template_parser
+    # results[i] holds the documents found for texts[i]
+    return JSONResponse(
+            content = {
+                "signal" : ResponseSignal.VECTORDB_SEARCH_SUCCESS.value,
+                "results" : [
+                    [res.dict() for res in documents]
+                    for documents in results
+                ],
+            }
         )
-    
-    answer, full_prompt, chat_history = nlp_controller.answer_rag_question(
+
+@nlp_router.post("/index/answer/{project_id}")
+async def answer_rag(request: Request, project_id: str, search_request: SearchRequest,
+                     project_model: ProjectModel = Depends(get_project_model),
+                     nlp_controller: NLPController = Depends(get_nlp_controller)):
+
+    project = await project_model.get_project(project_id = project_id)
+
+    if project is None:
+        return JSONResponse(
+            status_code = status.HTTP_400_BAD_REQUEST,
+            content = {
+                "signal" : ResponseSignal.PROJECT_NOT_FOUND_ERROR.value
+            }
+        )
+
+    answer, full_prompt, chat_history, is_cache_hit = await nlp_controller.answer_rag_question(
         project = project, query = search_request.text, limit = search_request.limit)
 
     if not answer:
@@ -180,6 +234,45 @@ async def answer_rag(request: Request, project_id: str, search_request: SearchRe
                 "signal" : ResponseSignal.RAG_ANSWER_SUCCESS.value,
                 "answer" : answer,
                 "full_prompt" : full_prompt,
-                "chat_history" : chat_history
+                "chat_history" : chat_history,
+                "cache_hit" : is_cache_hit
+            }
+        )
+
+@nlp_router.post("/index/answer/stream/{project_id}")
+async def answer_rag_stream(request: Request, project_id: str, search_request: SearchRequest,
+                            project_model: ProjectModel = Depends(get_project_model),
+                            nlp_controller: NLPController = Depends(get_nlp_controller)):
+
+    project = await project_model.get_project(project_id = project_id)
+
+    if project is None:
+        return JSONResponse(
+            status_code = status.HTTP_400_BAD_REQUEST,
+            content = {
+                "signal" : ResponseSignal.PROJECT_NOT_FOUND_ERROR.value
             }
         )
+
+    answer_cache_version = await nlp_controller.get_answer_cache_version(project = project)
+
+    # retrieval runs before the response starts, so its failure is still a plain 400
+    query_vector, retrieved_documents = await nlp_controller.retrieve_rag_documents(
+        project = project, query = search_request.text, limit = search_request.limit)
+
+    if not retrieved_documents:
+        return JSONResponse(
+            status_code = status.HTTP_400_BAD_REQUEST,
+            content = {
+                "signal" : ResponseSignal.RAG_ANSWER_ERROR.value,
+            }
+        )
+
+    # one JSON object per line (NDJSON): the documents, the tokens, then end or error
+    async def stream_lines():
+        async for event in nlp_controller.stream_rag_answer(
+            project = project, query = search_request.text, query_vector = query_vector,
+            retrieved_documents = retrieved_documents, answer_cache_version = answer_cache_version):
+            yield json.dumps(event, ensure_ascii = False) + "\n"
+
+    return StreamingResponse(stream_lines(), media_type = "application/x-ndjson")
@@ -1,2 +1,2 @@
 from .data import ProcessRequest
-from .nlp import PushRequest, SearchRequest
\ No newline at end of file
+from .nlp import PushRequest, SearchRequest, BatchSearchRequest
\ No newline at end of file
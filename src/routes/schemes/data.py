@@ -7,4 +7,6 @@ class ProcessRequest(BaseModel):
     chunk_size: Optional[int] = 100
     overlap_size: Optional[int] = 20
     do_reset: Optional[int] = 0
+    run_in_background: Optional[int] = 0
+    do_incremental: Optional[int] = 0
     
\ No newline at end of file
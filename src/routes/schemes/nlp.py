@@ -1,11 +1,19 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 class PushRequest(BaseModel):
 
     do_reset: Optional[int] = 0
+    run_in_background: Optional[int] = 0
+    do_pipeline: Optional[int] = 0
+    do_resume: Optional[int] = 0
 
 class SearchRequest(BaseModel):
 
     text: str
-    limit: Optional[int] = 5
\ No newline at end of file
+    limit: Optional[int] = 5
+
+class BatchSearchRequest(BaseModel):
+
+    texts: List[str]
+    limit: Optional[int] = 5
@@ -0,0 +1,148 @@
+from concurrent.futures import Executor
+from typing import Callable, List
+import asyncio
+import logging
+import time
+
+class EmbeddingBatcher:
+
+    # dynamic micro-batching for local models: single-text requests arriving together
+    # are collected for up to max_wait_ms (or until max_batch_size of them are waiting)
+    # and embedded with one batched call on the executor. while max_running_batches
+    # batches are running, new requests keep accumulating, so batches grow with load
+
+    def __init__(self, embed_batch: Callable[[List[str]], list], executor: Executor,
+                       max_batch_size: int = 32, max_wait_ms: float = 5.0,
+                       max_running_batches: int = 1):
+
+        # embed_batch is synchronous: a list of texts in, a list of vectors (or None) out
+        self.embed_batch = embed_batch
+        self.executor = executor
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_seconds = max_wait_ms / 1000
+        self.max_running_batches = max(1, max_running_batches)
+
+        # (text, future, enqueued_at) in arrival order
+        self.pending = []
+        self.timer = None
+        self.running_batches = 0
+        self.tasks = set()
+
+        self.stats = {
+            "requests" : 0,
+            "batches" : 0,
+            "items" : 0,
+            "errors" : 0,
+        }
+        self.wait_seconds = 0.0
+        # batch size bucket (next power of two) -> number of batches
+        self.batch_sizes = {}
+
+        self.logger = logging.getLogger(__name__)
+
+    async def embed(self, text: str):
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        self.pending.append((text, future, time.monotonic()))
+        self.stats["requests"] += 1
+
+        if len(self.pending) >= self.max_batch_size:
+            self.dispatch()
+        elif self.timer is None:
+            self.timer = loop.call_later(self.max_wait_seconds, self.on_timer)
+
+        return await future
+
+    def on_timer(self):
+
+        self.timer = None
+        self.dispatch()
+
+    def dispatch(self):
+
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+        while len(self.pending) > 0 and self.running_batches < self.max_running_batches:
+
+            batch = self.pending[:self.max_batch_size]
+            self.pending = self.pending[self.max_batch_size:]
+
+            self.running_batches += 1
+
+            task = asyncio.get_running_loop().create_task(self.run_batch(batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def run_batch(self, batch: list):
+
+        try:
+            # callers cancelled while waiting are dropped from the batch
+            batch = [ item for item in batch if not item[1].done() ]
+
+            if len(batch) == 0:
+                return
+
+            started_at = time.monotonic()
+            self.record_batch(batch = batch, started_at = started_at)
+
+            try:
+                vectors = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, self.embed_batch, [ text for text, _, _ in batch ]
+                )
+
+            except Exception as e:
+                self.logger.error(f"error while embedding a batch of {len(batch)} texts: {e}")
+                self.stats["errors"] += 1
+
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+            if not vectors or len(vectors) != len(batch):
+                self.stats["errors"] += 1
+                vectors = [None] * len(batch)
+
+            for (_, future, _), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+
+        finally:
+            self.running_batches -= 1
+
+            # requests that arrived while the executor was busy have waited long enough
+            if len(self.pending) > 0:
+                self.dispatch()
+
+    def record_batch(self, batch: list, started_at: float):
+
+        self.stats["batches"] += 1
+        self.stats["items"] += len(batch)
+        self.wait_seconds += sum(started_at - enqueued_at for _, _, enqueued_at in batch)
+
+        bucket = 1
+        while bucket < len(batch):
+            bucket *= 2
+
+        self.batch_sizes[bucket] = self.batch_sizes.get(bucket, 0) + 1
+
+    def get_stats(self):
+
+        batches = self.stats["batches"]
+        items = self.stats["items"]
+
+        return {
+            **self.stats,
+            "pending" : len(self.pending),
+            "avg_batch_size" : round(items / batches, 2) if batches > 0 else 0.0,
+            "avg_wait_ms" : round(1000 * self.wait_seconds / items, 3) if items > 0 else 0.0,
+            # {"<=1": n, "<=2": n, "<=4": n, ...}
+            "batch_size_histogram" : {
+                f"<={bucket}" : count
+                for bucket, count in sorted(self.batch_sizes.items())
+            },
+        }
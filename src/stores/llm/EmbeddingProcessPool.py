@@ -0,0 +1,164 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import resource_tracker, shared_memory
+from typing import List
+import logging
+import math
+import multiprocessing
+import numpy as np
+import sys
+import threading
+
+# state of a pool worker process, the model is loaded once by init_worker
+worker_model = None
+
+def init_worker(model_id: str, threads_per_worker: int):
+
+    global worker_model
+
+    # torch scales badly past a few intra-op threads, the pool scales with processes instead
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    torch.set_num_threads(threads_per_worker)
+    worker_model = SentenceTransformer(model_id, trust_remote_code = True, device = "cpu")
+
+def attach_shared_memory(name: str):
+
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name = name, track = False)
+
+    # before 3.13 attaching always registers the segment with the resource tracker.
+    # spawn workers share the parent's tracker, which already holds the name, so an
+    # unregister here would drop the parent's entry (and its cleanup if the parent
+    # dies); the register is skipped instead
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+
+    try:
+        return shared_memory.SharedMemory(name = name)
+    finally:
+        resource_tracker.register = register
+
+def embed_shard(texts: List[str], batch_size: int, shm_name: str, row_offset: int,
+                total_rows: int, embedding_size: int):
+
+    # the vectors are written straight into the caller's shared buffer, only the
+    # number of rows goes back through the pipe
+    embeddings = worker_model.encode(
+        sentences = texts,
+        batch_size = batch_size,
+        convert_to_numpy = True
+    )
+
+    if embeddings.shape != (len(texts), embedding_size):
+        raise ValueError(f"model returned {embeddings.shape}, expected ({len(texts)}, {embedding_size})")
+
+    shm = attach_shared_memory(shm_name)
+
+    try:
+        vectors = np.ndarray((total_rows, embedding_size), dtype = np.float32, buffer = shm.buf)
+        vectors[row_offset : row_offset + len(texts)] = embeddings
+        del vectors
+    finally:
+        shm.close()
+
+    return len(texts)
+
+class EmbeddingProcessPool:
+
+    # runs a SentenceTransformer model in `workers` processes (each loads it once) and
+    # shards every embed call across them
+
+    def __init__(self, model_id: str, embedding_size: int, workers: int,
+                       threads_per_worker: int = 1, min_shard_size: int = 8):
+
+        self.model_id = model_id
+        self.embedding_size = embedding_size
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker
+        self.min_shard_size = max(1, min_shard_size)
+
+        self.executor = self.create_executor()
+        self.executor_lock = threading.Lock()
+
+        self.logger = logging.getLogger(__name__)
+
+    def create_executor(self):
+
+        return ProcessPoolExecutor(
+            max_workers = self.workers,
+            mp_context = multiprocessing.get_context("spawn"),
+            initializer = init_worker,
+            initargs = (self.model_id, self.threads_per_worker)
+        )
+
+    def restart_executor(self, broken_executor: ProcessPoolExecutor):
+
+        # called from several threads when a worker dies, only the first one replaces the pool
+        with self.executor_lock:
+            if self.executor is broken_executor:
+                self.logger.warning("an embedding worker process died, restarting the process pool")
+                broken_executor.shutdown(wait = False, cancel_futures = True)
+                self.executor = self.create_executor()
+
+    def get_shards(self, count: int):
+
+        # (start, end) ranges, one per worker unless the shards would get too small
+        shards_count = max(1, min(self.workers, math.ceil(count / self.min_shard_size)))
+        shard_size = math.ceil(count / shards_count)
+
+        return [
+            (start, min(start + shard_size, count))
+            for start in range(0, count, shard_size)
+        ]
+
+    def embed_texts(self, texts: List[str], batch_size: int = 64):
+
+        executor = self.executor
+
+        try:
+            return self.embed_shards(executor = executor, texts = texts, batch_size = batch_size)
+
+        except BrokenProcessPool:
+            # a worker killed mid-call (e.g. out of memory) breaks the whole executor,
+            # it is replaced and the call retried once instead of failing every later call
+            self.restart_executor(broken_executor = executor)
+            return self.embed_shards(executor = self.executor, texts = texts, batch_size = batch_size)
+
+    def embed_shards(self, executor: ProcessPoolExecutor, texts: List[str], batch_size: int):
+
+        if len(texts) == 0:
+            return np.zeros((0, self.embedding_size), dtype = np.float32)
+
+        shm = shared_memory.SharedMemory(
+            create = True, size = len(texts) * self.embedding_size * np.dtype(np.float32).itemsize
+        )
+
+        try:
+            futures = [
+                executor.submit(
+                    embed_shard, texts[start:end], batch_size, shm.name,
+                    start, len(texts), self.embedding_size
+                )
+                for start, end in self.get_shards(len(texts))
+            ]
+
+            rows = sum(future.result() for future in futures)
+
+            if rows != len(texts):
+                raise ValueError(f"embedding pool returned {rows} vectors for {len(texts)} texts")
+
+            # copied out of the segment before it is released
+            shared_vectors = np.ndarray((len(texts), self.embedding_size), dtype = np.float32, buffer = shm.buf)
+            vectors = shared_vectors.copy()
+            del shared_vectors
+
+            return vectors
+
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def shutdown(self):
+        self.executor.shutdown(cancel_futures = True)
@@ -5,6 +5,7 @@ class LLMEnums(Enum):
     OPENAI = "OPENAI"
     COHERE = "COHERE"
     HUGGING_FACE = "HUGGING_FACE"
+    ONNX = "ONNX"
 
 class OpenAIEnums(Enum):
 
@@ -12,6 +13,8 @@ class OpenAIEnums(Enum):
     USER = "user"
     ASSISTANT = "assistant"
 
+    DEFAULT_TOKENIZER_ENCODING = "cl100k_base"
+
 class CohereEnums(Enum):
 
     SYSTEM = "system"
@@ -21,12 +24,27 @@ class CohereEnums(Enum):
     DOCUMENT = "search_document"
     QUERY = "search_query"
 
+    EMBED_MAX_BATCH_SIZE = 96
+
 class HuggingFaceEnums(Enum):
 
     SYSTEM = "system"
     USER = "user"
     ASSISTANT = "assistant"
 
+class OnnxEnums(Enum):
+
+    SYSTEM = "system"
+    USER = "user"
+    ASSISTANT = "assistant"
+
+    MEAN_POOLING = "mean"
+    CLS_POOLING = "cls"
+
+    MODEL_FILE = "model.onnx"
+    TOKENIZER_FILE = "tokenizer.json"
+    QUANTIZED_SUFFIX = "_quantized"
+
 class DocumentTypeEnum(Enum):
 
     DOCUMENT = "document"
@@ -19,6 +19,40 @@ class LLMInterface(ABC):
     def embed_text(self, text: str, document_type: str = None):
         pass
 
+    @abstractmethod
+    def embed_texts(self, texts: list, document_type: str = None, batch_size: int = None):
+        pass
+
+    # async variants, awaited from the API so a slow provider call does not block the event loop
+
+    @abstractmethod
+    async def generate_text_async(self, prompt: str, chat_history: list = [], max_output_token: int = None,
+                                        temperature: float = None):
+        pass
+
+    @abstractmethod
+    def generate_text_stream(self, prompt: str, chat_history: list = [], max_output_token: int = None,
+                                   temperature: float = None):
+        # an async generator yielding the generated text piece by piece, as it arrives
+        pass
+
+    @abstractmethod
+    async def embed_text_async(self, text: str, document_type: str = None):
+        pass
+
+    @abstractmethod
+    async def embed_texts_async(self, texts: list, document_type: str = None, batch_size: int = None):
+        pass
+
     @abstractmethod
     def construct_prompt(self, prompt: str, role: str):
         pass
+
+    @abstractmethod
+    def count_tokens(self, text: str):
+        # tokens the generation model sees for text, RAG prompts are packed to a token budget
+        pass
+
+    def estimate_tokens(self, text: str):
+        # roughly four characters per token, for when the model tokenizer is not available
+        return (len(text) + 3) // 4
@@ -1,36 +1,104 @@
 from .LLMEnums import LLMEnums
-from .providers import OpenAIProvider, CoHereProvider, HuggingFaceProvider
+import httpx
 
 class LLMProviderFactory:
 
     def __init__(self, config: dict):
         self.config = config
+        self.async_http_client = None
+        # providers owning local pools (threads, processes) that close() shuts down
+        self.local_providers = []
+
+    def get_async_http_client(self):
+
+        # one keep-alive connection pool shared by every async provider client of the process
+        if self.async_http_client is None:
+            self.async_http_client = httpx.AsyncClient(
+                limits = httpx.Limits(
+                    max_connections = self.config.LLM_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections = self.config.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS
+                ),
+                timeout = self.config.LLM_HTTP_TIMEOUT_SECONDS
+            )
+
+        return self.async_http_client
+
+    async def close(self):
+
+        if self.async_http_client is not None:
+            await self.async_http_client.aclose()
+            self.async_http_client = None
+
+        for provider in self.local_providers:
+            provider.close()
+
+        self.local_providers = []
 
     def create(self, provider):
 
         if provider == LLMEnums.OPENAI.value:
+            from .providers.OpenAIProvider import OpenAIProvider
+
             return OpenAIProvider(
                 api_key = self.config.OPENAI_API_KEY,
                 api_url = self.config.OPENAI_API_URL,
+                async_http_client = self.get_async_http_client(),
                 default_input_max_characters = self.config.INPUT_DEFAULT_MAX_CHARACTERS,
                 default_generation_max_output_tokens = self.config.GENERATION_DEFAULT_MAX_TOKENS,
-                default_generation_temperature = self.config.GENERATION_DEFAULT_TEMPERATURE
+                default_generation_temperature = self.config.GENERATION_DEFAULT_TEMPERATURE,
+                default_embedding_batch_size = self.config.EMBEDDING_DEFAULT_BATCH_SIZE
             )
 
         elif provider == LLMEnums.COHERE.value:
+            from .providers.CohereProvider import CoHereProvider
+
             return CoHereProvider(
                 api_key = self.config.COHERE_API_KEY,
+                async_http_client = self.get_async_http_client(),
                 default_input_max_characters = self.config.INPUT_DEFAULT_MAX_CHARACTERS,
                 default_generation_max_output_tokens = self.config.GENERATION_DEFAULT_MAX_TOKENS,
-                default_generation_temperature = self.config.GENERATION_DEFAULT_TEMPERATURE
+                default_generation_temperature = self.config.GENERATION_DEFAULT_TEMPERATURE,
+                default_embedding_batch_size = self.config.EMBEDDING_DEFAULT_BATCH_SIZE
             )
         
         elif provider == LLMEnums.HUGGING_FACE.value:
-            return HuggingFaceProvider(
+            from .providers.HUggingFaceProvider import HuggingFaceProvider
+
+            provider_client = HuggingFaceProvider(
+                thread_pool_workers = self.config.HUGGINGFACE_THREAD_POOL_WORKERS,
+                embed_batch_max_size = self.config.HUGGINGFACE_EMBED_BATCH_MAX_SIZE,
+                embed_batch_max_wait_ms = self.config.HUGGINGFACE_EMBED_BATCH_MAX_WAIT_MS,
+                embedding_process_workers = self.config.HUGGINGFACE_EMBEDDING_PROCESS_WORKERS,
+                embedding_threads_per_worker = self.config.HUGGINGFACE_EMBEDDING_THREADS_PER_WORKER,
+                default_input_max_characters = self.config.INPUT_DEFAULT_MAX_CHARACTERS,
+                default_generation_max_output_tokens = self.config.GENERATION_DEFAULT_MAX_TOKENS,
+                default_generation_temperature = self.config.GENERATION_DEFAULT_TEMPERATURE,
+                default_embedding_batch_size = self.config.EMBEDDING_DEFAULT_BATCH_SIZE
+            )
+
+            self.local_providers.append(provider_client)
+
+            return provider_client
+
+        elif provider == LLMEnums.ONNX.value:
+            from .providers.OnnxEmbeddingProvider import OnnxEmbeddingProvider
+
+            provider_client = OnnxEmbeddingProvider(
+                intra_op_threads = self.config.ONNX_INTRA_OP_THREADS,
+                quantize = self.config.ONNX_QUANTIZE,
+                max_sequence_length = self.config.ONNX_MAX_SEQUENCE_LENGTH,
+                thread_pool_workers = self.config.ONNX_THREAD_POOL_WORKERS,
+                embed_batch_max_size = self.config.HUGGINGFACE_EMBED_BATCH_MAX_SIZE,
+                embed_batch_max_wait_ms = self.config.HUGGINGFACE_EMBED_BATCH_MAX_WAIT_MS,
                 default_input_max_characters = self.config.INPUT_DEFAULT_MAX_CHARACTERS,
                 default_generation_max_output_tokens = self.config.GENERATION_DEFAULT_MAX_TOKENS,
-                default_generation_temperature = self.config.GENERATION_DEFAULT_TEMPERATURE
+                default_generation_temperature = self.config.GENERATION_DEFAULT_TEMPERATURE,
+                default_embedding_batch_size = self.config.EMBEDDING_DEFAULT_BATCH_SIZE
             )
 
+            self.local_providers.append(provider_client)
+
+            return provider_client
+
         else:
             return None
\ No newline at end of file
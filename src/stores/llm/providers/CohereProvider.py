@@ -1,4 +1,5 @@
 from ..LLMInterface import LLMInterface
+from cohere.manually_maintained.tokenizers import get_hf_tokenizer
 import cohere
 import logging
 from enum import Enum
@@ -7,23 +8,33 @@ from ..LLMEnums import CohereEnums, DocumentTypeEnum
 class CoHereProvider(LLMInterface):
 
     def __init__(self, api_key: str ,
+                       async_http_client = None,
                        default_input_max_characters: int = 1000,
                        default_generation_max_output_tokens: int = 1000,
-                       default_generation_temperature: float = 0.1):
+                       default_generation_temperature: float = 0.1,
+                       default_embedding_batch_size: int = 64):
 
         self.api_key = api_key
 
         self.default_input_max_characters = default_input_max_characters
         self.default_generation_max_output_tokens = default_generation_max_output_tokens
         self.default_generation_temperature = default_generation_temperature
+        self.default_embedding_batch_size = default_embedding_batch_size
 
         self.generation_model_id = None
+        self.tokenizer = None
 
         self.embedding_model_id = None
         self.embedding_size = None
 
         self.client = cohere.ClientV2(api_key = self.api_key)
 
+        # async_http_client is the connection pool shared with the other providers
+        self.async_client = cohere.AsyncClientV2(
+            api_key = self.api_key,
+            httpx_client = async_http_client
+        )
+
         self.enums = CohereEnums
         self.logger = logging.getLogger(__name__)
 
@@ -31,6 +42,13 @@ class CoHereProvider(LLMInterface):
 
         self.generation_model_id = model_id
 
+        # the SDK downloads the model tokenizer once, token counts then run locally
+        try:
+            self.tokenizer = get_hf_tokenizer(self.client, model_id)
+        except Exception as e:
+            self.tokenizer = None
+            self.logger.warning(f"Cohere tokenizer for {model_id} is not available, token counts are estimated: {e}")
+
     def set_embedding_model(self, model_id: str, embedding_size: int):
 
         self.embedding_model_id = model_id
@@ -96,8 +114,158 @@ class CoHereProvider(LLMInterface):
 
         return response.embeddings.float_[0]
 
+    def embed_texts(self, texts: list, document_type: str = None, batch_size: int = None):
+
+        if not self.client:
+            self.logger.error("CoHere client was not set")
+            return None
+        
+        if not self.embedding_model_id:
+            self.logger.error("embedding model for CoHere was not set")
+            return None
+        
+        input_type = self.enums.DOCUMENT.value if document_type == DocumentTypeEnum.DOCUMENT.value else self.enums.QUERY.value
+
+        # CoHere accepts at most 96 texts per embed call
+        batch_size = min(batch_size if batch_size else self.default_embedding_batch_size,
+                         self.enums.EMBED_MAX_BATCH_SIZE.value)
+
+        vectors = []
+
+        for i in range(0, len(texts), batch_size):
+
+            batch_texts = [ self.process_text(text) for text in texts[i : i + batch_size] ]
+
+            response = self.client.embed(
+                model = self.embedding_model_id,
+                input_type = input_type,
+                texts = batch_texts,
+                embedding_types = ["float"]
+            )
+
+            if not response or not response.embeddings or not response.embeddings.float_ \
+                or len(response.embeddings.float_) != len(batch_texts):
+                self.logger.error("Error while embedding texts batch with CoHere")
+                return None
+
+            vectors.extend(response.embeddings.float_)
+
+        return vectors
+
+    async def generate_text_async(self, prompt: str, chat_history: list = [], max_output_token: int = None,
+                                        temperature: float = None):
+
+        if not self.async_client:
+            self.logger.error("CoHere async client was not set")
+            return None
+        
+        if not self.generation_model_id:
+            self.logger.error("Gereration model for CoHere was not set")
+            return None
+        
+        max_output_token = max_output_token if max_output_token else self.default_generation_max_output_tokens
+        temperature = temperature if temperature else self.default_generation_temperature
+
+        chat_history.append(
+            self.construct_prompt(prompt = prompt, role = self.enums.USER.value)
+        )
+        
+        response = await self.async_client.chat(
+            model = self.generation_model_id,
+            messages = chat_history,
+            max_tokens = max_output_token,
+            temperature = temperature,
+            )
+        
+        if not response or not response.message or len(response.message.content) == 0 or not response.message.content[0].text:
+            self.logger.error("Error while generation text with CoHere")
+            return None
+
+        return response.message.content[0].text
+
+    async def generate_text_stream(self, prompt: str, chat_history: list = [], max_output_token: int = None,
+                                         temperature: float = None):
+
+        if not self.async_client:
+            self.logger.error("CoHere async client was not set")
+            return
+        
+        if not self.generation_model_id:
+            self.logger.error("Gereration model for CoHere was not set")
+            return
+        
+        max_output_token = max_output_token if max_output_token else self.default_generation_max_output_tokens
+        temperature = temperature if temperature else self.default_generation_temperature
+
+        chat_history.append(
+            self.construct_prompt(prompt = prompt, role = self.enums.USER.value)
+        )
+
+        async for event in self.async_client.chat_stream(
+            model = self.generation_model_id,
+            messages = chat_history,
+            max_tokens = max_output_token,
+            temperature = temperature,
+            ):
+
+            if event.type == "content-delta" and event.delta.message.content.text:
+                yield event.delta.message.content.text
+
+    async def embed_text_async(self, text: str, document_type: str = None):
+
+        vectors = await self.embed_texts_async(texts = [text], document_type = document_type)
+
+        if not vectors:
+            return None
+
+        return vectors[0]
+
+    async def embed_texts_async(self, texts: list, document_type: str = None, batch_size: int = None):
+
+        if not self.async_client:
+            self.logger.error("CoHere async client was not set")
+            return None
+        
+        if not self.embedding_model_id:
+            self.logger.error("embedding model for CoHere was not set")
+            return None
+        
+        input_type = self.enums.DOCUMENT.value if document_type == DocumentTypeEnum.DOCUMENT.value else self.enums.QUERY.value
+
+        batch_size = min(batch_size if batch_size else self.default_embedding_batch_size,
+                         self.enums.EMBED_MAX_BATCH_SIZE.value)
+
+        vectors = []
+
+        for i in range(0, len(texts), batch_size):
+
+            batch_texts = [ self.process_text(text) for text in texts[i : i + batch_size] ]
+
+            response = await self.async_client.embed(
+                model = self.embedding_model_id,
+                input_type = input_type,
+                texts = batch_texts,
+                embedding_types = ["float"]
+            )
+
+            if not response or not response.embeddings or not response.embeddings.float_ \
+                or len(response.embeddings.float_) != len(batch_texts):
+                self.logger.error("Error while embedding texts batch with CoHere")
+                return None
+
+            vectors.extend(response.embeddings.float_)
+
+        return vectors
+
     def construct_prompt(self, prompt: str, role: str):
         return {
             "role": role.value if isinstance(role, Enum) else role,
-            "content" : self.process_text(prompt)
-        }
\ No newline at end of file
+            "content" : prompt.strip()
+        }
+
+    def count_tokens(self, text: str):
+
+        if not self.tokenizer:
+            return self.estimate_tokens(text)
+
+        return len(self.tokenizer.encode(text, add_special_tokens = False).ids)
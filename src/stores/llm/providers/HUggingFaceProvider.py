@@ -3,18 +3,30 @@ from transformers import pipeline
 import logging
 from enum import Enum
 from ..LLMEnums import HuggingFaceEnums, DocumentTypeEnum
-from transformers import pipeline
+from ..EmbeddingBatcher import EmbeddingBatcher
+from ..EmbeddingProcessPool import EmbeddingProcessPool
+from transformers import pipeline, TextIteratorStreamer
 from sentence_transformers import SentenceTransformer
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import asyncio
 
 class HuggingFaceProvider(LLMInterface):
 
-    def __init__(self, default_input_max_characters: int = 1000,
+    def __init__(self, thread_pool_workers: int = 1,
+                       embed_batch_max_size: int = 32,
+                       embed_batch_max_wait_ms: float = 5.0,
+                       embedding_process_workers: int = 0,
+                       embedding_threads_per_worker: int = 1,
+                       default_input_max_characters: int = 1000,
                        default_generation_max_output_tokens: int = 1000,
-                       default_generation_temperature: float = 0.1):
+                       default_generation_temperature: float = 0.1,
+                       default_embedding_batch_size: int = 64):
 
         self.default_input_max_characters = default_input_max_characters
         self.default_generation_max_output_tokens = default_generation_max_output_tokens
         self.default_generation_temperature = default_generation_temperature
+        self.default_embedding_batch_size = default_embedding_batch_size
 
         self.generation_model_id = None
         self.embedding_model_id = None
@@ -23,6 +35,25 @@ class HuggingFaceProvider(LLMInterface):
         self.generation_pipeline = None
         self.sentence_transformer = None
 
+        # embedding_process_workers > 0 runs the embedding model in a pool of processes
+        # instead of this one
+        self.embedding_process_workers = embedding_process_workers
+        self.embedding_threads_per_worker = embedding_threads_per_worker
+        self.embedding_process_pool = None
+
+        # the models run in a bounded pool of threads for the async variants
+        self.executor = ThreadPoolExecutor(max_workers = thread_pool_workers,
+                                           thread_name_prefix = "huggingface")
+
+        # concurrent embed_text_async calls are encoded together
+        self.embedding_batcher = EmbeddingBatcher(
+            embed_batch = self.embed_texts,
+            executor = self.executor,
+            max_batch_size = embed_batch_max_size,
+            max_wait_ms = embed_batch_max_wait_ms,
+            max_running_batches = thread_pool_workers
+        )
+
         self.enums = HuggingFaceEnums
         self.logger = logging.getLogger(__name__)
 
@@ -34,7 +65,24 @@ class HuggingFaceProvider(LLMInterface):
         self.embedding_model_id = model_id
         self.embedding_size = embedding_size
 
-        self.sentence_transformer = SentenceTransformer(self.embedding_model_id, trust_remote_code=True)
+        if self.embedding_process_workers > 0:
+            self.embedding_process_pool = EmbeddingProcessPool(
+                model_id = self.embedding_model_id,
+                embedding_size = self.embedding_size,
+                workers = self.embedding_process_workers,
+                threads_per_worker = self.embedding_threads_per_worker
+            )
+        else:
+            self.sentence_transformer = SentenceTransformer(self.embedding_model_id, trust_remote_code=True)
+
+    def close(self):
+
+        # the embedding worker processes and the model threads end with the app
+        if self.embedding_process_pool:
+            self.embedding_process_pool.shutdown()
+            self.embedding_process_pool = None
+
+        self.executor.shutdown(wait = False, cancel_futures = True)
 
     def process_text(self, text):
         return text[:self.default_input_max_characters].strip()
@@ -72,6 +120,10 @@ class HuggingFaceProvider(LLMInterface):
 
     def embed_text(self, text: str, document_type: str = None):
 
+        if self.embedding_process_pool:
+            vectors = self.embed_texts(texts = [text], document_type = document_type)
+            return vectors[0] if vectors else None
+
         if not self.embedding_model_id or not self.sentence_transformer:
             self.logger.error("Embedding model id or sentence_transformer for Hugging Face was not set")
             return None
@@ -86,8 +138,109 @@ class HuggingFaceProvider(LLMInterface):
 
         return embedded_text.tolist()
 
+    def embed_texts(self, texts: list, document_type: str = None, batch_size: int = None):
+
+        if not self.embedding_model_id or not (self.sentence_transformer or self.embedding_process_pool):
+            self.logger.error("Embedding model id or sentence_transformer for Hugging Face was not set")
+            return None
+
+        batch_size = batch_size if batch_size else self.default_embedding_batch_size
+
+        if self.embedding_process_pool:
+            try:
+                return self.embedding_process_pool.embed_texts(texts = texts, batch_size = batch_size).tolist()
+            except Exception as e:
+                self.logger.error(f"Error while embedding texts batch with the Hugging Face process pool: {e}")
+                return None
+
+        embedded_texts = self.sentence_transformer.encode(
+            sentences = texts,
+            batch_size = batch_size,
+        )
+
+        if len(embedded_texts) != len(texts):
+            self.logger.error("Error while embedding texts batch with Hugging Face")
+            return None
+
+        return embedded_texts.tolist()
+
+    async def run_in_executor(self, function, **kwargs):
+
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, partial(function, **kwargs)
+        )
+
+    async def generate_text_async(self, prompt: str, chat_history: list = [], max_output_token: int = None,
+                                        temperature: float = None):
+
+        return await self.run_in_executor(
+            self.generate_text, prompt = prompt, chat_history = chat_history,
+            max_output_token = max_output_token, temperature = temperature
+        )
+
+    async def generate_text_stream(self, prompt: str, chat_history: list = [], max_output_token: int = None,
+                                         temperature: float = None):
+
+        if not self.generation_model_id or not self.generation_pipeline:
+            self.logger.error("Generation model or pipeline for Hugging Face was not set")
+            return
+
+        max_output_token = max_output_token if max_output_token else self.default_generation_max_output_tokens
+        temperature = temperature if temperature else self.default_generation_temperature
+
+        chat_history.append(
+            self.construct_prompt(prompt=prompt, role=self.enums.USER.value)
+        )
+
+        streamer = TextIteratorStreamer(self.generation_pipeline.tokenizer,
+                                        skip_prompt=True, skip_special_tokens=True)
+
+        def generate():
+            try:
+                return self.generation_pipeline(
+                    chat_history,
+                    max_length=max_output_token,
+                    temperature=temperature,
+                    return_full_text=False,
+                    streamer=streamer
+                )
+            finally:
+                # unblock the reader even when generation fails before its first token
+                streamer.end()
+
+        loop = asyncio.get_running_loop()
+        generation = loop.run_in_executor(self.executor, generate)
+
+        # the streamer blocks between tokens, so it is read from the default pool
+        # instead of the model threads that may all be busy generating
+        while True:
+            text = await loop.run_in_executor(None, next, streamer, None)
+            if text is None:
+                break
+            if text:
+                yield text
+
+        _ = await generation
+
+    async def embed_text_async(self, text: str, document_type: str = None):
+
+        return await self.embedding_batcher.embed(text)
+
+    async def embed_texts_async(self, texts: list, document_type: str = None, batch_size: int = None):
+
+        return await self.run_in_executor(
+            self.embed_texts, texts = texts, document_type = document_type, batch_size = batch_size
+        )
+
     def construct_prompt(self, prompt: str, role: str):
         return {
             "role": role.value if isinstance(role, Enum) else role,
-            "content": self.process_text(prompt)
-        }
\ No newline at end of file
+            "content": prompt.strip()
+        }
+
+    def count_tokens(self, text: str):
+
+        if not self.generation_pipeline:
+            return self.estimate_tokens(text)
+
+        return len(self.generation_pipeline.tokenizer.encode(text, add_special_tokens = False))
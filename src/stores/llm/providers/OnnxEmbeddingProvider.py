@@ -0,0 +1,301 @@
+from ..LLMInterface import LLMInterface
+from ..LLMEnums import OnnxEnums
+from ..EmbeddingBatcher import EmbeddingBatcher
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from tokenizers import Tokenizer
+import onnxruntime
+import numpy as np
+import asyncio
+import json
+import logging
+import os
+import uuid
+
+class OnnxEmbeddingProvider(LLMInterface):
+
+    # embedding only backend for CPU nodes: runs a sentence-transformers model exported
+    # to ONNX (see export_onnx_model), dynamically quantized to int8, with onnxruntime.
+    # the embedding model id is the directory holding model.onnx and tokenizer.json
+
+    def __init__(self, intra_op_threads: int = 4, quantize: bool = True,
+                       max_sequence_length: int = 256,
+                       thread_pool_workers: int = 1,
+                       embed_batch_max_size: int = 32,
+                       embed_batch_max_wait_ms: float = 5.0,
+                       default_input_max_characters: int = 1000,
+                       default_generation_max_output_tokens: int = 1000,
+                       default_generation_temperature: float = 0.1,
+                       default_embedding_batch_size: int = 64):
+
+        self.intra_op_threads = intra_op_threads
+        self.quantize = quantize
+        self.max_sequence_length = max_sequence_length
+
+        self.default_input_max_characters = default_input_max_characters
+        self.default_generation_max_output_tokens = default_generation_max_output_tokens
+        self.default_generation_temperature = default_generation_temperature
+        self.default_embedding_batch_size = default_embedding_batch_size
+
+        self.generation_model_id = None
+        self.embedding_model_id = None
+        self.embedding_size = None
+
+        # loaded once in set_embedding_model and shared by every call
+        self.session = None
+        self.session_input_names = None
+        self.tokenizer = None
+        self.pooling_mode = OnnxEnums.MEAN_POOLING.value
+        self.normalize_embeddings = False
+
+        self.executor = ThreadPoolExecutor(max_workers = thread_pool_workers,
+                                           thread_name_prefix = "onnx")
+
+        # concurrent embed_text_async calls run as one batch
+        self.embedding_batcher = EmbeddingBatcher(
+            embed_batch = self.embed_texts,
+            executor = self.executor,
+            max_batch_size = embed_batch_max_size,
+            max_wait_ms = embed_batch_max_wait_ms,
+            max_running_batches = thread_pool_workers
+        )
+
+        self.enums = OnnxEnums
+        self.logger = logging.getLogger(__name__)
+
+    def set_generation_model(self, model_id: str):
+        self.logger.error("ONNX backend supports embeddings only, set another GENERATION_BACKEND")
+
+    def set_embedding_model(self, model_id: str, embedding_size: int):
+
+        self.embedding_model_id = model_id
+        self.embedding_size = embedding_size
+
+        model_path = os.path.join(model_id, OnnxEnums.MODEL_FILE.value)
+
+        if self.quantize:
+            model_path = self.get_quantized_model(model_path)
+
+        session_options = onnxruntime.SessionOptions()
+        session_options.intra_op_num_threads = self.intra_op_threads
+        session_options.inter_op_num_threads = 1
+
+        self.session = onnxruntime.InferenceSession(
+            model_path,
+            sess_options = session_options,
+            providers = ["CPUExecutionProvider"]
+        )
+        self.session_input_names = { session_input.name for session_input in self.session.get_inputs() }
+
+        self.load_tokenizer(model_id)
+        self.load_pooling_config(model_id)
+
+    def get_quantized_model(self, model_path: str):
+
+        # quantized once next to the exported model, later loads reuse the file
+        model_base_path, model_extension = os.path.splitext(model_path)
+        quantized_model_path = model_base_path + OnnxEnums.QUANTIZED_SUFFIX.value + model_extension
+
+        if not os.path.exists(quantized_model_path):
+
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+
+            # written aside and moved into place, so a process starting at the same
+            # time never loads a half written model
+            temp_model_path = f"{model_base_path}.{uuid.uuid4().hex}.tmp{model_extension}"
+
+            self.logger.info(f"quantizing {model_path} to int8")
+
+            try:
+                quantize_dynamic(
+                    model_input = model_path,
+                    model_output = temp_model_path,
+                    weight_type = QuantType.QInt8
+                )
+                os.replace(temp_model_path, quantized_model_path)
+
+            finally:
+                if os.path.exists(temp_model_path):
+                    os.remove(temp_model_path)
+
+        return quantized_model_path
+
+    def read_json(self, file_path: str):
+
+        if not os.path.exists(file_path):
+            return {}
+
+        with open(file_path) as f:
+            return json.load(f)
+
+    def load_tokenizer(self, model_id: str):
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_id, OnnxEnums.TOKENIZER_FILE.value))
+
+        # truncate where the sentence-transformers model does, never above max_sequence_length
+        model_max_length = self.read_json(os.path.join(model_id, "sentence_bert_config.json")).get("max_seq_length")
+        max_length = min(model_max_length, self.max_sequence_length) if model_max_length else self.max_sequence_length
+
+        self.tokenizer.enable_truncation(max_length = max_length)
+
+        pad_token = self.read_json(os.path.join(model_id, "tokenizer_config.json")).get("pad_token")
+        pad_token = pad_token.get("content") if isinstance(pad_token, dict) else pad_token
+
+        if pad_token and self.tokenizer.token_to_id(pad_token) is not None:
+            self.tokenizer.enable_padding(pad_id = self.tokenizer.token_to_id(pad_token), pad_token = pad_token)
+        else:
+            self.tokenizer.enable_padding()
+
+    def load_pooling_config(self, model_id: str):
+
+        # same pooling and normalization as the sentence-transformers model it was exported from
+        pooling_config = self.read_json(os.path.join(model_id, "1_Pooling", "config.json"))
+
+        if pooling_config.get("pooling_mode_cls_token"):
+            self.pooling_mode = OnnxEnums.CLS_POOLING.value
+        else:
+            self.pooling_mode = OnnxEnums.MEAN_POOLING.value
+
+        modules = self.read_json(os.path.join(model_id, "modules.json"))
+
+        self.normalize_embeddings = any(
+            module.get("type", "").endswith("Normalize") for module in modules
+        )
+
+    def close(self):
+        self.executor.shutdown(wait = False, cancel_futures = True)
+
+    def process_text(self, text):
+        return text[:self.default_input_max_characters].strip()
+
+    def generate_text(self, prompt: str, chat_history: list = [], max_output_token: int = None,
+                            temperature: float = None):
+        self.logger.error("ONNX backend supports embeddings only")
+        return None
+
+    def encode(self, texts: list):
+
+        encodings = self.tokenizer.encode_batch(texts)
+
+        inputs = {
+            "input_ids" : np.array([encoding.ids for encoding in encodings], dtype = np.int64),
+            "attention_mask" : np.array([encoding.attention_mask for encoding in encodings], dtype = np.int64),
+            "token_type_ids" : np.array([encoding.type_ids for encoding in encodings], dtype = np.int64),
+        }
+
+        token_embeddings = self.session.run(
+            None, { name : value for name, value in inputs.items() if name in self.session_input_names }
+        )[0]
+
+        if self.pooling_mode == OnnxEnums.CLS_POOLING.value:
+            embeddings = token_embeddings[:, 0]
+        else:
+            mask = inputs["attention_mask"][:, :, None].astype(token_embeddings.dtype)
+            embeddings = (token_embeddings * mask).sum(axis = 1) / np.clip(mask.sum(axis = 1), 1e-9, None)
+
+        if self.normalize_embeddings:
+            embeddings = embeddings / np.clip(np.linalg.norm(embeddings, axis = 1, keepdims = True), 1e-12, None)
+
+        return embeddings
+
+    def embed_text(self, text: str, document_type: str = None):
+
+        vectors = self.embed_texts(texts = [text], document_type = document_type)
+
+        if not vectors:
+            return None
+
+        return vectors[0]
+
+    def embed_texts(self, texts: list, document_type: str = None, batch_size: int = None):
+
+        if not self.embedding_model_id or not self.session:
+            self.logger.error("Embedding model for ONNX was not set")
+            return None
+
+        batch_size = batch_size if batch_size else self.default_embedding_batch_size
+
+        vectors = []
+
+        for i in range(0, len(texts), batch_size):
+
+            embeddings = self.encode([ self.process_text(text) for text in texts[i : i + batch_size] ])
+
+            if self.embedding_size and embeddings.shape[1] != self.embedding_size:
+                self.logger.error(f"ONNX model returns {embeddings.shape[1]} dimensions, "
+                                  f"EMBEDDING_MODEL_SIZE is {self.embedding_size}")
+                return None
+
+            vectors.extend(embeddings.tolist())
+
+        return vectors
+
+    async def run_in_executor(self, function, **kwargs):
+
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, partial(function, **kwargs)
+        )
+
+    async def generate_text_async(self, prompt: str, chat_history: list = [], max_output_token: int = None,
+                                        temperature: float = None):
+        return self.generate_text(prompt = prompt, chat_history = chat_history)
+
+    async def generate_text_stream(self, prompt: str, chat_history: list = [], max_output_token: int = None,
+                                         temperature: float = None):
+        self.logger.error("ONNX backend supports embeddings only")
+        return
+        # unreachable, makes this function an async generator that yields nothing
+        yield
+
+    async def embed_text_async(self, text: str, document_type: str = None):
+
+        return await self.embedding_batcher.embed(text)
+
+    async def embed_texts_async(self, texts: list, document_type: str = None, batch_size: int = None):
+
+        return await self.run_in_executor(
+            self.embed_texts, texts = texts, document_type = document_type, batch_size = batch_size
+        )
+
+    def construct_prompt(self, prompt: str, role: str):
+        return {
+            "role": role,
+            "content": prompt
+        }
+
+    def count_tokens(self, text: str):
+        # no generation model here, the embedding tokenizer says nothing about its token counts
+        return self.estimate_tokens(text)
+
+def export_onnx_model(model_id: str, output_dir: str, opset_version: int = 17):
+
+    # one time export of a sentence-transformers model for this backend, needs torch and
+    # sentence-transformers (the serving nodes only need onnxruntime and tokenizers)
+    from sentence_transformers import SentenceTransformer
+    import torch
+
+    model = SentenceTransformer(model_id, device = "cpu")
+    transformer = model[0]
+
+    # modules.json, 1_Pooling/config.json and the tokenizer files
+    model.save(output_dir)
+
+    dummy = transformer.tokenizer(["export"], return_tensors = "pt")
+    input_names = [ name for name in ("input_ids", "attention_mask", "token_type_ids") if name in dummy ]
+    dynamic_axes = { name : { 0 : "batch", 1 : "sequence" } for name in input_names }
+    dynamic_axes["last_hidden_state"] = { 0 : "batch", 1 : "sequence" }
+
+    transformer.auto_model.eval()
+
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer.auto_model,
+            args = tuple(dummy[name] for name in input_names),
+            f = os.path.join(output_dir, OnnxEnums.MODEL_FILE.value),
+            input_names = input_names,
+            output_names = ["last_hidden_state"],
+            dynamic_axes = dynamic_axes,
+            opset_version = opset_version
+        )
+
+    return output_dir
@@ -1,15 +1,18 @@
 from ..LLMInterface import LLMInterface
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 import logging
+import tiktoken
 from enum import Enum
 from ..LLMEnums import OpenAIEnums
 
 class OpenAIProvider(LLMInterface):
     
     def __init__(self, api_key: str, api_url: str = None,
+                       async_http_client = None,
                        default_input_max_characters: int = 1000,
                        default_generation_max_output_tokens: int = 1000,
-                       default_generation_temperature: float = 0.1):
+                       default_generation_temperature: float = 0.1,
+                       default_embedding_batch_size: int = 64):
         
         self.api_key = api_key
         self.api_url = api_url
@@ -17,8 +20,10 @@ class OpenAIProvider(LLMInterface):
         self.default_input_max_characters = default_input_max_characters
         self.default_generation_max_output_tokens = default_generation_max_output_tokens
         self.default_generation_temperature = default_generation_temperature
+        self.default_embedding_batch_size = default_embedding_batch_size
 
         self.generation_model_id = None
+        self.tokenizer = None
 
         self.embedding_model_id = None
         self.embedding_size = None
@@ -28,13 +33,37 @@ class OpenAIProvider(LLMInterface):
             base_url = self.api_url if self.api_url and len(self.api_url) else None
         )
 
+        # async_http_client is the connection pool shared with the other providers
+        self.async_client = AsyncOpenAI(
+            api_key = self.api_key,
+            base_url = self.api_url if self.api_url and len(self.api_url) else None,
+            http_client = async_http_client
+        )
+
         self.enums = OpenAIEnums
         self.logger = logging.getLogger(__name__)
 
     def set_generation_model(self, model_id: str):
         
         self.generation_model_id = model_id
-        
+        self.tokenizer = self.get_tokenizer(model_id)
+
+    def get_tokenizer(self, model_id: str):
+
+        # models served behind OPENAI_API_URL are often unknown to tiktoken,
+        # their token counts are close enough with the default encoding
+        try:
+            encoding_name = tiktoken.encoding_name_for_model(model_id)
+        except KeyError:
+            encoding_name = OpenAIEnums.DEFAULT_TOKENIZER_ENCODING.value
+
+        # the encoding is downloaded on first use, then cached by tiktoken
+        try:
+            return tiktoken.get_encoding(encoding_name)
+        except Exception as e:
+            self.logger.warning(f"tiktoken encoding {encoding_name} is not available, token counts are estimated: {e}")
+            return None
+
     def set_embedding_model(self, model_id: str, embedding_size: int):
         
         self.embedding_model_id = model_id
@@ -95,10 +124,156 @@ class OpenAIProvider(LLMInterface):
             return None
         
         return response.data[0].embedding
+
+    def embed_texts(self, texts: list, document_type: str = None, batch_size: int = None):
+
+        if not self.client:
+            self.logger.error("OpenAI client was not set")
+            return None
+        
+        if not self.embedding_model_id:
+            self.logger.error("Embedding model for OpenAI was not set")
+            return None
+
+        batch_size = batch_size if batch_size else self.default_embedding_batch_size
+
+        vectors = []
+
+        for i in range(0, len(texts), batch_size):
+
+            batch_texts = [ self.process_text(text) for text in texts[i : i + batch_size] ]
+
+            response = self.client.embeddings.create(
+                model = self.embedding_model_id,
+                input = batch_texts
+            )
+
+            if not response or not response.data or len(response.data) != len(batch_texts):
+                self.logger.error("Error while embedding texts batch with OpenAI")
+                return None
+
+            # the API may return embeddings out of order, so sort them by input index
+            vectors.extend([
+                record.embedding
+                for record in sorted(response.data, key = lambda record: record.index)
+            ])
+
+        return vectors
+    
+    async def generate_text_async(self, prompt: str, chat_history: list = [], max_output_token: int = None,
+                                        temperature: float = None):
+
+        if not self.async_client:
+            self.logger.error("OpenAI async client was not set")
+            return None
+        
+        if not self.generation_model_id:
+            self.logger.error("Gereration model for OpenAI was not set")
+            return None
+
+        max_output_token = max_output_token if max_output_token else self.default_generation_max_output_tokens
+        temperature = temperature if temperature else self.default_generation_temperature
+
+        chat_history.append(
+            self.construct_prompt(prompt = prompt, role = self.enums.USER.value)
+        )
+
+        response = await self.async_client.chat.completions.create(
+            model = self.generation_model_id,
+            messages = chat_history,
+            max_tokens = max_output_token,
+            temperature = temperature
+        )
+
+        if not response or not response.choices or len(response.choices) == 0 or not response.choices[0].message:
+            self.logger.error("Error while generation text with OpenAI")
+            return None
+        
+        return response.choices[0].message.content
+
+    async def generate_text_stream(self, prompt: str, chat_history: list = [], max_output_token: int = None,
+                                         temperature: float = None):
+
+        if not self.async_client:
+            self.logger.error("OpenAI async client was not set")
+            return
+        
+        if not self.generation_model_id:
+            self.logger.error("Gereration model for OpenAI was not set")
+            return
+
+        max_output_token = max_output_token if max_output_token else self.default_generation_max_output_tokens
+        temperature = temperature if temperature else self.default_generation_temperature
+
+        chat_history.append(
+            self.construct_prompt(prompt = prompt, role = self.enums.USER.value)
+        )
+
+        stream = await self.async_client.chat.completions.create(
+            model = self.generation_model_id,
+            messages = chat_history,
+            max_tokens = max_output_token,
+            temperature = temperature,
+            stream = True
+        )
+
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def embed_text_async(self, text: str, document_type: str = None):
+
+        vectors = await self.embed_texts_async(texts = [text], document_type = document_type)
+
+        if not vectors:
+            return None
+
+        return vectors[0]
+
+    async def embed_texts_async(self, texts: list, document_type: str = None, batch_size: int = None):
+
+        if not self.async_client:
+            self.logger.error("OpenAI async client was not set")
+            return None
+        
+        if not self.embedding_model_id:
+            self.logger.error("Embedding model for OpenAI was not set")
+            return None
+
+        batch_size = batch_size if batch_size else self.default_embedding_batch_size
+
+        vectors = []
+
+        for i in range(0, len(texts), batch_size):
+
+            batch_texts = [ self.process_text(text) for text in texts[i : i + batch_size] ]
+
+            response = await self.async_client.embeddings.create(
+                model = self.embedding_model_id,
+                input = batch_texts
+            )
+
+            if not response or not response.data or len(response.data) != len(batch_texts):
+                self.logger.error("Error while embedding texts batch with OpenAI")
+                return None
+
+            vectors.extend([
+                record.embedding
+                for record in sorted(response.data, key = lambda record: record.index)
+            ])
+
+        return vectors
     
     def construct_prompt(self, prompt: str, role: str):
         
         return {
             "role": role.value if isinstance(role, Enum) else role,
-            "content" : self.process_text(prompt)
-        }
\ No newline at end of file
+            "content" : prompt.strip()
+        }
+
+    def count_tokens(self, text: str):
+
+        if not self.tokenizer:
+            return self.estimate_tokens(text)
+
+        return len(self.tokenizer.encode(text, disallowed_special = ()))
@@ -1,3 +1,27 @@
-from .OpenAIProvider import OpenAIProvider
-from .CohereProvider import CoHereProvider
-from .HUggingFaceProvider import HuggingFaceProvider
\ No newline at end of file
+import importlib
+
+# a provider module is imported the first time its class is used, so only the
+# selected backend's SDK is loaded (HuggingFaceProvider pulls in torch / transformers)
+PROVIDER_MODULES = {
+    "OpenAIProvider" : ".OpenAIProvider",
+    "CoHereProvider" : ".CohereProvider",
+    "HuggingFaceProvider" : ".HUggingFaceProvider",
+    "OnnxEmbeddingProvider" : ".OnnxEmbeddingProvider",
+}
+
+__all__ = list(PROVIDER_MODULES.keys())
+
+def __getattr__(name: str):
+
+    if name not in PROVIDER_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module = importlib.import_module(PROVIDER_MODULES[name], __name__)
+
+    # the submodule has the same name as its class and the import binds the module
+    # here, so the class replaces it. once a submodule is imported directly this hook
+    # is not reached anymore and the name stays the module; the factories import the
+    # classes from their submodules for that reason
+    globals()[name] = getattr(module, name)
+
+    return globals()[name]
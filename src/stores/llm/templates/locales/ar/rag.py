@@ -31,6 +31,7 @@ footer_prompt = Template(
     "\n".join([
         "بناءً فقط على الوثائق المذكورة أعلاه، يرجى توليد إجابة للمستخدم.",
         "# السؤال",
+        "$query",
         "",
         "## الإجابة:"
 
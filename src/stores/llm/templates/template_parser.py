@@ -1,51 +1,224 @@
+from string import Template
+import importlib
+import logging
 import os
+import time
+
+class CompiledTemplate:
+
+    # a string.Template split once into literal and variable parts, rendering is a
+    # single join instead of a regex substitution on every call
+
+    def __init__(self, template: Template):
+
+        self.template = template
+        self.parts = []
+        self.identifiers = []
+
+        text = template.template
+        literal = []
+        last_end = 0
+
+        for match in template.pattern.finditer(text):
+
+            literal.append(text[last_end : match.start()])
+            last_end = match.end()
+
+            if match.group("escaped") is not None:
+                literal.append(template.delimiter)
+                continue
+
+            name = match.group("named") or match.group("braced")
+
+            if name is None:
+                raise ValueError(f"invalid placeholder at position {match.start()} in template")
+
+            self.parts.append((False, "".join(literal)))
+            self.parts.append((True, name))
+            self.identifiers.append(name)
+            literal = []
+
+        literal.append(text[last_end:])
+        self.parts.append((False, "".join(literal)))
+
+        # drop empty literals so render only joins what it needs
+        self.parts = [(is_var, value) for is_var, value in self.parts if is_var or value]
+
+    def render(self, vars: dict = {}):
+
+        # same contract as Template.substitute: a missing variable raises KeyError
+        return "".join([
+            str(vars[value]) if is_var else value
+            for is_var, value in self.parts
+        ])
 
 class TemplateParser:
 
-    def __init__(self, language: str = None, default_language: str = "en"):
-        
+    def __init__(self, language: str = None, default_language: str = "en",
+                       hot_reload: bool = False, reload_interval: float = 1.0):
+
         self.current_path = os.path.dirname(__file__)
+        self.locales_path = os.path.join(self.current_path, "locales")
         self.default_language = default_language
         self.language = None
 
+        # development only: reload the locale files when one of them changes
+        self.hot_reload = hot_reload
+        self.reload_interval = reload_interval
+        self.last_reload_check = 0.0
+        self.files_mtimes = {}
+
+        self.logger = logging.getLogger(__name__)
+
+        # {language: {group: {key: CompiledTemplate}}} of every locale file, and
+        # {(group, key): CompiledTemplate} resolved for the current language
+        self.locales = {}
+        self.templates = {}
+
+        self.load_templates()
         self.set_language(language = language)
 
-    def set_language(self, language: str):
-        
-        if not language:
-            self.language = self.default_language
+    def get_locale_files(self):
 
-        language_path = os.path.join(self.current_path , "locales", language)
+        locale_files = {}
 
-        if os.path.exists(language_path):
-            self.language = language
+        for language in sorted(os.listdir(self.locales_path)):
+
+            language_path = os.path.join(self.locales_path, language)
+            if not os.path.isdir(language_path) or language.startswith("__"):
+                continue
+
+            for file_name in sorted(os.listdir(language_path)):
+                if file_name.endswith(".py") and not file_name.startswith("__"):
+                    locale_files[(language, file_name[:-3])] = os.path.join(language_path, file_name)
+
+        return locale_files
+
+    def load_templates(self):
+
+        locale_files = self.get_locale_files()
+        locales = {}
+
+        for (language, group), file_path in locale_files.items():
+
+            module_name = f"stores.llm.templates.locales.{language}.{group}"
+            module = importlib.import_module(module_name)
+
+            if self.files_mtimes.get(file_path) is not None:
+                module = importlib.reload(module)
+
+            locales.setdefault(language, {})[group] = {
+                key : CompiledTemplate(value)
+                for key, value in vars(module).items()
+                if isinstance(value, Template)
+            }
+
+        self.files_mtimes = {
+            file_path : os.path.getmtime(file_path)
+            for file_path in locale_files.values()
+        }
 
+        self.validate_templates(locales)
+        self.locales = locales
+
+        if self.language:
+            self.resolve_templates()
+
+    def validate_templates(self, locales: dict):
+
+        # every translation should define the default language keys with the same variables
+        default_groups = locales.get(self.default_language, {})
+
+        for language, groups in locales.items():
+
+            if language == self.default_language:
+                continue
+
+            for group, default_templates in default_groups.items():
+                for key, default_template in default_templates.items():
+
+                    template = groups.get(group, {}).get(key)
+
+                    if template is None:
+                        self.logger.warning(f"template {group}.{key} is missing for '{language}', "
+                                            f"'{self.default_language}' is used")
+
+                    elif set(template.identifiers) != set(default_template.identifiers):
+                        self.logger.warning(f"template {group}.{key} for '{language}' uses "
+                                            f"{sorted(template.identifiers)} instead of "
+                                            f"{sorted(default_template.identifiers)}")
+
+    def resolve_templates(self):
+
+        # language fallback is resolved once here, per key
+        templates = {}
+
+        for language in (self.default_language, self.language):
+            for group, group_templates in self.locales.get(language, {}).items():
+                for key, template in group_templates.items():
+                    templates[(group, key)] = template
+
+        self.templates = templates
+
+    def set_language(self, language: str):
+
+        if language and language in self.locales:
+            self.language = language
         else:
             self.language = self.default_language
 
-    def get(self, group: str, key: str, vars: dict = {}):
+        self.resolve_templates()
+
+    def reload_if_changed(self):
+
+        now = time.monotonic()
+        if now - self.last_reload_check < self.reload_interval:
+            return False
+
+        self.last_reload_check = now
+
+        locale_files = self.get_locale_files()
+        files_mtimes = {
+            file_path : os.path.getmtime(file_path)
+            for file_path in locale_files.values()
+        }
+
+        if files_mtimes == self.files_mtimes:
+            return False
+
+        try:
+            self.load_templates()
+        except Exception as e:
+            # keep serving the templates loaded last, the file may be half saved
+            self.logger.error(f"error while reloading templates: {e}")
+            return False
 
-        targeted_language = self.language
+        self.logger.info("templates reloaded")
 
-        group_path = os.path.join(
-            self.current_path, "locales", self.language, f"{group}.py"
-        )
+        return True
 
-        if not os.path.exists(group_path):
-            group_path = os.path.join(
-                self.current_path, "locales", self.default_language, f"{group}.py"
-        )
-            targeted_language = self.default_language
-        
-        # import group module at runtime
-        module = __import__(f"stores.llm.templates.locales.{targeted_language}.{group}", fromlist = [group])
+    def get_template(self, group: str, key: str):
 
-        if not module:
+        if self.hot_reload:
+            self.reload_if_changed()
+
+        return self.templates.get((group, key))
+
+    def get(self, group: str, key: str, vars: dict = {}):
+
+        template = self.get_template(group, key)
+
+        if not template:
             return None
 
-        key_attribute = getattr(module, key)
+        return template.render(vars)
+
+    def render_many(self, group: str, key: str, vars_list: list):
 
-        if not key_attribute:
+        # renders one template for every vars dict, e.g. one prompt per retrieved document
+        template = self.get_template(group, key)
+
+        if not template:
             return None
-        
-        return key_attribute.substitute(vars)
\ No newline at end of file
+
+        return [ template.render(vars) for vars in vars_list ]
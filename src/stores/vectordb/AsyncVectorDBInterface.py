@@ -0,0 +1,62 @@
+from abc import ABC, abstractmethod
+from typing import List
+from models.db_schemes import RetrievedDocument
+
+class AsyncVectorDBInterface(ABC):
+
+    # same operations as VectorDBInterface, awaited so the event loop keeps
+    # serving other requests while the vector db works
+
+    @abstractmethod
+    async def connect(self):
+        pass
+
+    @abstractmethod
+    async def disconnect(self):
+        pass
+
+    @abstractmethod
+    async def is_collection_exists(self, collection_name) ->bool:
+        pass
+
+    @abstractmethod
+    async def list_all_collections(self) -> List:
+        pass
+
+    @abstractmethod
+    async def get_collection_info(self, collection_name) -> dict:
+        pass
+
+    @abstractmethod
+    async def delete_collection(self, collection_name):
+        pass
+
+    @abstractmethod
+    async def create_collection(self, collection_name: str , 
+                                embedding_size: int ,
+                                do_reset: bool = False):
+        pass
+
+    @abstractmethod
+    async def insert_one(self, collection_name: str, text: str, vector: list,
+                         metadata: dict, record_id: str):
+        pass
+
+    @abstractmethod
+    async def insert_many(self, collection_name: str, texts: List[str],
+                          vectors: List[list], metadatas: List[dict],
+                          record_ids: List[str], batch_size: int = 50,
+                          asset_ids: List[str] = None):
+        pass
+
+    @abstractmethod
+    async def delete_by_asset_ids(self, collection_name: str, asset_ids: List[str]):
+        pass
+
+    @abstractmethod
+    async def search_by_vector(self, collection_name: str, vector: list, limit: int) -> List[RetrievedDocument]:
+        pass
+
+    @abstractmethod
+    async def search_by_vectors(self, collection_name: str, vectors: List[list], limit: int) -> List[List[RetrievedDocument]]:
+        pass
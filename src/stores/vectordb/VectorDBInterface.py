@@ -42,9 +42,18 @@ class VectorDBInterface(ABC):
     @abstractmethod
     def insert_many(self, collection_name: str, texts: List[str],
                      vectors: List[list], metadatas: List[dict],
-                    record_ids: List[str], batch_size: int = 50):
+                    record_ids: List[str], batch_size: int = 50,
+                    asset_ids: List[str] = None):
+        pass
+
+    @abstractmethod
+    def delete_by_asset_ids(self, collection_name: str, asset_ids: List[str]):
         pass
 
     @abstractmethod
     def search_by_vector(self, collection_name: str, vector: list, limit: int) -> List[RetrievedDocument]:
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    def search_by_vectors(self, collection_name: str, vectors: List[list], limit: int) -> List[List[RetrievedDocument]]:
+        pass
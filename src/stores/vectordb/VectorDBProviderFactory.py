@@ -1,5 +1,4 @@
 from .VectorDBEnums import VectorDBEnums
-from .providers import QdrantDBProvider
 from controllers.BaseController import BaseController
 
 class VectorDBProviderFactory:
@@ -12,6 +11,7 @@ class VectorDBProviderFactory:
     def create(self, provider: str):
 
         if provider == VectorDBEnums.QDRANT.value:
+            from .providers.QdrantDBProvider import QdrantDBProvider
 
             db_path = self.base_controller.get_database_path(
                 db_name = self.config.VECTOR_DB_PATH)
@@ -21,4 +21,22 @@ class VectorDBProviderFactory:
                 distance_method = self.config.VECTOR_DB_DISTANCE_METHOD
             )
         
+        return None
+
+    def create_async(self, provider: str):
+
+        if provider == VectorDBEnums.QDRANT.value:
+            from .providers.AsyncQdrantDBProvider import AsyncQdrantDBProvider
+
+            db_path = self.base_controller.get_database_path(
+                db_name = self.config.VECTOR_DB_PATH)
+
+            return AsyncQdrantDBProvider(
+                db_path = db_path,
+                distance_method = self.config.VECTOR_DB_DISTANCE_METHOD,
+                url = self.config.VECTOR_DB_URL,
+                api_key = self.config.VECTOR_DB_API_KEY,
+                thread_pool_workers = self.config.VECTOR_DB_THREAD_POOL_WORKERS
+            )
+        
         return None
\ No newline at end of file
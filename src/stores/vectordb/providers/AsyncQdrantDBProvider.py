@@ -0,0 +1,239 @@
+from qdrant_client import AsyncQdrantClient, QdrantClient, models
+from ..AsyncVectorDBInterface import AsyncVectorDBInterface
+from ..VectorDBEnums import DistanceMethodEnums
+from models.db_schemes import RetrievedDocument
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import List
+import asyncio
+import logging
+import uuid
+
+class AsyncQdrantDBProvider(AsyncVectorDBInterface):
+
+    def __init__(self, db_path: str, distance_method: str, url: str = None,
+                       api_key: str = None, thread_pool_workers: int = 1):
+
+        self.client = None
+        self.executor = None
+        self.db_path = db_path
+        self.url = url
+        self.api_key = api_key
+        self.thread_pool_workers = thread_pool_workers
+
+        if distance_method == DistanceMethodEnums.COSINE.value:
+            self.distance_method = models.Distance.COSINE
+        elif distance_method == DistanceMethodEnums.DOT.value:
+            self.distance_method = models.Distance.DOT
+
+        self.logger = logging.getLogger(__name__)
+
+    def is_local(self) -> bool:
+        return not self.url
+
+    async def connect(self):
+
+        if self.is_local():
+            # the local (on disk) client is synchronous and not safe for concurrent
+            # writes, its calls run on a dedicated pool, one thread by default
+            self.executor = ThreadPoolExecutor(max_workers = self.thread_pool_workers,
+                                               thread_name_prefix = "qdrant")
+            self.client = await self.run_in_executor(QdrantClient, path = self.db_path)
+        else:
+            self.client = AsyncQdrantClient(url = self.url, api_key = self.api_key if self.api_key else None)
+
+        return self.client
+
+    async def disconnect(self):
+
+        if self.client is None:
+            return None
+
+        if self.is_local():
+            _ = await self.run_in_executor(self.client.close)
+            self.executor.shutdown(wait = True)
+            self.executor = None
+        else:
+            _ = await self.client.close()
+
+        self.client = None
+
+        return None
+
+    async def run_in_executor(self, function, **kwargs):
+
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, partial(function, **kwargs)
+        )
+
+    async def call(self, method_name: str, **kwargs):
+
+        # QdrantClient and AsyncQdrantClient expose the same methods
+        method = getattr(self.client, method_name)
+
+        if self.is_local():
+            return await self.run_in_executor(method, **kwargs)
+
+        return await method(**kwargs)
+
+    async def is_collection_exists(self, collection_name) ->bool:
+
+        return await self.call("collection_exists", collection_name = collection_name)
+    
+    async def list_all_collections(self) -> List:
+        
+        return await self.call("get_collections")
+    
+    async def get_collection_info(self, collection_name) -> dict:
+
+        return await self.call("get_collection", collection_name = collection_name)
+    
+    async def delete_collection(self, collection_name):
+
+        if await self.is_collection_exists(collection_name) is True:
+            return await self.call("delete_collection", collection_name = collection_name)
+        else:
+            return None
+
+    async def create_collection(self, collection_name: str , 
+                                embedding_size: int ,
+                                do_reset: bool = False):
+        if do_reset:
+            _ = await self.delete_collection(collection_name = collection_name)
+
+        if not await self.is_collection_exists(collection_name = collection_name):
+            _ = await self.call(
+                "create_collection",
+                collection_name = collection_name,
+                vectors_config = models.VectorParams(
+                    size = embedding_size,
+                    distance = self.distance_method
+                )
+            )
+
+            return True
+        
+        return False
+    
+    async def insert_one(self, collection_name: str, text: str, vector: list,
+                         metadata: dict, record_id: str):
+
+        return await self.insert_many(
+            collection_name = collection_name,
+            texts = [text],
+            vectors = [vector],
+            metadatas = [metadata],
+            record_ids = [record_id] if record_id else None
+        )
+
+    async def insert_many(self, collection_name: str, texts: List[str],
+                          vectors: List[list], metadatas: List[dict],
+                          record_ids: List[str], batch_size: int = 50,
+                          asset_ids: List[str] = None):
+
+        metadatas = [None] * len(texts) if not metadatas else metadatas
+        asset_ids = [None] * len(texts) if not asset_ids else asset_ids
+        # points need an id, records pushed without one get a random id
+        record_ids = [str(uuid.uuid4()) for _ in texts] if not record_ids else record_ids
+
+        for i in range(0, len(vectors), batch_size):
+
+            batch_points = [
+
+                models.PointStruct(
+                    id = record_ids[j],
+                    vector = vectors[j],
+                    payload = {
+                        "text" : texts[j],
+                        "metadata" : metadatas[j],
+                        "asset_id" : asset_ids[j],
+                    }
+                )
+
+                for j in range(i, min(i + batch_size, len(vectors)))
+            ]
+
+            try :
+                _ = await self.call(
+                    "upsert",
+                    collection_name = collection_name,
+                    points = batch_points
+                )
+
+            except Exception as e:
+                self.logger.error(f"error while inserting batch: {e}")
+                return False
+            
+        return True
+    
+    async def delete_by_asset_ids(self, collection_name: str, asset_ids: List[str]):
+
+        if not await self.is_collection_exists(collection_name = collection_name):
+            return None
+
+        return await self.call(
+            "delete",
+            collection_name = collection_name,
+            points_selector = models.FilterSelector(
+                filter = models.Filter(
+                    must = [
+                        models.FieldCondition(
+                            key = "asset_id",
+                            match = models.MatchAny(any = asset_ids)
+                        )
+                    ]
+                )
+            )
+        )
+    
+    async def search_by_vector(self, collection_name: str, vector: list, limit: int = 5):
+        
+        results = await self.call(
+            "search",
+            collection_name = collection_name,
+            query_vector = vector,
+            limit = limit
+        )
+
+        if not results or len(results) == 0:
+            return None
+
+        return [
+
+            RetrievedDocument(**{
+                "id" : str(res.id),
+                "score" : res.score,
+                "text": res.payload["text"]
+            })
+
+            for res in results
+        ]
+
+    async def search_by_vectors(self, collection_name: str, vectors: List[list], limit: int = 5):
+
+        # one request for all the queries, results come back in the order of vectors
+        batch_results = await self.call(
+            "search_batch",
+            collection_name = collection_name,
+            requests = [
+                models.SearchRequest(vector = vector, limit = limit, with_payload = True)
+                for vector in vectors
+            ]
+        )
+
+        if not batch_results or len(batch_results) != len(vectors):
+            return None
+
+        return [
+            [
+                RetrievedDocument(**{
+                    "id" : str(res.id),
+                    "score" : res.score,
+                    "text": res.payload["text"]
+                })
+
+                for res in results
+            ]
+
+            for results in batch_results
+        ]
@@ -91,10 +91,13 @@ class QdrantDBProvider(VectorDBInterface):
 
     def insert_many(self, collection_name: str, texts: List[str],
                     vectors: List[list], metadatas: List[dict],
-                    record_ids: List[str], batch_size: int = 50):
+                    record_ids: List[str], batch_size: int = 50,
+                    asset_ids: List[str] = None):
         
         # if metadatas was None convert it to list of None so we can iterate
         metadatas = [None] * len(metadatas) if not metadatas else metadatas
+        # asset ids are stored in the payload so an asset's points can be deleted on reprocessing
+        asset_ids = [None] * len(texts) if not asset_ids else asset_ids
         # if record_ids was None convert it to list of None so we can iterate
         record_ids = list(0, range(record_ids)) * len(record_ids) if not record_ids else record_ids
 
@@ -104,6 +107,7 @@ class QdrantDBProvider(VectorDBInterface):
             batch_vectors = vectors[i : i + batch_size]
             batch_metadatas = metadatas[i : i + batch_size]
             batch_record_ids = record_ids[i : i + batch_size]
+            batch_asset_ids = asset_ids[i : i + batch_size]
 
             batch_record = [
 
@@ -113,6 +117,7 @@ class QdrantDBProvider(VectorDBInterface):
                     payload = {
                         "text" : batch_texts[i],
                         "metadata" : batch_metadatas[i],
+                        "asset_id" : batch_asset_ids[i],
                     }
                 )
 
@@ -131,6 +136,25 @@ class QdrantDBProvider(VectorDBInterface):
             
         return True
     
+    def delete_by_asset_ids(self, collection_name: str, asset_ids: List[str]):
+
+        if not self.is_collection_exists(collection_name = collection_name):
+            return None
+
+        return self.client.delete(
+            collection_name = collection_name,
+            points_selector = models.FilterSelector(
+                filter = models.Filter(
+                    must = [
+                        models.FieldCondition(
+                            key = "asset_id",
+                            match = models.MatchAny(any = asset_ids)
+                        )
+                    ]
+                )
+            )
+        )
+    
     def search_by_vector(self, collection_name: str, vector: list, limit: int = 5):
         
         results = self.client.search(
@@ -145,9 +169,38 @@ class QdrantDBProvider(VectorDBInterface):
         return [
 
             RetrievedDocument(**{
+                "id" : str(res.id),
                 "score" : res.score,
                 "text": res.payload["text"]
             })
 
             for res in results
+        ]
+
+    def search_by_vectors(self, collection_name: str, vectors: List[list], limit: int = 5):
+
+        # one request for all the queries, results come back in the order of vectors
+        batch_results = self.client.search_batch(
+            collection_name = collection_name,
+            requests = [
+                models.SearchRequest(vector = vector, limit = limit, with_payload = True)
+                for vector in vectors
+            ]
+        )
+
+        if not batch_results or len(batch_results) != len(vectors):
+            return None
+
+        return [
+            [
+                RetrievedDocument(**{
+                    "id" : str(res.id),
+                    "score" : res.score,
+                    "text": res.payload["text"]
+                })
+
+                for res in results
+            ]
+
+            for results in batch_results
         ]
\ No newline at end of file
@@ -0,0 +1,86 @@
+import os
+import numpy as np
+import pytest
+
+# parity of the ONNX embedding backend (fp32 and int8) with SentenceTransformer.encode
+# run from src/:  python -m pytest tests
+# skipped without torch / sentence-transformers / onnxruntime / onnx, or when the model
+# cannot be downloaded. ONNX_PARITY_MODEL_ID and ONNX_PARITY_INT8_MIN_SIMILARITY override
+# the defaults
+
+pytest.importorskip("torch")
+pytest.importorskip("onnxruntime")
+pytest.importorskip("onnx")
+sentence_transformers = pytest.importorskip("sentence_transformers")
+
+from stores.llm.providers.OnnxEmbeddingProvider import OnnxEmbeddingProvider, export_onnx_model
+from benchmarks.bench_onnx_embeddings import generate_texts, cosine_similarities
+
+MODEL_ID = os.environ.get("ONNX_PARITY_MODEL_ID", "sentence-transformers/all-MiniLM-L6-v2")
+FP32_MIN_SIMILARITY = 0.9999
+INT8_MIN_SIMILARITY = float(os.environ.get("ONNX_PARITY_INT8_MIN_SIMILARITY", "0.98"))
+
+TEXTS = [
+    "What is retrieval augmented generation?",
+    "  leading and trailing spaces  ",
+    "ما هو الذكاء الاصطناعي؟",
+    "a",
+    # longer than the model's max_seq_length, both sides must truncate the same way
+    " ".join(["the document is split into chunks before indexing"] * 80),
+] + generate_texts(64)
+
+@pytest.fixture(scope = "module")
+def reference_model():
+
+    try:
+        return sentence_transformers.SentenceTransformer(MODEL_ID, device = "cpu")
+    except OSError as e:
+        pytest.skip(f"{MODEL_ID} could not be loaded: {e}")
+
+@pytest.fixture(scope = "module")
+def onnx_dir(reference_model, tmp_path_factory):
+
+    return export_onnx_model(model_id = MODEL_ID, output_dir = str(tmp_path_factory.mktemp("onnx")))
+
+@pytest.fixture(scope = "module")
+def reference_vectors(reference_model):
+
+    return reference_model.encode(TEXTS, batch_size = 16, convert_to_numpy = True)
+
+def embed_with_onnx(onnx_dir: str, embedding_size: int, quantize: bool):
+
+    provider = OnnxEmbeddingProvider(
+        intra_op_threads = 1,
+        quantize = quantize,
+        default_input_max_characters = 10 ** 9,
+        default_embedding_batch_size = 16
+    )
+
+    try:
+        provider.set_embedding_model(model_id = onnx_dir, embedding_size = embedding_size)
+        vectors = provider.embed_texts(TEXTS)
+    finally:
+        provider.close()
+
+    assert vectors is not None and len(vectors) == len(TEXTS)
+
+    return np.array(vectors, dtype = np.float32)
+
+def test_fp32_matches_sentence_transformers(reference_model, onnx_dir, reference_vectors):
+
+    vectors = embed_with_onnx(
+        onnx_dir, reference_model.get_sentence_embedding_dimension(), quantize = False
+    )
+
+    assert vectors.shape == reference_vectors.shape
+    assert cosine_similarities(reference_vectors, vectors).min() >= FP32_MIN_SIMILARITY
+
+def test_int8_is_close_to_sentence_transformers(reference_model, onnx_dir, reference_vectors):
+
+    vectors = embed_with_onnx(
+        onnx_dir, reference_model.get_sentence_embedding_dimension(), quantize = True
+    )
+
+    assert os.path.exists(os.path.join(onnx_dir, "model_quantized.onnx"))
+    assert vectors.shape == reference_vectors.shape
+    assert cosine_similarities(reference_vectors, vectors).min() >= INT8_MIN_SIMILARITY
@@ -0,0 +1,120 @@
+from motor.motor_asyncio import AsyncIOMotorClient
+from helpers.config import get_settings
+from stores.llm import LLMProviderFactory
+from stores.vectordb import VectorDBProviderFactory
+from stores.llm.templates.template_parser import TemplateParser
+from models import ProjectModel, ChunkModel, AssetModel, JobModel, EmbeddingCacheModel
+from controllers import NLPController, JobController
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import multiprocessing
+import logging
+import os
+import signal
+import socket
+
+# ingestion worker, run it next to the API with:  python worker.py
+# it leases jobs enqueued by /data/process and /nlp/index/push (run_in_background = 1)
+
+logging.basicConfig(level = logging.INFO)
+logger = logging.getLogger("worker")
+
+async def run_worker():
+
+    settings = get_settings()
+    mongo_conn = AsyncIOMotorClient( settings.MONGODB_URL )
+    db_client = mongo_conn[ settings.MONGODB_DATABASE ]
+
+    # file processing pool
+    process_pool = ProcessPoolExecutor(
+        max_workers = settings.PROCESS_POOL_WORKERS,
+        mp_context = multiprocessing.get_context("spawn")
+    ) if settings.PROCESS_POOL_WORKERS > 0 else None
+
+    # factories
+    llm_provider_factory = LLMProviderFactory(config = settings)
+    vectordb_provider_factory = VectorDBProviderFactory(config = settings)
+
+    # generation client
+    generation_client = llm_provider_factory.create(provider = settings.GENERATION_BACKEND)
+    generation_client.set_generation_model(model_id = settings.GENERATION_MODEL_ID)
+
+    # embedding client
+    embedding_client = llm_provider_factory.create(provider = settings.EMBEDDING_BACKEND)
+    embedding_client.set_embedding_model(model_id = settings.EMBEDDING_MODEL_ID,
+                                         embedding_size = settings.EMBEDDING_MODEL_SIZE)
+
+    # vectordb client
+    vectordb_client = vectordb_provider_factory.create_async(
+        provider = settings.VECTOR_DB_BACKEND)
+    _ = await vectordb_client.connect()
+
+    # template parser
+    template_parser = TemplateParser(
+        language = settings.PRIMARY_LANG,
+        default_language = settings.DEFAULT_LANG,
+        hot_reload = settings.TEMPLATES_HOT_RELOAD,
+    )
+
+    project_model = await ProjectModel.create_instance(db_client = db_client)
+
+    # no answer cache here, but the pushes and resets it runs version the API's caches
+    nlp_controller = NLPController(
+        vectordb_client = vectordb_client,
+        generation_client = generation_client,
+        embedding_client = embedding_client,
+        template_parser = template_parser,
+        embedding_cache = await EmbeddingCacheModel.create_instance(
+            db_client = db_client, max_entries = settings.EMBEDDING_CACHE_MAX_ENTRIES
+        ) if settings.EMBEDDING_CACHE_ENABLED else None,
+        project_model = project_model
+    )
+
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+
+    job_controller = JobController(
+        job_model = await JobModel.create_instance(db_client = db_client),
+        project_model = project_model,
+        asset_model = await AssetModel.create_instance(db_client = db_client),
+        chunk_model = await ChunkModel.create_instance(db_client = db_client),
+        nlp_controller = nlp_controller,
+        worker_id = worker_id,
+        process_pool = process_pool
+    )
+
+    # finish the running job before exiting on SIGINT / SIGTERM
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    logger.info(f"worker {worker_id} started")
+
+    try:
+        while not stop_event.is_set():
+
+            job = await job_controller.lease_job()
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(stop_event.wait(), timeout = settings.JOB_POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            logger.info(f"running {job.job_type} job {job.id} (attempt {job.job_attempts})")
+            _ = await job_controller.run_job(job)
+            logger.info(f"job {job.id} finished")
+
+    finally:
+        mongo_conn.close()
+        _ = await vectordb_client.disconnect()
+        await llm_provider_factory.close()
+
+        if process_pool:
+            process_pool.shutdown(cancel_futures = True)
+
+    logger.info(f"worker {worker_id} stopped")
+
+if __name__ == "__main__":
+    asyncio.run(run_worker())